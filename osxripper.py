@@ -5,6 +5,10 @@ import logging
 import os
 import sys
 from datetime import datetime
+import riplib.osxripper_output
+import riplib.osxripper_sinks
+import riplib.osxripper_syslog
+import riplib.osxripper_time
 from plugins.osx_version import OSXVersion
 from plugins.summary import Summary
 
@@ -38,6 +42,13 @@ def __run_summary():
     osx_summary.set_os_version(__get_osx_version())
     osx_summary.set_input_directory(args.input)
     osx_summary.set_output_directory(args.output)
+    osx_summary.set_since(args.since)
+    osx_summary.set_until(args.until)
+    osx_summary.set_deterministic(args.deterministic)
+    osx_summary.set_compression(args.compress, args.compress_level)
+    osx_summary.set_index(args.index)
+    osx_summary.set_syslog_filter(args.syslog_process, args.syslog_grep)
+    osx_summary.set_fsevents_prefixes(args.fsevents_prefix)
     osx_summary.parse()
 
 
@@ -120,9 +131,9 @@ def __load_plugins():
     #     logging.info("Loaded {0} plugins.".format(plugin_count))
 
 
-def __run_plugins():
+def __run_plugins(sink=None):
     """
-    Run the plugins from the active plugin list
+    Run the plugins from the active plugin list, writing records to sink if one is given
     """
     osx_version = __get_osx_version()
     for active_plugin in active_plugin_list:
@@ -131,7 +142,14 @@ def __run_plugins():
         active_plugin.set_os_version(osx_version)
         active_plugin.set_input_directory(args.input)
         active_plugin.set_output_directory(args.output)
-        active_plugin.parse()
+        active_plugin.set_since(args.since)
+        active_plugin.set_until(args.until)
+        active_plugin.set_deterministic(args.deterministic)
+        active_plugin.set_compression(args.compress, args.compress_level)
+        active_plugin.set_index(args.index)
+        active_plugin.set_syslog_filter(args.syslog_process, args.syslog_grep)
+        active_plugin.set_fsevents_prefixes(args.fsevents_prefix)
+        riplib.osxripper_sinks.run_plugin(active_plugin, sink)
 
 
 def __list_plugins():
@@ -161,6 +179,33 @@ def main():
     logging.info("Starting osxripper...")
     print("[INFO] Start: {0}".format(date_timestamp.strftime("%Y-%m-%d %H:%M:%S.%f")))
     logging.info("Start: %s", date_timestamp.strftime("%Y-%m-%d %H:%M:%S.%f"))
+    if args.format != "text":
+        print("[INFO] Output format: {0}".format(args.format))
+        logging.info("Output format: %s", args.format)
+    if args.sqlite_out:
+        print("[INFO] SQLite output: {0}".format(args.sqlite_out))
+        logging.info("SQLite output: %s", args.sqlite_out)
+    if args.since or args.until:
+        print("[INFO] Time window: {0} - {1}".format(args.since, args.until))
+        logging.info("Time window: %s - %s", args.since, args.until)
+    if args.syslog_process or args.syslog_grep:
+        print("[INFO] Syslog filter: process {0} message {1}".format(args.syslog_process, args.syslog_grep))
+        logging.info("Syslog filter: process %s message %s", args.syslog_process, args.syslog_grep)
+    if args.fsevents_prefix:
+        print("[INFO] FSEvents path filter: {0}".format(args.fsevents_prefix))
+        logging.info("FSEvents path filter: %s", args.fsevents_prefix)
+    if args.timeline:
+        print("[INFO] Timeline: {0}".format(args.timeline))
+        logging.info("Timeline: %s", args.timeline)
+    if args.deterministic:
+        print("[INFO] Deterministic output.")
+        logging.info("Deterministic output.")
+    if args.index:
+        print("[INFO] Writing report offset indexes.")
+        logging.info("Writing report offset indexes.")
+    if args.compress:
+        print("[INFO] Compressing output: {0} level {1}".format(args.compress, args.compress_level))
+        logging.info("Compressing output: %s level %d", args.compress, args.compress_level)
     __set_sys_path()
     osx_version = __get_osx_version()
     if args.summary:
@@ -171,7 +216,13 @@ def main():
         print("[INFO] Loading plugins for {0}.".format(osx_version))
         logging.info("Loading plugins for %s.", osx_version)
         __load_plugins()
-        __run_plugins()
+        sink = riplib.osxripper_sinks.open_sink(args.format, args.output, args.sqlite_out, args.deterministic,
+                                                 args.timeline, args.compress, args.compress_level)
+        try:
+            __run_plugins(sink)
+        finally:
+            if sink is not None:
+                sink.close()
     print("[INFO] Output files written to {0}.".format(args.output))
     logging.info("Output files written to %s.", args.output)
     print("[INFO] Finish: {0}".format(datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")))
@@ -198,8 +249,49 @@ if __name__ == "__main__":
     parser.add_argument("-o", "--output", help="output or directory")
     parser.add_argument("-l", "--list", action="store_true", help="list the available plugins")
     parser.add_argument("-s", "--summary", action="store_true", help="only run the summary plugin")
+    parser.add_argument("--since", type=riplib.osxripper_time.parse_time_argument,
+                        help="skip records before this UTC time, YYYY-MM-DD[ HH:MM[:SS]]")
+    parser.add_argument("--until", type=riplib.osxripper_time.parse_until_argument,
+                        help="skip records after this UTC time, YYYY-MM-DD[ HH:MM[:SS]], "
+                             "a date alone keeps the whole day and a time without seconds the whole minute")
+    parser.add_argument("--format", choices=riplib.osxripper_sinks.FORMATS, default="text",
+                        help="output format, plugins without record support always write text")
+    parser.add_argument("--sqlite-out", metavar="FILE",
+                        help="also write the records of supporting plugins to this new SQLite database")
+    parser.add_argument("--compress", choices=sorted(riplib.osxripper_output.COMPRESSORS),
+                        help="compress the output files as they are written")
+    parser.add_argument("--compress-level", type=int, choices=range(1, 10),
+                        default=riplib.osxripper_output.DEFAULT_LEVEL, metavar="1-9",
+                        help="compression level, default {0}".format(riplib.osxripper_output.DEFAULT_LEVEL))
+    parser.add_argument("--deterministic", action="store_true",
+                        help="sort directory listings and keep records in plugin order so repeated runs match byte for byte")
+    parser.add_argument("--timeline", choices=riplib.osxripper_sinks.TIMELINE_FORMATS,
+                        help="also write every dated record to one time ordered osxripper_timeline file")
+    parser.add_argument("--index", action="store_true",
+                        help="write a <report>.idx offset index beside each uncompressed report, see osxripper_seek.py")
+    parser.add_argument("--syslog-process", action="append", metavar="NAME",
+                        help="only keep the system log lines of this process, may be repeated")
+    parser.add_argument("--syslog-grep", type=riplib.osxripper_syslog.parse_pattern, metavar="REGEX",
+                        help="only keep the system log lines whose message matches this regular expression")
+    parser.add_argument("--fsevents-prefix", action="append", metavar="PATH",
+                        help="only keep the fseventsd records whose path is PATH or lies below it, such as /Users or /Volumes, may be repeated")
     args = parser.parse_args()
 
+    if args.since and args.until and args.since > args.until:
+        print("[ERROR] --since is later than --until.")
+        sys.exit(1)
+
+    if args.index and args.compress:
+        print("[WARNING] --index is ignored for compressed output.")
+
+    if args.format == "parquet" and riplib.osxripper_sinks.pyarrow is None:
+        print("[ERROR] --format parquet needs the pyarrow package.")
+        sys.exit(1)
+
+    if args.sqlite_out and os.path.exists(args.sqlite_out):
+        print("[ERROR] --sqlite-out file {0} already exists.".format(args.sqlite_out))
+        sys.exit(1)
+
     if args.list:
         __list_plugins()
         sys.exit(0)
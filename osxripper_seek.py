@@ -0,0 +1,130 @@
+""" Jump to a section, source file or record of an osxripper report using its .idx offset index """
+import argparse
+import os
+import sys
+import riplib.osxripper_output
+
+__author__ = 'osxripper'
+__version__ = '0.1'
+__license__ = 'GPLv3'
+
+
+def __find(entries, kind, text):
+    """
+    Return the index of the first entry of kind whose value contains text, None if there is none
+    """
+    for position, (_, entry_kind, value) in enumerate(entries):
+        if entry_kind == kind and text in value:
+            return position
+    return None
+
+
+def __section_end(entries, position, file_size):
+    """
+    Return the offset of the section header after entries[position], or the end of the file
+    """
+    for offset, kind, _ in entries[position + 1:]:
+        if kind == "section":
+            return offset
+    return file_size
+
+
+def __print_lines(report, offset, end, max_lines):
+    """
+    Print the lines of report from offset up to end or max_lines lines
+    """
+    report.seek(offset)
+    printed = 0
+    while report.tell() < end and (max_lines is None or printed < max_lines):
+        line = report.readline()
+        if not line:
+            break
+        sys.stdout.write(line.decode("utf-8", "replace").rstrip("\r\n") + "\n")
+        printed += 1
+
+
+def __seek_record(report, entries, section_position, number, end):
+    """
+    Return the offset of record number of the section at section_position, None if it is not
+    there. end is the offset where the section ends.
+    """
+    best = None
+    for offset, kind, value in entries[section_position + 1:]:
+        if kind == "section":
+            break
+        if kind == "record" and int(value) <= number:
+            best = (offset, int(value))
+    if best is None:
+        return None
+    report.seek(best[0])
+    # records end with a blank line, skip forward from the nearest indexed one
+    to_skip = number - best[1]
+    while to_skip > 0:
+        line = report.readline()
+        if not line or report.tell() >= end:
+            return None
+        if line in (b"\r\n", b"\n"):
+            to_skip -= 1
+    line = report.readline()
+    if report.tell() > end or line in (b"", b"\r\n", b"\n") or line.startswith(b"=" * 10):
+        return None
+    return report.tell() - len(line)
+
+
+def main():
+    """
+    Main entry point
+    """
+    index_path = args.report + riplib.osxripper_output.INDEX_SUFFIX
+    if not os.path.isfile(index_path):
+        print("[ERROR] No index {0}, run osxripper with --index.".format(index_path))
+        sys.exit(1)
+    entries = riplib.osxripper_output.read_index(index_path)
+    if not entries:
+        print("[ERROR] Index {0} is empty.".format(index_path))
+        sys.exit(1)
+    if args.list:
+        for offset, kind, value in entries:
+            if kind != "record":
+                print("{0:>12}  {1:<7}  {2}".format(offset, kind, value))
+        return
+    file_size = os.path.getsize(args.report)
+    with open(args.report, "rb") as report:
+        if args.source is not None:
+            position = __find(entries, "source", args.source)
+            if position is None:
+                print("[ERROR] No source file matching {0}.".format(args.source))
+                sys.exit(1)
+            __print_lines(report, entries[position][0], __section_end(entries, position, file_size), args.lines)
+            return
+        position = 0
+        if args.section is not None:
+            position = __find(entries, "section", args.section)
+            if position is None:
+                print("[ERROR] No section matching {0}.".format(args.section))
+                sys.exit(1)
+        if args.record is not None:
+            offset = __seek_record(report, entries, position, args.record,
+                                   __section_end(entries, position, file_size))
+            if offset is None:
+                print("[ERROR] Record {0} not found.".format(args.record))
+                sys.exit(1)
+            report.seek(offset)
+            line = report.readline()
+            while line and line not in (b"\r\n", b"\n"):
+                sys.stdout.write(line.decode("utf-8", "replace").rstrip("\r\n") + "\n")
+                line = report.readline()
+            return
+        __print_lines(report, entries[position][0], __section_end(entries, position, file_size), args.lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print part of an osxripper report using its .idx index")
+    parser.add_argument("report", help="report file written with --index")
+    parser.add_argument("-l", "--list", action="store_true", help="list the indexed sections and source files")
+    parser.add_argument("--section", help="first section whose name contains this text")
+    parser.add_argument("--source", help="first source file containing this text")
+    parser.add_argument("--record", type=int, help="record number within the section, counted from 0")
+    parser.add_argument("-n", "--lines", type=int, help="print at most this many lines")
+    args = parser.parse_args()
+    main()
@@ -37,6 +37,13 @@ class Summary(Plugin):
         smb_server.set_os_version(self.get_os_version)
         smb_server.set_input_directory(self.get_input_dir)
         smb_server.set_output_directory(self.get_output_dir)
+        smb_server.set_since(self.get_since)
+        smb_server.set_until(self.get_until)
+        smb_server.set_deterministic(self.get_deterministic)
+        smb_server.set_compression(self.get_compression, self.get_compression_level)
+        smb_server.set_index(self.get_index)
+        smb_server.set_syslog_filter(self.get_syslog_processes, self.get_syslog_pattern)
+        smb_server.set_fsevents_prefixes(self.get_fsevents_prefixes)
         smb_server.parse()
 
         dhcp_clients = DhcpLeasesPlist.DhcpLeasesPlist()
@@ -44,6 +51,13 @@ class Summary(Plugin):
         dhcp_clients.set_os_version(self.get_os_version)
         dhcp_clients.set_input_directory(self.get_input_dir)
         dhcp_clients.set_output_directory(self.get_output_dir)
+        dhcp_clients.set_since(self.get_since)
+        dhcp_clients.set_until(self.get_until)
+        dhcp_clients.set_deterministic(self.get_deterministic)
+        dhcp_clients.set_compression(self.get_compression, self.get_compression_level)
+        dhcp_clients.set_index(self.get_index)
+        dhcp_clients.set_syslog_filter(self.get_syslog_processes, self.get_syslog_pattern)
+        dhcp_clients.set_fsevents_prefixes(self.get_fsevents_prefixes)
         dhcp_clients.parse()
 
         system_time = SystemTime.SystemTime()
@@ -51,6 +65,13 @@ class Summary(Plugin):
         system_time.set_os_version(self.get_os_version)
         system_time.set_input_directory(self.get_input_dir)
         system_time.set_output_directory(self.get_output_dir)
+        system_time.set_since(self.get_since)
+        system_time.set_until(self.get_until)
+        system_time.set_deterministic(self.get_deterministic)
+        system_time.set_compression(self.get_compression, self.get_compression_level)
+        system_time.set_index(self.get_index)
+        system_time.set_syslog_filter(self.get_syslog_processes, self.get_syslog_pattern)
+        system_time.set_fsevents_prefixes(self.get_fsevents_prefixes)
         system_time.parse()
 
         user_accounts = UserAccountsPlist.UserAccountsPlist()
@@ -58,6 +79,13 @@ class Summary(Plugin):
         user_accounts.set_os_version(self.get_os_version)
         user_accounts.set_input_directory(self.get_input_dir)
         user_accounts.set_output_directory(self.get_output_dir)
+        user_accounts.set_since(self.get_since)
+        user_accounts.set_until(self.get_until)
+        user_accounts.set_deterministic(self.get_deterministic)
+        user_accounts.set_compression(self.get_compression, self.get_compression_level)
+        user_accounts.set_index(self.get_index)
+        user_accounts.set_syslog_filter(self.get_syslog_processes, self.get_syslog_pattern)
+        user_accounts.set_fsevents_prefixes(self.get_fsevents_prefixes)
         user_accounts.parse()
 
         playlists = PlayLists.Playlists()
@@ -65,6 +93,13 @@ class Summary(Plugin):
         playlists.set_os_version(self.get_os_version)
         playlists.set_input_directory(self.get_input_dir)
         playlists.set_output_directory(self.get_output_dir)
+        playlists.set_since(self.get_since)
+        playlists.set_until(self.get_until)
+        playlists.set_deterministic(self.get_deterministic)
+        playlists.set_compression(self.get_compression, self.get_compression_level)
+        playlists.set_index(self.get_index)
+        playlists.set_syslog_filter(self.get_syslog_processes, self.get_syslog_pattern)
+        playlists.set_fsevents_prefixes(self.get_fsevents_prefixes)
         playlists.parse()
 
         time_machine = TimeMachinePlist.TimeMachinePlist()
@@ -72,6 +107,13 @@ class Summary(Plugin):
         time_machine.set_os_version(self.get_os_version)
         time_machine.set_input_directory(self.get_input_dir)
         time_machine.set_output_directory(self.get_output_dir)
+        time_machine.set_since(self.get_since)
+        time_machine.set_until(self.get_until)
+        time_machine.set_deterministic(self.get_deterministic)
+        time_machine.set_compression(self.get_compression, self.get_compression_level)
+        time_machine.set_index(self.get_index)
+        time_machine.set_syslog_filter(self.get_syslog_processes, self.get_syslog_pattern)
+        time_machine.set_fsevents_prefixes(self.get_fsevents_prefixes)
         time_machine.parse()
 
         bluetooth = BluetoothPlist.BluetoothPlist()
@@ -79,6 +121,13 @@ class Summary(Plugin):
         bluetooth.set_os_version(self.get_os_version)
         bluetooth.set_input_directory(self.get_input_dir)
         bluetooth.set_output_directory(self.get_output_dir)
+        bluetooth.set_since(self.get_since)
+        bluetooth.set_until(self.get_until)
+        bluetooth.set_deterministic(self.get_deterministic)
+        bluetooth.set_compression(self.get_compression, self.get_compression_level)
+        bluetooth.set_index(self.get_index)
+        bluetooth.set_syslog_filter(self.get_syslog_processes, self.get_syslog_pattern)
+        bluetooth.set_fsevents_prefixes(self.get_fsevents_prefixes)
         bluetooth.parse()
 
         install_history = InstallHistory.InstallHistory()
@@ -86,4 +135,11 @@ class Summary(Plugin):
         install_history.set_os_version(self.get_os_version)
         install_history.set_input_directory(self.get_input_dir)
         install_history.set_output_directory(self.get_output_dir)
+        install_history.set_since(self.get_since)
+        install_history.set_until(self.get_until)
+        install_history.set_deterministic(self.get_deterministic)
+        install_history.set_compression(self.get_compression, self.get_compression_level)
+        install_history.set_index(self.get_index)
+        install_history.set_syslog_filter(self.get_syslog_processes, self.get_syslog_pattern)
+        install_history.set_fsevents_prefixes(self.get_fsevents_prefixes)
         install_history.parse()
@@ -1,5 +1,4 @@
 """ Module to parse Airport data """
-import codecs
 import logging
 import os
 import plistlib
@@ -30,7 +29,7 @@ class AirportPreferences(Plugin):
         """
         Parse /Library/Preferences/SystemConfiguration/com.apple.airport.preferences.plist
         """
-        with codecs.open(os.path.join(self.get_output_dir, self.get_output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self.get_output_dir, self.get_output_file)) as output_file:
             output_file.write("="*10 + " " + self.get_name + " " + "="*10 + "\r\n")
             plist_file = os.path.join(self.get_input_dir, "Library", "Preferences", "SystemConfiguration", self.get_data_file)
             output_file.write("Source File: {0}\r\n\r\n".format(plist_file))
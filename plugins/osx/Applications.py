@@ -1,5 +1,4 @@
 """ Module for listing applications """
-import codecs
 import logging
 import os
 from riplib.plugin import Plugin
@@ -28,18 +27,18 @@ class Applications(Plugin):
         """
         List contents of /Applications directory
         """
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             # N.B. Not testing OS version as /Applications is common to recent OSX versions
             applications_dir = os.path.join(self._input_dir, "Applications")
             if os.path.isdir(applications_dir):
                 output_file.write("="*10 + " " + self.get_name + " " + "="*10 + "\r\n")
                 output_file.write("Source Directory: {0}\r\n\r\n".format(applications_dir))
-                file_listing = os.listdir(applications_dir)
+                file_listing = self.list_dir(applications_dir)
                 for file_name in file_listing:
                     if not file_name.endswith(".app") and os.path.isdir(os.path.join(applications_dir, file_name)):
                         output_file.write("\t{0}\r\n".format(file_name))
                         sub_dir = os.path.join(applications_dir, file_name)
-                        sub_dir_list = os.listdir(sub_dir)
+                        sub_dir_list = self.list_dir(sub_dir)
                         for file_name1 in sub_dir_list:
                             output_file.write("\t\t{0}\r\n".format(file_name1))
                     else:
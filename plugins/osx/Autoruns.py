@@ -1,5 +1,4 @@
 """ Module for parsing autorun information """
-import codecs
 import logging
 import os
 from riplib.plugin import Plugin
@@ -28,7 +27,7 @@ class Autoruns(Plugin):
         """
         List contents of known Launch* directories
         """
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             if self._os_version in ["big_sur", "catalina", "mojave", "high_sierra", "sierra", "el_capitan", "yosemite",
                                     "mavericks", "mountain_lion", "lion", "snow_leopard"]:
                 sys_lib_launch_agents = os.path.join(self._input_dir, "System", "Library", "LaunchAgents")
@@ -43,7 +42,7 @@ class Autoruns(Plugin):
                     if os.path.isdir(doi):
                         output_file.write("="*10 + " Autoruns: " + doi.replace(self._input_dir, "") + "="*10 + "\r\n")
                         output_file.write("Source Directory: {0}\r\n\r\n".format(doi))
-                        file_listing = os.listdir(doi)
+                        file_listing = self.list_dir(doi)
                         for file_name in file_listing:
                             output_file.write("\t{0}\r\n".format(file_name))
                     else:
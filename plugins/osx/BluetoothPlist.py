@@ -1,6 +1,5 @@
 """ Module for parsing bluetooth data """
 import binascii
-import codecs
 import logging
 import os
 import riplib.ccl_bplist
@@ -30,7 +29,7 @@ class BluetoothPlist(Plugin):
         """
         /Library/Preferences/com.apple.Bluetooth.plist
         """
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             file = os.path.join(self._input_dir, "Library", "Preferences", self._data_file)
             output_file.write("Source File: {0}\r\n\r\n".format(file))
@@ -1,5 +1,4 @@
 """ Module for parsing boot flags """
-import codecs
 import logging
 import os
 import plistlib
@@ -31,7 +30,7 @@ class BootFlags(Plugin):
         """
         Parse /Library/Preferences/SystemConfiguration/com.apple.Boot.plist
         """
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             if self._os_version in ["big_sur", "catalina", "mojave", "high_sierra", "sierra", "el_capitan", "yosemite", "mavericks",
                                     "mountain_lion", "lion", "snow_leopard"]:
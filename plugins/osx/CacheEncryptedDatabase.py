@@ -1,8 +1,8 @@
 """ Module to parse cache_encryptedA.db """
-import codecs
 import logging
 import os
 import sqlite3
+import riplib.osxripper_sqlite
 import riplib.osxripper_time
 from riplib.plugin import Plugin
 
@@ -32,11 +32,11 @@ class CacheEncryptedDatabase(Plugin):
         """
         Read the /private/var/folders/.../cache_encryptedA.db
         """
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             start_folder = os.path.join(self._input_dir, "private", "var", "folders")
             file_list = []
-            for root, _, files in os.walk(start_folder):
+            for root, _, files in self.walk_dir(start_folder):
                 if self._data_file in files:
                     file_list.append(os.path.join(root, self._data_file))
 
@@ -88,8 +88,7 @@ class ParseVers110109():
 
         conn = None
         try:
-            conn = sqlite3.connect(self._data_file)
-            conn.row_factory = sqlite3.Row
+            conn = riplib.osxripper_sqlite.connect(self._data_file)
             with conn:
                 cur = conn.cursor()
                 cur.execute(query)
@@ -139,8 +138,7 @@ class ParseVers108():
                 "confidence,score FROM wifilocation ORDER BY timestamp, mac"
         conn = None
         try:
-            conn = sqlite3.connect(self._data_file)
-            conn.row_factory = sqlite3.Row
+            conn = riplib.osxripper_sqlite.connect(self._data_file)
             with conn:
                 cur = conn.cursor()
                 cur.execute(query)
@@ -1,5 +1,4 @@
 """ Module for parsing CUPS plist """
-import codecs
 import logging
 import os
 import plistlib
@@ -31,7 +30,7 @@ class CupsPrintersPlist(Plugin):
         """
         Parse /Library/Preferences/org.cups.printers.plist
         """
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             plist_file = os.path.join(self._input_dir, "Library", "Preferences", self._data_file)
             output_file.write("Source File: {0}\r\n\r\n".format(plist_file))
@@ -1,6 +1,5 @@
 """ Module to parse DHCP leases """
 import binascii
-import codecs
 import logging
 import os
 import plistlib
@@ -34,11 +33,11 @@ class DhcpLeasesPlist(Plugin):
         """
         working_dir = os.path.join(self._input_dir, "private", "var", "db", "dhcpclient", "leases")
         if os.path.isdir(working_dir):
-            file_listing = os.listdir(working_dir)
+            file_listing = self.list_dir(working_dir)
             for file_name in file_listing:
                 self.__parse_plist(os.path.join(working_dir, file_name))
         else:
-            with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+            with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
                 output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
                 output_file.write("[WARNING] File: {0} does not exist or cannot be found.\r\n".format(working_dir))
                 output_file.write("="*40 + " " + "\r\n\r\n")
@@ -50,7 +49,7 @@ class DhcpLeasesPlist(Plugin):
         """
         Parse the plist
         """
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             output_file.write("Source File: {0}\r\n\r\n".format(file))
             with open(file, "rb") as plist_to_load:
@@ -1,5 +1,4 @@
 """ Module to parse DiagnosticReporting data """
-import codecs
 import logging
 import os
 import riplib.ccl_bplist
@@ -27,7 +26,7 @@ class DiagnosticReportingNetworksNew(Plugin):
         self.set_type("bplist")
 
     def parse(self):
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             # Not in Sierra Beta?
             if self._os_version in ["el_capitan", "yosemite"]:
@@ -0,0 +1,257 @@
+""" Module to summarise the crash, hang and diagnostic reports in /Library/Logs/DiagnosticReports """
+import datetime
+import itertools
+import json
+import logging
+import os
+import re
+import riplib.osxripper_pool
+from riplib.osxripper_records import INT, TEXT, TIME, record_type
+from riplib.plugin import Plugin
+
+
+__author__ = 'osxripper'
+__version__ = '0.1'
+__license__ = 'GPLv3'
+
+EXTENSIONS = (".crash", ".ips", ".spin", ".hang", ".diag", ".panic")
+BATCH_SIZE = 256  # reports parsed per worker call, so tens of thousands of small files do not mean as many round trips
+HEADER_LINES = 200  # text header fields all come before the thread backtraces, well inside this
+# "Process:               Safari [1234]" style header lines, the keys of .crash, .spin, .hang and .diag reports
+HEADER_PATTERN = re.compile(r"(Process|Command|PID|Path|Identifier|Version|Date/Time|OS Version|Exception Type|Event|"
+                            r"Incident Identifier):\s+(.*)")
+PROCESS_PATTERN = re.compile(r"(.*?)\s*\[(\d+)\]$")  # "Safari [1234]"
+# "2019-10-01 10:00:00.123 -0700", the fraction and offset are missing from some reports
+TIME_PATTERN = re.compile(r"(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)(?:\.(\d+))?(?: ?([+-]\d\d):?(\d\d))?")
+HEADER_KEYS = {"Process": "process", "Command": "process", "PID": "pid", "Path": "path", "Identifier": "identifier",
+               "Version": "version", "Date/Time": "time", "OS Version": "os_version",
+               "Exception Type": "exception_type", "Event": "exception_type", "Incident Identifier": "incident"}
+
+DiagnosticReportRecord = record_type("DiagnosticReportRecord", (
+    ("user", None, TEXT),
+    ("source", None, TEXT),
+    ("report", "Report", TEXT),
+    ("type", "Type", TEXT),
+    ("time", "Time", TIME),
+    ("process", "Process", TEXT),
+    ("pid", "PID", INT),
+    ("path", "Path", TEXT),
+    ("identifier", "Identifier", TEXT),
+    ("version", "Version", TEXT),
+    ("os_version", "OS Version", TEXT),
+    ("exception_type", "Exception Type", TEXT),
+    ("bug_type", "Bug Type", TEXT),
+    ("incident", "Incident ID", TEXT),
+))
+# the fields report_row fills, in DiagnosticReportRecord order after user, source, report and type
+_ROW_FIELDS = ("time", "process", "pid", "path", "identifier", "version", "os_version", "exception_type",
+               "bug_type", "incident")
+
+
+def _report_time(text):
+    """
+    Return a report timestamp as a UTC datetime, the text itself if it cannot be parsed
+    """
+    match = TIME_PATTERN.match(text.strip())
+    if match is None:
+        return text.strip() or None
+    date_time = datetime.datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S")
+    if match.group(2):
+        date_time += datetime.timedelta(microseconds=int(match.group(2)[:6].ljust(6, "0")))
+    if match.group(3):
+        delta = datetime.timedelta(hours=int(match.group(3)[1:]), minutes=int(match.group(4)))
+        date_time -= delta if match.group(3)[0] == "+" else -delta
+    return date_time
+
+
+def _text_fields(lines, fields):
+    """
+    Fill fields from the "Key: value" header lines of a text report, first value wins
+    """
+    for count, line in enumerate(lines):
+        if count >= HEADER_LINES or line.startswith("Binary Images:") or line.startswith("Thread 0"):
+            break
+        match = HEADER_PATTERN.match(line)
+        if match is not None:
+            name = HEADER_KEYS[match.group(1)]
+            if fields.get(name) is None:
+                fields[name] = match.group(2).strip()
+    process = PROCESS_PATTERN.match(fields.get("process") or "")
+    if process is not None:
+        fields["process"] = process.group(1)
+        fields.setdefault("pid", process.group(2))
+
+
+def _ips_fields(header, body, fields):
+    """
+    Fill fields from the JSON header line of an .ips report and, since macOS 12, its JSON body
+    """
+    fields["process"] = header.get("app_name") or header.get("name")
+    fields["version"] = header.get("app_version")
+    fields["identifier"] = header.get("bundleID")
+    fields["time"] = header.get("timestamp")
+    fields["os_version"] = header.get("os_version")
+    fields["bug_type"] = header.get("bug_type")
+    fields["incident"] = header.get("incident_id")
+    if not isinstance(body, dict):
+        return
+    exception = body.get("exception") or {}
+    bundle = body.get("bundleInfo") or {}
+    fields["process"] = body.get("procName") or fields["process"]
+    fields["path"] = body.get("procPath")
+    fields["pid"] = body.get("pid")
+    fields["identifier"] = bundle.get("CFBundleIdentifier") or fields["identifier"]
+    fields["version"] = bundle.get("CFBundleShortVersionString") or fields["version"]
+    fields["time"] = body.get("captureTime") or fields["time"]
+    if exception.get("type"):
+        fields["exception_type"] = "{0} ({1})".format(exception["type"], exception["signal"]) \
+            if exception.get("signal") else exception["type"]
+
+
+def report_row(path):
+    """
+    Return (fields, problem): the _ROW_FIELDS of one report and None, or the reason it could
+    not be read. Text reports are read only as far as their header; the body of an .ips report
+    is only decoded when it is JSON.
+    """
+    fields = {}
+    problem = None
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as report_file:
+            first = report_file.readline()
+            if path.endswith(".ips") and first.startswith("{"):
+                header = json.loads(first)
+                second = report_file.readline()
+                body = None
+                if second.startswith("{"):
+                    body = json.loads(second + report_file.read())
+                else:
+                    _text_fields(itertools.chain([second], report_file), fields)
+                _ips_fields(header, body, fields)
+            else:
+                _text_fields(itertools.chain([first], report_file), fields)
+    except (OSError, ValueError) as error:
+        problem = str(error)
+    if isinstance(fields.get("time"), str):
+        fields["time"] = _report_time(fields["time"])
+    if fields.get("pid") is not None:
+        try:
+            fields["pid"] = int(fields["pid"])
+        except (TypeError, ValueError):
+            fields["pid"] = None
+    for name in ("bug_type", "version", "os_version"):
+        if fields.get(name) is not None:
+            fields[name] = str(fields[name])
+    return tuple(fields.get(name) for name in _ROW_FIELDS), problem
+
+
+def report_rows(paths, since=None, until=None):
+    """
+    Return (path, fields, problem) for each report of paths whose time is inside the since/until
+    window (UTC datetimes), reports without a readable time are kept. Plain tuples are returned
+    so the function can run in a worker process.
+    """
+    rows = []
+    for path in paths:
+        fields, problem = report_row(path)
+        date_time = fields[0]
+        if isinstance(date_time, datetime.datetime) and \
+                ((since is not None and date_time < since) or (until is not None and date_time > until)):
+            continue
+        rows.append((path, fields, problem))
+    return rows
+
+
+def scan_reports(directory):
+    """
+    Return the paths of the reports in directory and its sub-directories, such as Retired,
+    sorted, using os.scandir so no extra stat call is made per file
+    """
+    reports = []
+    pending = [directory]
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False) and entry.name.endswith(EXTENSIONS):
+                        reports.append(entry.path)
+        except OSError as error:
+            logging.warning("%s", error)
+    reports.sort()
+    return reports
+
+
+class DiagnosticReports(Plugin):
+    """
+    Plugin to summarise the crash, hang and diagnostic reports in /Library/Logs/DiagnosticReports
+    and /Users/<username>/Library/Logs/DiagnosticReports
+    """
+    def __init__(self):
+        """
+        Initialise the class.
+        """
+        super().__init__()
+        self.set_name("Diagnostic Reports")
+        self.set_description("Summarise the crash, hang and diagnostic reports in /Library/Logs/DiagnosticReports "
+                             "and /Users/<username>/Library/Logs/DiagnosticReports")
+        self.set_data_file("")  # listing directories so this is not needed
+        self.set_output_file("Diagnostic_Reports.txt")
+        self.set_type("multi")
+
+    def parse(self):
+        """
+        Write one summary record per report of each DiagnosticReports directory
+        """
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
+            output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
+            for username, working_dir in self.__report_dirs():
+                output_file.write("Source Directory: {0}\r\n\r\n".format(working_dir))
+                for record in self.__records(username, working_dir):
+                    output_file.write_record(record)
+            output_file.write("="*40 + "\r\n\r\n")
+
+    def iter_records(self):
+        """
+        Yield a DiagnosticReportRecord per report inside the --since/--until window, system
+        reports first and then those of each user. Reports are parsed in batches in parallel.
+        """
+        for username, working_dir in self.__report_dirs():
+            yield from self.__records(username, working_dir)
+
+    def __report_dirs(self):
+        """
+        Yield (username, directory) for /Library/Logs/DiagnosticReports, username None, and each
+        user's DiagnosticReports directory that exists
+        """
+        working_dir = os.path.join(self._input_dir, "Library", "Logs", "DiagnosticReports")
+        if os.path.isdir(working_dir):
+            yield None, working_dir
+        else:
+            logging.warning("Directory %s does not exist or cannot be found.", working_dir)
+            print("[WARNING] Directory {0} does not exist or cannot be found.".format(working_dir))
+        users_path = os.path.join(self._input_dir, "Users")
+        if os.path.isdir(users_path):
+            for username in self.list_dir(users_path):
+                working_dir = os.path.join(users_path, username, "Library", "Logs", "DiagnosticReports")
+                if not username == "Shared" and os.path.isdir(working_dir):
+                    yield username, working_dir
+        else:
+            logging.warning("%s does not exist.", users_path)
+            print("[WARNING] {0} does not exist.".format(users_path))
+
+    def __records(self, username, working_dir):
+        """
+        Yield the DiagnosticReportRecords of the reports in working_dir, in path order
+        """
+        reports = scan_reports(working_dir)
+        batches = [(reports[start:start + BATCH_SIZE], self._since, self._until)
+                   for start in range(0, len(reports), BATCH_SIZE)]
+        for rows in riplib.osxripper_pool.ordered_results(report_rows, batches):
+            for path, fields, problem in rows:
+                if problem is not None:
+                    logging.warning("File: %s %s.", path, problem)
+                    print("[WARNING] File: {0} {1}.".format(path, problem))
+                yield DiagnosticReportRecord(username, path, os.path.relpath(path, working_dir),
+                                             os.path.splitext(path)[1][1:], *fields)
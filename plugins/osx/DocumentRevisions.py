@@ -1,8 +1,8 @@
 """ Module to parse DocumentRevisions database """
-import codecs
 import logging
 import os
 import sqlite3
+import riplib.osxripper_sqlite
 import riplib.osxripper_time
 from riplib.plugin import Plugin
 
@@ -32,7 +32,7 @@ class DocumentRevisions(Plugin):
         """
         Read the db.sqlite SQLite database
         """
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             file = os.path.join(self._input_dir, ".DocumentRevisions-V100", "db-V1", self._data_file)
             output_file.write("Source File: {0}\r\n\r\n".format(file))
@@ -47,8 +47,7 @@ class DocumentRevisions(Plugin):
                 if os.path.isfile(file):
                     conn = None
                     try:
-                        conn = sqlite3.connect(file)
-                        conn.row_factory = sqlite3.Row
+                        conn = riplib.osxripper_sqlite.connect(file)
                         with conn:
                             cur = conn.cursor()
                             cur.execute(query)
@@ -1,8 +1,8 @@
 """ Module to parse InstallHistory plist """
-import codecs
 import logging
 import os
 import plistlib
+from riplib.osxripper_records import TEXT, TIME, record_type
 from riplib.plugin import Plugin
 
 
@@ -10,11 +10,22 @@ __author__ = 'osxripper'
 __version__ = '0.1'
 __license__ = 'GPLv3'
 
+InstallRecord = record_type("InstallRecord", (
+    ("source", None, TEXT),
+    ("content_type", "Content Type", TEXT),
+    ("display_name", "Display Name", TEXT),
+    ("display_version", "Display Version", TEXT),
+    ("date", "Date", TIME),
+    ("process_name", "Process Name", TEXT),
+    ("package_identifiers", "Package Identifiers", TEXT),
+))
+
 
 class InstallHistory(Plugin):
     """
     Plugin to list installed software from /Library/Receipts/InstallHistory.plist
     """
+    text_writes_records = False  # the text report is written from the plist, not from InstallRecords
 
     def __init__(self):
         """
@@ -31,7 +42,7 @@ class InstallHistory(Plugin):
         """
         Parse /Library/Receipts/InstallHistory.plist
         """
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             plist_file = os.path.join(self._input_dir, "Library", "Receipts", self._data_file)
             output_file.write("Source File: {0}\r\n\r\n".format(plist_file))
@@ -44,10 +55,10 @@ class InstallHistory(Plugin):
                 output_file.write("[WARNING] File: {0} does not exist or cannot be found.\r\n".format(plist_file))
                 print("[WARNING] File: {0} does not exist or cannot be found.".format(plist_file))
             if self._os_version in ["big_sur", "catalina", "mojave", "high_sierra", "sierra", "el_capitan"]:
-                parse_os = ParseVers1101011(output_file, plist)
+                parse_os = ParseVers1101011(output_file, plist, self.in_time_window)
                 parse_os.parse()
             elif self._os_version in ["yosemite", "mavericks", "mountain_lion", "lion", "snow_leopard"]:
-                parse_os = ParseVers1010106(output_file, plist)
+                parse_os = ParseVers1010106(output_file, plist, self.in_time_window)
                 parse_os.parse()
             else:
                 logging.warning("Not a known OSX version.")
@@ -55,13 +66,32 @@ class InstallHistory(Plugin):
             output_file.write("="*40 + "\r\n\r\n")
         output_file.close()
 
+    def iter_records(self):
+        """
+        Yield an InstallRecord per entry of /Library/Receipts/InstallHistory.plist
+        """
+        plist_file = os.path.join(self._input_dir, "Library", "Receipts", self._data_file)
+        if not os.path.isfile(plist_file):
+            logging.warning("File: %s does not exist or cannot be found.", plist_file)
+            return
+        with open(plist_file, "rb") as plist_to_load:
+            plist = plistlib.load(plist_to_load)
+        for item in plist:
+            if not self.in_time_window(item.get("date")):
+                continue
+            yield InstallRecord(plist_file, item.get("contentType"), item.get("displayName"),
+                                item.get("displayVersion"), item.get("date"), item.get("processName"),
+                                ", ".join(item.get("packageIdentifiers", [])))
+
+
 class ParseVers1101011():
     """
     Convenience class for parsing macOS data
     """
-    def __init__(self, output_file, data_file):
+    def __init__(self, output_file, data_file, in_time_window=None):
         self._output_file = output_file
         self._data_file = data_file
+        self._in_time_window = in_time_window
 
     def parse(self):
         """
@@ -69,6 +99,8 @@ class ParseVers1101011():
         """
         try:
             for item in self._data_file:
+                if self._in_time_window is not None and not self._in_time_window(item.get("date")):
+                    continue
                 if "displayName" in item:
                     self._output_file.write("Display Name       : {0}\r\n".format(item["displayName"]))
                 if "displayVersion" in item:
@@ -89,9 +121,10 @@ class ParseVers1010106():
     """
     Convenience class for parsing macOS data
     """
-    def __init__(self, output_file, data_file):
+    def __init__(self, output_file, data_file, in_time_window=None):
         self._output_file = output_file
         self._data_file = data_file
+        self._in_time_window = in_time_window
 
     def parse(self):
         """
@@ -99,6 +132,8 @@ class ParseVers1010106():
         """
         try:
             for item in self._data_file:
+                if self._in_time_window is not None and not self._in_time_window(item.get("date")):
+                    continue
                 if "contentType" in item:
                     self._output_file.write("Content Type       : {0}\r\n".format(item["contentType"]))
                 if "displayName" in item:
@@ -1,8 +1,8 @@
 """ Module to parse interactionC.db """
-import codecs
 import logging
 import os
 import sqlite3
+import riplib.osxripper_sqlite
 import riplib.osxripper_time
 from riplib.plugin import Plugin
 
@@ -42,7 +42,7 @@ class InteractionDatabase(Plugin):
                 "zc.zlastoutgoingrecipientdate" \
                 " FROM z_primarykey zpk,zcontacts zc WHERE zpk.z_ent = zc.z_ent"
 
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             database_file = os.path.join(self._input_dir, "private", "var", "db", "CoreDuet", "People", self._data_file)
             if self._os_version in ["big_sur", "catalina", "mojave", "high_sierra", "sierra", "el_capitan"]:
@@ -54,8 +54,7 @@ class InteractionDatabase(Plugin):
                     output_file.write("Source Database: {0}\r\n\r\n".format(database_file))
                     conn = None
                     try:
-                        conn = sqlite3.connect(database_file)
-                        conn.row_factory = sqlite3.Row
+                        conn = riplib.osxripper_sqlite.connect(database_file)
                         with conn:
                             cur = conn.cursor()
                             cur.execute(query)
@@ -1,5 +1,4 @@
 """ Module to list Kernel Extensions """
-import codecs
 import logging
 import os
 from riplib.plugin import Plugin
@@ -28,12 +27,12 @@ class KernelExtensions(Plugin):
         """
         List contents of /System/Library/Extensions directory
         """
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             extensions_dir = os.path.join(self._input_dir, "System", "Library", "Extensions")
             if os.path.isdir(extensions_dir):
                 output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
                 output_file.write("Source Directory: {0}\r\n\r\n".format(extensions_dir))
-                file_listing = os.listdir(extensions_dir)
+                file_listing = self.list_dir(extensions_dir)
                 for file_name in file_listing:
                     if file_name.endswith(".kext") or file_name.endswith(".ppp") or file_name.endswith(".bundle") or file_name.endswith(".plugin"):
                         output_file.write("\t{0}\r\n".format(file_name))
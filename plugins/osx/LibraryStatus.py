@@ -1,5 +1,4 @@
 """ Module to parse DocumentRevisions LibraryStatus """
-import codecs
 import logging
 import os
 import plistlib
@@ -30,7 +29,7 @@ class LibraryStatus(Plugin):
         """
         Parse /.DocumentRevisions-V100/LibraryStatus
         """
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             if self._os_version in ["big_sur", "catalina"]:
                 logging.info("This version of OSX is not supported by this plugin.")
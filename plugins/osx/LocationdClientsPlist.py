@@ -1,5 +1,4 @@
 """ Module to parse clients.plist """
-import codecs
 import datetime
 import logging
 import os
@@ -33,7 +32,7 @@ class LocationdClientsPlist(Plugin):
         Parse /private/var/db/locationd/clients.plist
         """
         mac_absolute = datetime.datetime(2001, 1, 1, 0, 0, 0)
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             file = os.path.join(self._input_dir, "private", "var", "db", "locationd", self._data_file)
             output_file.write("Source File: {0}\r\n\r\n".format(file))
@@ -1,5 +1,4 @@
 """ Module to list contents of /.MobileBackups """
-import codecs
 import logging
 import os
 from riplib.plugin import Plugin
@@ -29,17 +28,17 @@ class MobileBackupList(Plugin):
         """
         List contents of /.MobileBackups directory
         """
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             mobilebackups_dir = os.path.join(self._input_dir, ".MobileBackups")
             if os.path.isdir(mobilebackups_dir):
                 output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
                 output_file.write("Source Directory: {0}\r\n\r\n".format(mobilebackups_dir))
-                file_listing = os.listdir(mobilebackups_dir)
+                file_listing = self.list_dir(mobilebackups_dir)
                 for file_name in file_listing:
                     output_file.write("\t{0}\r\n".format(file_name))
                     test_path = os.path.join(mobilebackups_dir, file_name)
                     if os.path.isdir(test_path):
-                        test_path_file_list = os.listdir(test_path)
+                        test_path_file_list = self.list_dir(test_path)
                         for test_path_file in test_path_file_list:
                             output_file.write("\t\t{0}\r\n".format(test_path_file))
             else:
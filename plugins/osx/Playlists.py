@@ -1,5 +1,4 @@
 """ Module to list playlist files under /private/var/db/BootCaches """
-import codecs
 import logging
 import os
 from riplib.plugin import Plugin
@@ -30,19 +29,19 @@ class Playlists(Plugin):
         """
         List .playlist files under /private/var/db/BootCaches
         """
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             if self._os_version in ["big_sur", "catalina", "mojave", "high_sierra", "sierra", "el_capitan", "yosemite",
                                     "mavericks", "mountain_lion", "lion"]:
                 working_dir = os.path.join(self._input_dir, "private", "var", "db", "BootCaches")
                 output_file.write("Source Directory: {0}\r\n\r\n".format(working_dir))
                 if os.path.isdir(working_dir):
-                    file_listing = os.listdir(working_dir)
+                    file_listing = self.list_dir(working_dir)
                     for file_name in file_listing:
                         test_file = os.path.join(working_dir, file_name)
                         if os.path.isdir(test_file):
                             output_file.write("Generated User ID: {0}\r\n".format(file_name))
-                            user_playlists = os.listdir(test_file)
+                            user_playlists = self.list_dir(test_file)
                             for user_file in user_playlists:
                                 output_file.write("\t{0}\r\n".format(user_file))
                             output_file.write("\r\n")
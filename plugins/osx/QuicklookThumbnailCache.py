@@ -1,9 +1,9 @@
 """ Module to Parse information from /private/var/folders/.../com.apple.QuickLook.thumbnailcache/index.sqlite """
-import codecs
 import logging
 import os
 import sqlite3
 from riplib.plugin import Plugin
+import riplib.osxripper_sqlite
 import riplib.osxripper_time
 
 
@@ -31,7 +31,7 @@ class QuicklookThumbnailCache(Plugin):
         """
         Read the /private/var/folders/.../com.apple.QuickLook.thumbnailcache/index.sqlite SQLite database
         """
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
 
             start_folder = os.path.join(self._input_dir, "private", "var", "folders")
@@ -45,10 +45,12 @@ class QuicklookThumbnailCache(Plugin):
                 return
             elif self._os_version in ["mojave", "high_sierra", "sierra", "el_capitan", "yosemite", "mavericks",
                                       "mountain_lion", "lion", "snow_leopard"]:
-                query = "SELECT f.folder,f.file_name,tb.hit_count,tb.last_hit_date FROM files f,thumbnails tb" \
-                        " WHERE f.rowid = tb.file_id ORDER BY f.folder, tb.last_hit_date"
+                window_sql, window_params = self.time_window_sql("tb.last_hit_date", riplib.osxripper_time.COCOA_EPOCH)
+                query = "SELECT f.folder,f.file_name,tb.hit_count,cocoa_to_iso(tb.last_hit_date) AS last_hit_date_iso" \
+                        " FROM files f,thumbnails tb" \
+                        " WHERE f.rowid = tb.file_id" + window_sql + " ORDER BY f.folder, tb.last_hit_date"
                 # search for index.sqlite
-                for root, _, files in os.walk(start_folder):
+                for root, _, files in self.walk_dir(start_folder):
                     if "com.apple.QuickLook.thumbnailcache" in root:
                         if self._data_file in files:
                             file_list.append(os.path.join(root, self._data_file))
@@ -58,19 +60,17 @@ class QuicklookThumbnailCache(Plugin):
                             output_file.write("Source Database: {0}\r\n\r\n".format(database_file))
                             conn = None
                             try:
-                                conn = sqlite3.connect(database_file)
-                                conn.row_factory = sqlite3.Row
+                                conn = riplib.osxripper_sqlite.connect(database_file)
                                 with conn:
                                     cur = conn.cursor()
-                                    cur.execute(query)
+                                    cur.execute(query, window_params)
                                     rows = cur.fetchall()
                                     if len(rows) > 0:
                                         for row in rows:
-                                            last_hit_date = riplib.osxripper_time.get_cocoa_seconds(row["last_hit_date"])
                                             output_file.write("Folder        : {0}\r\n".format(row["folder"]))
                                             output_file.write("File Name     : {0}\r\n".format(row["file_name"]))
                                             output_file.write("Hit Count     : {0}\r\n".format(row["hit_count"]))
-                                            output_file.write("Last Hit Date : {0}\r\n".format(last_hit_date))
+                                            output_file.write("Last Hit Date : {0}\r\n".format(row["last_hit_date_iso"]))
                                             output_file.write("\r\n")
                                     else:
                                         output_file.write("No data in database.\r\n")
@@ -31,7 +31,7 @@ class RootShellHistory(Plugin):
         """
         root_path = os.path.join(self._input_dir, "private", "var", "root")
         if os.path.isdir(root_path):
-            with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+            with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
                 output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
                 file = os.path.join(root_path, self._data_file)
                 output_file.write("Source File: {0}\r\n\r\n".format(file))
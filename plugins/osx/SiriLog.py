@@ -1,7 +1,7 @@
 """ Module to find Siri usage traces """
-import codecs
 import logging
 import os
+import riplib.osxripper_lines
 from riplib.plugin import Plugin
 
 
@@ -34,22 +34,26 @@ class SiriLog(Plugin):
         search_line = "com.apple.siri.embeddedspeech.xpc"
         header_line = "    Activities  Actions         Logs     Traces % Events  Public Data Private Data   % Data Description"
 
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
+
+            def write_statistics(log_line):
+                """
+                Write the date lines and the Siri statistics lines under the column headings
+                """
+                if date_line in log_line:
+                    output_file.write("{0}\r\n".format(log_line))
+                elif search_line in log_line:
+                    output_file.write("{0}\r\n".format(header_line))
+                    output_file.write("{0}\r\n".format(log_line))
+                    output_file.write("\r\n")
+
             output_file.write("=" * 10 + " " + self._name + " " + "=" * 10 + "\r\n")
             log_file = os.path.join(self._input_dir, "private", "var", "db", "diagnostics", self._data_file)
             output_file.write("Source File: {0}\r\n\r\n".format(log_file))
             if self._os_version in ["big_sur", "catalina", "mojave", "high_sierra", "sierra"]:
                 if os.path.isfile(log_file):
-                    with open(log_file, "r") as lf_handle:
-                        for log_line in lf_handle:
-                            if date_line in log_line:
-                                output_file.write("{0}\r\n".format(log_line))
-                            elif search_line in log_line:
-                                output_file.write("{0}\r\n".format(header_line))
-                                output_file.write("{0}\r\n".format(log_line))
-                                output_file.write("\r\n")
-                        output_file.write("="*30)
-                    lf_handle.close()
+                    riplib.osxripper_lines.each_line(log_file, write_statistics)
+                    output_file.write("="*30)
                 else:
                     logging.warning("File: %s does not exist or cannot be found.\r\n", log_file)
                     output_file.write("[WARNING] File: {0} does not exist or cannot be found.\r\n".format(log_file))
@@ -1,5 +1,4 @@
 """ Module to get host shares history """
-import codecs
 import logging
 import os
 import plistlib
@@ -29,7 +28,7 @@ class SmbServer(Plugin):
         """
         Parse /Library/Preferences/SystemConfiguration/com.apple.smb.server.plist
         """
-        with codecs.open(os.path.join(self.get_output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self.get_output_dir, self._output_file)) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             plist_file = os.path.join(self._input_dir, "Library", "Preferences", "SystemConfiguration", self._data_file)
             output_file.write("Source File: {0}\r\n\r\n".format(plist_file))
@@ -0,0 +1,174 @@
+""" Module to parse the Apple System Log (ASL) binary stores in /private/var/log/asl """
+import datetime
+import logging
+import mmap
+import os
+import struct
+import riplib.osxripper_pool
+import riplib.osxripper_time
+from riplib.osxripper_records import INT, TEXT, TIME, record_type
+from riplib.plugin import Plugin
+
+
+__author__ = 'osxripper'
+__version__ = '0.1'
+__license__ = 'GPLv3'
+
+SIGNATURE = b"ASL DB\x00\x00\x00\x00\x00\x00"
+# signature, version, first record offset, creation time, string cache size, last record offset
+HEADER = struct.Struct(">12sIQQIQ")
+# padding, record length, next record offset, message id, time, nanoseconds, level, flags, pid,
+# uid, gid, real uid, real gid, ref pid, key/value string count, then the host, sender, facility,
+# message, ref process and session string references
+RECORD = struct.Struct(">HIQQQIHHIiiiiIIQQQQQQ")
+STRING_REFERENCE = struct.Struct(">Q")
+STRING_HEADER = struct.Struct(">HI")  # type (1), length including the trailing NUL
+STRING_TYPE = 1
+INLINE_STRING = 0x8000000000000000  # references with the top bit set hold up to 7 bytes of string
+LEVELS = ("Emergency", "Alert", "Critical", "Error", "Warning", "Notice", "Info", "Debug")
+
+AslRecord = record_type("AslRecord", (
+    ("source", None, TEXT),
+    ("time", "Time", TIME),
+    ("message_id", "Message ID", INT),
+    ("level", "Level", TEXT),
+    ("host", "Host", TEXT),
+    ("sender", "Sender", TEXT),
+    ("facility", "Facility", TEXT),
+    ("pid", "PID", INT),
+    ("uid", "UID", INT),
+    ("gid", "GID", INT),
+    ("ref_process", "Ref Process", TEXT),
+    ("ref_pid", "Ref PID", INT),
+    ("session", "Session", TEXT),
+    ("message", "Message", TEXT),
+    ("extra", "Extra Fields", TEXT),
+))
+
+
+def _string(data, reference):
+    """
+    Return the string a reference points to, None for an empty or bad reference
+    """
+    if reference == 0:
+        return None
+    if reference & INLINE_STRING:
+        length = (reference >> 56) & 0x0f
+        return reference.to_bytes(8, "big")[1:1 + min(length, 7)].decode("utf-8", "replace")
+    if reference + STRING_HEADER.size > len(data):
+        return None
+    string_type, length = STRING_HEADER.unpack_from(data, reference)
+    start = reference + STRING_HEADER.size
+    if string_type != STRING_TYPE or start + length > len(data):
+        return None
+    return data[start:start + length].rstrip(b"\x00").decode("utf-8", "replace")
+
+
+def store_rows(store, since=None, until=None):
+    """
+    Return (rows, problem): the fields of each record of an ASL store, in AslRecord order,
+    skipping records outside the since/until window (UTC datetimes), and None or the reason the
+    store could not be read to the end. The store is memory mapped and its record chain walked
+    in place, only the strings of kept records are decoded. Plain tuples are returned so the
+    function can run in a worker process.
+    """
+    rows = []
+    try:
+        with open(store, "rb") as store_file:
+            if os.fstat(store_file.fileno()).st_size < HEADER.size:
+                return rows, "too small to be an ASL store"
+            with mmap.mmap(store_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return rows, _walk_records(data, store, since, until, rows)
+    except (OSError, ValueError) as error:
+        return rows, str(error)
+
+
+def _walk_records(data, store, since, until, rows):
+    """
+    Append the fields of the records of a mapped store to rows, returning None or the reason
+    the walk stopped early
+    """
+    signature, _, offset, _, _, _ = HEADER.unpack_from(data, 0)
+    if signature != SIGNATURE:
+        return "not an ASL store"
+    while offset:
+        if offset + RECORD.size > len(data):
+            return "record at offset {0} is truncated".format(offset)
+        (_, _, next_offset, message_id, seconds, nanoseconds, level, _, pid, uid, gid, _, _, ref_pid,
+         kv_count, host, sender, facility, message, ref_process, session) = RECORD.unpack_from(data, offset)
+        written = riplib.osxripper_time.UNIX_EPOCH + datetime.timedelta(seconds=seconds,
+                                                                        microseconds=nanoseconds // 1000)
+        if (since is None or written >= since) and (until is None or written <= until):
+            extra = []
+            kv_offset = offset + RECORD.size
+            for index in range(0, kv_count - 1, 2):
+                position = kv_offset + index * STRING_REFERENCE.size
+                if position + 2 * STRING_REFERENCE.size > len(data):
+                    break
+                key, value = struct.unpack_from(">QQ", data, position)
+                extra.append("{0}: {1}".format(_string(data, key), _string(data, value)))
+            rows.append((store, written, message_id, LEVELS[level] if level < len(LEVELS) else str(level),
+                         _string(data, host), _string(data, sender), _string(data, facility), pid, uid, gid,
+                         _string(data, ref_process), ref_pid, _string(data, session), _string(data, message),
+                         "; ".join(extra)))
+        # the chain only runs forward, anything else is a damaged store
+        if next_offset and next_offset <= offset:
+            return "record at offset {0} links back to offset {1}".format(offset, next_offset)
+        offset = next_offset
+    return None
+
+
+class SystemAslStore(Plugin):
+    """
+    Plugin to parse the Apple System Log (ASL) binary stores in /private/var/log/asl
+    """
+    def __init__(self):
+        """
+        Initialise the class.
+        """
+        super().__init__()
+        self.set_name("System ASL Store")
+        self.set_description("Parse the Apple System Log (ASL) binary stores in /private/var/log/asl")
+        self.set_data_file("")  # listing directories so this is not needed
+        self.set_output_file("System_ASL.txt")
+        self.set_type("multi")
+
+    def parse(self):
+        """
+        Write the records of each ASL store
+        """
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
+            output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
+            working_dir = os.path.join(self._input_dir, "private", "var", "log", "asl")
+            output_file.write("Source Directory: {0}\r\n\r\n".format(working_dir))
+            if os.path.isdir(working_dir):
+                source = None
+                for record in self.iter_records():
+                    if record.source != source:
+                        source = record.source
+                        output_file.write("Source File: {0}\r\n\r\n".format(source))
+                    output_file.write_record(record)
+            else:
+                logging.warning("Directory %s does not exist or cannot be found.", working_dir)
+                output_file.write("[WARNING] Directory {0} does not exist or cannot be found.\r\n".format(working_dir))
+                print("[WARNING] Directory {0} does not exist or cannot be found.".format(working_dir))
+            output_file.write("="*40 + "\r\n\r\n")
+
+    def iter_records(self):
+        """
+        Yield an AslRecord per record of each store inside the --since/--until window. Stores are
+        read in name order and parsed in parallel.
+        """
+        working_dir = os.path.join(self._input_dir, "private", "var", "log", "asl")
+        if not os.path.isdir(working_dir):
+            logging.warning("Directory %s does not exist or cannot be found.", working_dir)
+            return
+        stores = [os.path.join(working_dir, file_name) for file_name in sorted(self.list_dir(working_dir))
+                  if file_name.endswith(".asl") and os.path.isfile(os.path.join(working_dir, file_name))]
+        arguments = [(store, self._since, self._until) for store in stores]
+        for store, (rows, problem) in zip(stores, riplib.osxripper_pool.ordered_results(store_rows, arguments)):
+            if problem is not None:
+                logging.warning("File: %s %s.", store, problem)
+                print("[WARNING] File: {0} {1}.".format(store, problem))
+            for row in rows:
+                yield AslRecord(*row)
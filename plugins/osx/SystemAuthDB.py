@@ -1,9 +1,9 @@
 """ Module to parse auth.db """
-import codecs
 import logging
 import os
 import sqlite3
 from riplib.plugin import Plugin
+import riplib.osxripper_sqlite
 import riplib.osxripper_time
 
 
@@ -31,7 +31,7 @@ class SystemAuthDB(Plugin):
         """
         Read the /private/var/db/auth.db SQLite database
         """
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             query = "SELECT name, rules.'group', type, class, tries, version, kofn, created, modified, " \
                     "identifier, comment FROM rules ORDER BY name"
@@ -42,8 +42,7 @@ class SystemAuthDB(Plugin):
                 if os.path.isfile(file):
                     conn = None
                     try:
-                        conn = sqlite3.connect(file)
-                        conn.row_factory = sqlite3.Row
+                        conn = riplib.osxripper_sqlite.connect(file)
                         with conn:
                             cur = conn.cursor()
                             cur.execute(query)
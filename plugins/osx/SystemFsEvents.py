@@ -0,0 +1,93 @@
+""" Module to parse the fseventsd page files in /.fseventsd """
+import logging
+import os
+import riplib.osxripper_fsevents
+import riplib.osxripper_pool
+import riplib.osxripper_timeline
+from riplib.osxripper_records import INT, TEXT, record_type
+from riplib.plugin import Plugin
+
+
+__author__ = 'osxripper'
+__version__ = '0.1'
+__license__ = 'GPLv3'
+
+FsEventRecord = record_type("FsEventRecord", (
+    ("source", None, TEXT),
+    ("event_id", "Event ID", INT),
+    ("path", "Path", TEXT),
+    ("flags", "Flags", TEXT),
+    ("mask", "Flag Mask", TEXT),
+    ("node_id", "Node ID", INT),
+    ("page_file", "Page File", TEXT),
+))
+
+
+class SystemFsEvents(Plugin):
+    """
+    Plugin to parse the fseventsd page files in /.fseventsd
+    """
+    def __init__(self):
+        """
+        Initialise the class.
+        """
+        super().__init__()
+        self.set_name("System FSEvents")
+        self.set_description("Parse the fseventsd page files in /.fseventsd")
+        self.set_data_file("")  # listing directories so this is not needed
+        self.set_output_file("System_FsEvents.txt")
+        self.set_type("multi")
+
+    def parse(self):
+        """
+        Write the records of every page file, in event id order
+        """
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
+            output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
+            working_dir = os.path.join(self._input_dir, ".fseventsd")
+            output_file.write("Source Directory: {0}\r\n".format(working_dir))
+            path_prefixes = self._fsevents_prefixes
+            if path_prefixes is not None:
+                output_file.write("Path Filter: {0}\r\n".format(", ".join(path_prefixes)))
+            output_file.write("\r\n")
+            if os.path.isdir(working_dir):
+                for record in self.iter_records():
+                    output_file.write_record(record)
+            else:
+                logging.warning("Directory %s does not exist or cannot be found.", working_dir)
+                output_file.write("[WARNING] Directory {0} does not exist or cannot be found.\r\n".format(working_dir))
+                print("[WARNING] Directory {0} does not exist or cannot be found.".format(working_dir))
+            output_file.write("="*40 + "\r\n\r\n")
+
+    def iter_records(self):
+        """
+        Yield an FsEventRecord per record of every page file whose path passes the
+        --fsevents-prefix filter, in event id order. Page files are decompressed and parsed in
+        parallel, each sorted by event id into a run file in the output directory, and the runs
+        merged from disk so memory does not grow with the number of page files. The records carry no
+        time so the --since/--until window does not apply.
+        """
+        working_dir = os.path.join(self._input_dir, ".fseventsd")
+        if not os.path.isdir(working_dir):
+            logging.warning("Directory %s does not exist or cannot be found.", working_dir)
+            return
+        page_files = [os.path.join(working_dir, file_name) for file_name in sorted(self.list_dir(working_dir))
+                      if riplib.osxripper_fsevents.PAGE_FILE_PATTERN.match(file_name) and
+                      os.path.isfile(os.path.join(working_dir, file_name))]
+        path_prefixes = self._fsevents_prefixes
+        sorter = riplib.osxripper_timeline.ExternalSorter(self._output_dir)
+        try:
+            run_paths = [sorter.run_path() for _ in page_files]
+            arguments = [(page_file, run_path, path_prefixes) for page_file, run_path in zip(page_files, run_paths)]
+            for page_file, run_path, (count, problem) in zip(page_files, run_paths, riplib.osxripper_pool.ordered_results(
+                    riplib.osxripper_fsevents.page_file_run, arguments)):
+                if problem is not None:
+                    logging.warning("File: %s %s.", page_file, problem)
+                    print("[WARNING] File: {0} {1}.".format(page_file, problem))
+                sorter.add_run(run_path, count)
+            for item in sorter.sorted_items():
+                event_id, path, flags, node_id, page_file = riplib.osxripper_fsevents.run_row(item)
+                yield FsEventRecord(page_file, event_id, path, riplib.osxripper_fsevents.flag_names(flags),
+                                    "0x{0:08x}".format(flags), node_id, os.path.basename(page_file))
+        finally:
+            sorter.close()
@@ -0,0 +1,169 @@
+""" Module to parse the software install timeline from install.log and its rotations """
+import datetime
+import logging
+import os
+import re
+import riplib.osxripper_rotation
+import riplib.osxripper_syslog
+from riplib.osxripper_records import INT, TEXT, TIME, record_type
+from riplib.plugin import Plugin
+
+
+__author__ = 'osxripper'
+__version__ = '0.1'
+__license__ = 'GPLv3'
+
+# "2019-10-08 10:26:24-07 host installd[410]: message", written since 10.12, older logs use the
+# syslog format of riplib.osxripper_syslog.LINE_PATTERN
+ISO_LINE_PATTERN = re.compile(r"(?P<date>\d{4})-(?P<month>\d\d)-(?P<day>\d\d) (?P<hour>\d\d):(?P<minute>\d\d):(?P<second>\d\d)"
+                              r"(?P<offset>[+-]\d\d(?::?\d\d)?)? (?P<host>\S+) (?P<process>[^\s\[:]+)(?:\[(?P<pid>\d+)\])?: "
+                              r"(?P<message>.*)")
+# (event, pattern) tried in order, the first match names the event of a line; name, version and
+# package are taken from the groups of the same name
+EVENTS = (
+    ("installed", re.compile(r"\bInstalled \"(?P<name>[^\"]*)\" \((?P<version>[^)]*)\)")),
+    ("begin install", re.compile(r"-{3,} ?Begin install ?-{3,}", re.IGNORECASE)),
+    ("end install", re.compile(r"-{3,} ?End install ?-{3,}", re.IGNORECASE)),
+    ("failed", re.compile(r"\binstall(?:ation)? failed\b", re.IGNORECASE)),
+    ("succeeded", re.compile(r"\binstall(?:ation)? succeeded\b", re.IGNORECASE)),
+    ("package", re.compile(r"\bPK\w*Package <id=(?P<package>[^,>]+)(?:, version=(?P<version>[^,>]+))?")),
+    ("package", re.compile(r"\bProduct archive (?P<package>\S+)")),
+    ("package", re.compile(r"\bExtracting (?P<package>\S+)")),
+)
+
+InstallLogRecord = record_type("InstallLogRecord", (
+    ("source", None, TEXT),
+    ("time", "Time", TIME),
+    ("host", "Host", TEXT),
+    ("process", "Process", TEXT),
+    ("pid", "PID", INT),
+    ("event", "Event", TEXT),
+    ("name", "Name", TEXT),
+    ("version", "Version", TEXT),
+    ("package", "Package", TEXT),
+    ("message", "Message", TEXT),
+))
+
+
+def _iso_time(match):
+    """
+    Return the UTC time of an ISO install.log line match, None if it is not a valid date
+    """
+    try:
+        date_time = datetime.datetime(int(match.group("date")), int(match.group("month")), int(match.group("day")),
+                                      int(match.group("hour")), int(match.group("minute")), int(match.group("second")))
+    except ValueError:
+        return None
+    offset = match.group("offset")
+    if offset is not None:
+        digits = offset[1:].replace(":", "")
+        delta = datetime.timedelta(hours=int(digits[:2]), minutes=int(digits[2:] or 0))
+        date_time -= delta if offset[0] == "+" else -delta
+    return date_time
+
+
+def _syslog_time(match, year):
+    """
+    Return the time of a syslog install.log line match in the given year, None if it is not a valid date
+    """
+    try:
+        return datetime.datetime(year, riplib.osxripper_syslog.MONTHS[match.group("month")], int(match.group("day")),
+                                 int(match.group("hour")), int(match.group("minute")), int(match.group("second")))
+    except ValueError:
+        return None
+
+
+def install_records(path_lines, years, since=None, until=None):
+    """
+    Yield an InstallLogRecord for each line of (path, line) pairs that records an install step,
+    streaming. Other lines are skipped. Lines without a timestamp, such as the package list of
+    an install request, take the time, host and process of the line before. ISO times are
+    converted to UTC, syslog times have their year from years, the
+    riplib.osxripper_syslog.YearInference of the logs, and are left in the local time of the Mac.
+    """
+    header = (None, None, None, None)  # time, host, process, pid of the last timestamped line
+    for path, line in path_lines:
+        match = ISO_LINE_PATTERN.match(line)
+        if match is not None:
+            header = (_iso_time(match), match.group("host"), match.group("process"), match.group("pid"))
+            message = match.group("message")
+        else:
+            match = riplib.osxripper_syslog.LINE_PATTERN.match(line)
+            if match is not None:
+                year = years.year(riplib.osxripper_syslog.MONTHS[match.group("month")])
+                header = (_syslog_time(match, year), match.group("host"), match.group("process"), match.group("pid"))
+                message = match.group("message")
+            else:
+                message = line.strip()
+        for event, pattern in EVENTS:
+            event_match = pattern.search(message)
+            if event_match is not None:
+                break
+        else:
+            continue
+        date_time, host, process, pid = header
+        if date_time is not None:
+            if (since is not None and date_time < since) or (until is not None and date_time > until):
+                continue
+        groups = event_match.groupdict()
+        yield InstallLogRecord(path, date_time, host, process, int(pid) if pid is not None else None, event,
+                               groups.get("name"), groups.get("version"), groups.get("package"), message)
+
+
+class SystemInstallLog(Plugin):
+    """
+    Plugin to parse the software install timeline from install.log and its rotations
+    """
+    def __init__(self):
+        """
+        Initialise the class.
+        """
+        super().__init__()
+        self.set_name("System Install Log")
+        self.set_description("Parse the software install timeline from /private/var/log/install.log and its rotations")
+        self.set_data_file("")  # listing directories so this is not needed
+        self.set_output_file("System_InstallLog.txt")
+        self.set_type("text")
+
+    def parse(self):
+        """
+        Write the install events of install.log and its rotations, oldest first
+        """
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
+            output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
+            working_dir = os.path.join(self._input_dir, "private", "var", "log")
+            output_file.write("Source Directory: {0}\r\n\r\n".format(working_dir))
+            if os.path.isdir(working_dir) and self.__logs(working_dir):
+                source = None
+                for record in self.iter_records():
+                    if record.source != source:
+                        source = record.source
+                        output_file.write("Source File: {0}\r\n\r\n".format(source))
+                    output_file.write_record(record)
+            else:
+                logging.warning("Directory %s or File %s does not exist or cannot be found.", working_dir, "install.log")
+                output_file.write("[WARNING] Directory {0} or File {1} does not exist or cannot be found.\r\n".format(working_dir, "install.log"))
+                print("[WARNING] Directory {0} or File {1} does not exist or cannot be found.".format(working_dir, "install.log"))
+            output_file.write("="*40 + "\r\n\r\n")
+
+    def iter_records(self):
+        """
+        Yield an InstallLogRecord per recognised install step of the rotated install logs, oldest
+        first, and then of install.log, inside the --since/--until window. Rotated logs are
+        decompressed in parallel.
+        """
+        working_dir = os.path.join(self._input_dir, "private", "var", "log")
+        logs = self.__logs(working_dir) if os.path.isdir(working_dir) else []
+        if not logs:
+            logging.warning("File: %s does not exist or cannot be found.", os.path.join(working_dir, "install.log"))
+            return
+        years = riplib.osxripper_syslog.YearInference(
+            datetime.datetime.fromtimestamp(os.path.getmtime(logs[0]), datetime.timezone.utc))
+        yield from install_records(riplib.osxripper_rotation.log_lines(logs, self._output_dir), years,
+                                   self._since, self._until)
+
+    def __logs(self, working_dir):
+        """
+        Return the paths of the rotated install logs in working_dir, oldest first, then install.log
+        """
+        return riplib.osxripper_rotation.rotated_logs(working_dir, self.list_dir(working_dir), "install.log")
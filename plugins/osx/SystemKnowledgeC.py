@@ -1,8 +1,9 @@
 """ Module to information from /private/var/db/CoreDuet/Knowledge/KnowledgeC.db reference """
-import codecs
 import logging
 import os
 import sqlite3
+import riplib.osxripper_sqlite
+import riplib.osxripper_time
 from riplib.plugin import Plugin
 
 
@@ -31,6 +32,7 @@ class SystemKnowledgeC(Plugin):
         """
         Read the /private/var/db/CoreDuet/Knowledge/KnowledgeC.db SQLite database
         """
+        window_sql, window_params = self.time_window_sql("ZSTARTDATE", riplib.osxripper_time.COCOA_EPOCH)
         mac4n6_sql = "SELECT datetime(ZCREATIONDATE+978307200, 'UNIXEPOCH', 'LOCALTIME') as \"ENTRY CREATION\"," \
                      "CASE ZSTARTDAYOFWEEK" \
                      " WHEN \"1\" THEN \"Sunday\"" \
@@ -50,24 +52,23 @@ class SystemKnowledgeC(Plugin):
                      "FROM " \
                      "ZOBJECT " \
                      "WHERE " \
-                     "ZSTREAMNAME IS \"/app/inFocus\" " \
+                     "ZSTREAMNAME IS \"/app/inFocus\"" + window_sql + " " \
                      "ORDER BY \"START\""
 
         headers = "ENTRY CREATION\tDAY OF WEEK\tGMT OFFSET\tSTART\tEND\tUSAGE IN SECONDS\tSTREAMNAME\tVALUESTRING\r\n"
 
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             output_file.write("=" * 10 + " " + self._name + " " + "=" * 10 + "\r\n")
             file = os.path.join(self._input_dir, "private", "var", "db", "CoreDuet", "Knowledge", self._data_file)
             output_file.write("Source File: {0}\r\n\r\n".format(file))
             if self._os_version in ["big_sur", "catalina", "mojave", "high_sierra"]:
                 if os.path.isfile(file):
-                    conn = None
+                    sqlite_connection = None
                     try:
-                        sqlite_connection = sqlite3.connect(file)
-                        sqlite_connection.row_factory = sqlite3.Row
+                        sqlite_connection = riplib.osxripper_sqlite.connect(file)
                         with sqlite_connection:
                             cur = sqlite_connection.cursor()
-                            cur.execute(mac4n6_sql)
+                            cur.execute(mac4n6_sql, window_params)
                             rows = cur.fetchall()
                             output_file.write(headers)
                             for row in rows:
@@ -85,8 +86,8 @@ class SystemKnowledgeC(Plugin):
                         logging.error("%s", error.args[0])
                         print("[ERROR] {0}".format(error.args[0]))
                     finally:
-                        if conn:
-                            conn.close()
+                        if sqlite_connection:
+                            sqlite_connection.close()
                 else:
                     logging.warning("File: %s does not exist or cannot be found.\r\n", file)
                     output_file.write("[WARNING] File: {0} does not exist or cannot be found.\r\n".format(file))
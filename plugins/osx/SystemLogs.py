@@ -1,8 +1,10 @@
 """ Module to extract and decompress system logs """
-import codecs
+import datetime
 import logging
 import os
-import gzip
+import io
+import riplib.osxripper_rotation
+import riplib.osxripper_syslog
 from riplib.plugin import Plugin
 
 
@@ -10,6 +12,8 @@ __author__ = 'osxripper'
 __version__ = '0.1'
 __license__ = 'GPLv3'
 
+CHUNK_SIZE = 1024 * 1024  # characters decoded per read
+
 
 class SystemLogs(Plugin):
     """
@@ -26,11 +30,25 @@ class SystemLogs(Plugin):
         self.set_output_file("System_Log_Completed.txt")
         self.set_type("text")
 
+    def iter_records(self):
+        """
+        Yield a SyslogRecord per line of the rotated system logs, oldest first, and then of
+        system.log, keeping only lines passing the --syslog-process/--syslog-grep filter and the
+        --since/--until window
+        """
+        working_dir = os.path.join(self._input_dir, "private", "var", "log")
+        if not os.path.isfile(os.path.join(working_dir, "system.log")):
+            logging.warning("File: %s does not exist or cannot be found.", os.path.join(working_dir, "system.log"))
+            return
+        yield from self.__records(working_dir, self.__archives(working_dir),
+                                  riplib.osxripper_syslog.line_filter(self._syslog_processes, self._syslog_pattern,
+                                                                      self._since, self._until))
+
     def parse(self):
         """
         Locate and extract System.log and backups from /private/var/log
         """
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             working_dir = os.path.join(self._input_dir, "private", "var", "log")
             output_file.write("Source Directory: {0}\r\n\r\n".format(working_dir))
@@ -39,35 +57,16 @@ class SystemLogs(Plugin):
         # Output log file names at the top of master output file so we know what we are working with
 
             if os.path.isdir(working_dir) and os.path.isfile(os.path.join(working_dir, "system.log")):
-                file_listing = []
-                file_listing_all = os.listdir(working_dir)
+                file_listing = self.__archives(working_dir)
                 output_file.write("="*10 + " Log File Found: System Log " + "="*10 + "\r\n")
-                for file_name in file_listing_all:
-                    if file_name.startswith("system") and file_name.endswith(".gz"):
-                        file_listing.append(os.path.join(working_dir, file_name))
-                        output_file.write("="*10 + " Log File Found: " + os.path.join(working_dir, file_name) + " " + "="*10 + "\r\n")
-
-        # Open first unzipped log and write this out to master output file
-
-                output_file.write("\r\n")
-                system_log_file = codecs.open(os.path.join(working_dir, "system.log"), "r", encoding="utf-8")
-                output_file.write("\r\n")
-                output_file.write("="*10 + " Current Live System Log file " + "="*10 + "\r\n")
-                output_file.write("\r\n")
-                for lines in system_log_file:
-                    output_file.write(lines.replace("\n", "\r\n"))
-                system_log_file.close()
-
-        # Open the zipped log files and write the contents out appended to the master output file
-
                 for logs in file_listing:
-                    output_file.write("\r\n")
-                    output_file.write("="*10 + " Log file: " + logs + "="*10 + "\r\n")
-                    output_file.write("\r\n")
-                    running_file = gzip.open(logs, "rb")
-                    dumped_file = running_file.read()
-                    output_file.write(dumped_file.decode('utf-8'))
-                    running_file.close()
+                    output_file.write("="*10 + " Log File Found: " + logs + " " + "="*10 + "\r\n")
+                filter_lines = riplib.osxripper_syslog.line_filter(self._syslog_processes, self._syslog_pattern,
+                                                                   self._since, self._until)
+                if filter_lines is not None:
+                    self.__write_filtered(working_dir, file_listing, filter_lines, output_file)
+                else:
+                    self.__write_logs(working_dir, file_listing, output_file)
                 output_file.write("\r\n")
                 output_file.write("="*40 + "\r\n\r\n")
             else:
@@ -75,3 +74,102 @@ class SystemLogs(Plugin):
                 output_file.write("[WARNING] Directory {0} or File {1} does not exist or cannot be found.\r\n".format(working_dir, "System Log"))
                 print("[WARNING] Directory {0} or File {1} does not exist or cannot be found.\r\n".format(working_dir, "System Log"))
             output_file.close()
+
+    def __archives(self, working_dir):
+        """
+        Return the paths of the rotated system logs in working_dir in chronological order
+        """
+        file_listing = []
+        for file_name in self.list_dir(working_dir):
+            if file_name.startswith("system") and file_name.endswith(".gz"):
+                file_listing.append(os.path.join(working_dir, file_name))
+        file_listing.sort(key=riplib.osxripper_rotation.rotation_key)
+        return file_listing
+
+    def __write_logs(self, working_dir, file_listing, output_file):
+        """
+        Copy system.log and the decompressed rotated logs to the output file as they are. With a
+        record sink set the lines of each rotated log are parsed into records as they are copied,
+        so the archives are only decompressed once, and system.log, copied first, is parsed after
+        them so the records stay oldest first.
+        """
+        # Open first unzipped log and write this out to master output file
+
+        output_file.write("\r\n")
+        output_file.write("\r\n")
+        output_file.write("="*10 + " Current Live System Log file " + "="*10 + "\r\n")
+        output_file.write("\r\n")
+        system_log = os.path.join(working_dir, "system.log")
+        years = self.__years(system_log, file_listing) if self._record_sink is not None else None
+        with io.open(system_log, "r", encoding="utf-8", errors="replace",
+                     newline="") as system_log_file:
+            for chunk in iter(lambda: system_log_file.read(CHUNK_SIZE), ""):
+                output_file.write(chunk.replace("\n", "\r\n"))
+
+        # Open the zipped log files and write the contents out appended to the master output file
+
+        for logs, part_path, error in riplib.osxripper_rotation.decompressed(file_listing, self._output_dir):
+            output_file.write("\r\n")
+            output_file.write("="*10 + " Log file: " + logs + "="*10 + "\r\n")
+            output_file.write("\r\n")
+            if os.path.isfile(part_path):
+                with io.open(part_path, "r", encoding="utf-8", errors="replace", newline="") as part_file:
+                    if years is None:
+                        for chunk in iter(lambda: part_file.read(CHUNK_SIZE), ""):
+                            output_file.write(chunk)
+                    else:
+                        for record in riplib.osxripper_syslog.parse_lines(self.__copied(part_file, output_file),
+                                                                          logs, years):
+                            self.emit_record(record)
+            if error is not None:
+                output_file.write("[ERROR] {0}: {1}\r\n".format(logs, error))
+        if years is not None:
+            with io.open(system_log, "r", encoding="utf-8", errors="replace", newline="") as system_log_file:
+                for record in riplib.osxripper_syslog.parse_lines(system_log_file, system_log, years):
+                    self.emit_record(record)
+
+    @staticmethod
+    def __copied(lines, output_file):
+        """
+        Yield each of lines after writing it to output_file as it is
+        """
+        for line in lines:
+            output_file.write(line)
+            yield line
+
+    def __write_filtered(self, working_dir, file_listing, filter_lines, output_file):
+        """
+        Write the lines passing filter_lines as records, oldest first, under the log they came from
+        """
+        output_file.write("\r\n")
+        output_file.write("\r\n")
+        output_file.write("="*10 + " Filtered System Log Lines " + "="*10 + "\r\n")
+        output_file.write("Filter: {0}\r\n".format(filter_lines))
+        source = None
+        for record in self.__records(working_dir, file_listing, filter_lines):
+            if record.source != source:
+                source = record.source
+                output_file.write("\r\nSource File: {0}\r\n\r\n".format(source))
+            output_file.write_record(record)
+
+    def __records(self, working_dir, file_listing, filter_lines):
+        """
+        Parse the rotated logs, oldest first, and then system.log into SyslogRecords. The year
+        of the first line is inferred from the modification time of the first log.
+        """
+        system_log = os.path.join(working_dir, "system.log")
+        years = self.__years(system_log, file_listing)
+        for logs, part_path, _ in riplib.osxripper_rotation.decompressed(file_listing, self._output_dir):
+            if os.path.isfile(part_path):
+                with io.open(part_path, "r", encoding="utf-8", errors="replace", newline="") as part_file:
+                    yield from riplib.osxripper_syslog.parse_lines(part_file, logs, years, filter_lines)
+        with io.open(system_log, "r", encoding="utf-8", errors="replace", newline="") as system_log_file:
+            yield from riplib.osxripper_syslog.parse_lines(system_log_file, system_log, years, filter_lines)
+
+    @staticmethod
+    def __years(system_log, file_listing):
+        """
+        Return the YearInference for the logs, its reference the modification time of the first log
+        """
+        return riplib.osxripper_syslog.YearInference(datetime.datetime.fromtimestamp(
+            os.path.getmtime(file_listing[0] if file_listing else system_log), datetime.timezone.utc))
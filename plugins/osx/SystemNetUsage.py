@@ -1,9 +1,10 @@
 """ Module to get information from /private/var/networkd/netusage.sqlite """
-import codecs
 import logging
 import os
 import sqlite3
+import riplib.osxripper_sqlite
 import riplib.osxripper_time
+from riplib.osxripper_records import INT, TEXT, TIME, record_type
 from riplib.plugin import Plugin
 
 
@@ -11,6 +12,38 @@ __author__ = 'osxripper'
 __version__ = '0.1'
 __license__ = 'GPLv3'
 
+FETCH_SIZE = 10000  # rows converted per batch
+
+NetworkAttachmentRecord = record_type("NetworkAttachmentRecord", (
+    ("source", None, TEXT),
+    ("name", "Name", TEXT),
+    ("network", "Network", TEXT),
+    ("mac_address", "MAC Address", TEXT),
+    ("first_timestamp", "First Timestamp", TIME),
+    ("timestamp", "Timestamp", TIME),
+))
+
+ProcessRecord = record_type("ProcessRecord", (
+    ("source", None, TEXT),
+    ("name", "Name", TEXT),
+    ("process", "Process", TEXT),
+    ("first_timestamp", "First Timestamp", TIME),
+    ("timestamp", "Timestamp", TIME),
+))
+
+LiveUsageRecord = record_type("LiveUsageRecord", (
+    ("source", None, TEXT),
+    ("name", "Name", TEXT),
+    ("process", "Process", TEXT),
+    ("timestamp", "Timestamp", TIME),
+    ("wifi_in", "WiFi In", INT),
+    ("wifi_out", "WiFi Out", INT),
+    ("wired_in", "Wired In", INT),
+    ("wired_out", "Wired Out", INT),
+    ("wwan_in", "WAN In", INT),
+    ("wwan_out", "WAN Out", INT),
+))
+
 
 class SystemNetUsage(Plugin):
     """
@@ -31,7 +64,7 @@ class SystemNetUsage(Plugin):
         """
         Read the /private/var/networkd/netusage.sqlite SQLite database
         """
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             file = os.path.join(self._input_dir, "private", "var", "networkd", self._data_file)
             output_file.write("Source File: {0}\r\n\r\n".format(file))
@@ -39,14 +72,19 @@ class SystemNetUsage(Plugin):
                 if os.path.isfile(file):
                     conn = None
                     try:
-                        conn = sqlite3.connect(file)
-                        conn.row_factory = sqlite3.Row
+                        conn = riplib.osxripper_sqlite.connect(file)
                         output_file.write("="*10 + " Network Attachments " + "="*10 + "\r\n")
-                        run_network_attachment_query(conn, output_file)
+                        window = self.time_window_sql("zna.ztimestamp", riplib.osxripper_time.COCOA_EPOCH)
+                        for record in network_attachment_records(conn, file, window):
+                            output_file.write_record(record)
                         output_file.write("="*10 + " Networked Processes " + "="*10 + "\r\n")
-                        run_process_query(conn, output_file)
+                        window = self.time_window_sql("zp.ztimestamp", riplib.osxripper_time.COCOA_EPOCH)
+                        for record in process_records(conn, file, window):
+                            output_file.write_record(record)
                         output_file.write("="*10 + " Network Process Usage " + "="*10 + "\r\n")
-                        run_live_usage_query(conn, output_file)
+                        window = self.time_window_sql("zlu.ztimestamp", riplib.osxripper_time.COCOA_EPOCH)
+                        for record in live_usage_records(conn, file, window):
+                            output_file.write_record(record)
                         output_file.write("\r\n")
                     except sqlite3.Error as error:
                         logging.error("%s", error.args[0])
@@ -69,77 +107,94 @@ class SystemNetUsage(Plugin):
             output_file.write("="*40 + "\r\n\r\n")
         output_file.close()
 
+    def iter_records(self):
+        """
+        Yield the network attachment, process and live usage records of netusage.sqlite
+        """
+        if self._os_version not in ["big_sur", "catalina", "mojave", "high_sierra", "sierra", "el_capitan"]:
+            return
+        file = os.path.join(self._input_dir, "private", "var", "networkd", self._data_file)
+        if not os.path.isfile(file):
+            logging.warning("File: %s does not exist or cannot be found.", file)
+            return
+        conn = None
+        try:
+            conn = riplib.osxripper_sqlite.connect(file)
+            yield from network_attachment_records(
+                conn, file, self.time_window_sql("zna.ztimestamp", riplib.osxripper_time.COCOA_EPOCH))
+            yield from process_records(conn, file, self.time_window_sql("zp.ztimestamp", riplib.osxripper_time.COCOA_EPOCH))
+            yield from live_usage_records(
+                conn, file, self.time_window_sql("zlu.ztimestamp", riplib.osxripper_time.COCOA_EPOCH))
+        except sqlite3.Error as error:
+            logging.error("%s", error.args[0])
+            print("[ERROR] {0}".format(error.args[0]))
+        finally:
+            if conn:
+                conn.close()
 
-def run_process_query(sqlite_connection, output_file):
+
+def _row_batches(sqlite_connection, query, params):
     """
-    Query Process & time details
+    Yield the rows of query FETCH_SIZE at a time
     """
-    query = "SELECT zpk.z_name,zp.zprocname,zp.zfirsttimestamp,zp.ztimestamp FROM zprocess zp,z_primarykey zpk " \
-            "WHERE zp.z_ent = zpk.z_ent ORDER BY zpk.z_name"
     with sqlite_connection:
         cur = sqlite_connection.cursor()
-        cur.execute(query)
-        rows = cur.fetchall()
-        for row in rows:
-            first_timestamp = riplib.osxripper_time.get_cocoa_seconds(row["zfirsttimestamp"])
-            timestamp = riplib.osxripper_time.get_cocoa_seconds(row["ztimestamp"])
-            output_file.write("Name           : {0}\r\n".format(row["z_name"]))
-            output_file.write("Process        : {0}\r\n".format(row["zprocname"]))
-            output_file.write("First Timestamp: {0}\r\n".format(first_timestamp))
-            output_file.write("Timestamp      : {0}\r\n".format(timestamp))
-            output_file.write("\r\n")
-
-
-def run_live_usage_query(sqlite_connection, output_file):
+        cur.execute(query, params)
+        rows = cur.fetchmany(FETCH_SIZE)
+        while rows:
+            yield rows
+            rows = cur.fetchmany(FETCH_SIZE)
+
+
+def process_records(sqlite_connection, source, window=("", [])):
+    """
+    Yield a ProcessRecord per process, window is the (sql, params) time window from Plugin.time_window_sql
     """
-    Query Process & time details for WiFi usage
+    query = "SELECT zpk.z_name,zp.zprocname,zp.zfirsttimestamp,zp.ztimestamp FROM zprocess zp,z_primarykey zpk " \
+            "WHERE zp.z_ent = zpk.z_ent" + window[0] + " ORDER BY zpk.z_name"
+    for rows in _row_batches(sqlite_connection, query, window[1]):
+        first_timestamps = riplib.osxripper_time.batch_iso([row["zfirsttimestamp"] for row in rows],
+                                                           riplib.osxripper_time.COCOA_EPOCH)
+        timestamps = riplib.osxripper_time.batch_iso([row["ztimestamp"] for row in rows],
+                                                     riplib.osxripper_time.COCOA_EPOCH)
+        for row, first_timestamp, timestamp in zip(rows, first_timestamps, timestamps):
+            yield ProcessRecord(source, row["z_name"], row["zprocname"], first_timestamp, timestamp)
+
+
+def live_usage_records(sqlite_connection, source, window=("", [])):
+    """
+    Yield a LiveUsageRecord per process usage row, window is the (sql, params) time window from Plugin.time_window_sql
     """
     query = "SELECT zpk.z_name,zp.zprocname,zlu.ztimestamp,zlu.zwifiin," \
             "zlu.zwifiout,zlu.zwiredin,zlu.zwiredout,zlu.zwwanin,zlu.zwwanout FROM zprocess zp,zliveusage zlu," \
-            "z_primarykey zpk WHERE zp.z_ent = zpk.z_ent AND zp.z_pk = zlu.zhasprocess ORDER BY zpk.z_name"
-    with sqlite_connection:
-        cur = sqlite_connection.cursor()
-        cur.execute(query)
-        rows = cur.fetchall()
-        for row in rows:
-            ztimestamp = riplib.osxripper_time.get_cocoa_seconds(row["ztimestamp"])
-            output_file.write("Name     : {0}\r\n".format(row["z_name"]))
-            output_file.write("Process  : {0}\r\n".format(row["zprocname"]))
-            output_file.write("Timestamp: {0}\r\n".format(ztimestamp))
-            output_file.write("WiFi In  : {0}\r\n".format(row["zwifiin"]))
-            output_file.write("WiFi Out : {0}\r\n".format(row["zwifiout"]))
-            output_file.write("Wired In : {0}\r\n".format(row["zwiredin"]))
-            output_file.write("Wired Out: {0}\r\n".format(row["zwiredout"]))
-            output_file.write("WAN In   : {0}\r\n".format(row["zwwanin"]))
-            output_file.write("WAN Out  : {0}\r\n".format(row["zwwanout"]))
-            output_file.write("\r\n")
-
-
-def run_network_attachment_query(sqlite_connection, output_file):
+            "z_primarykey zpk WHERE zp.z_ent = zpk.z_ent AND zp.z_pk = zlu.zhasprocess" + window[0] + \
+            " ORDER BY zpk.z_name"
+    for rows in _row_batches(sqlite_connection, query, window[1]):
+        ztimestamps = riplib.osxripper_time.batch_iso([row["ztimestamp"] for row in rows],
+                                                      riplib.osxripper_time.COCOA_EPOCH)
+        for row, ztimestamp in zip(rows, ztimestamps):
+            yield LiveUsageRecord(source, row["z_name"], row["zprocname"], ztimestamp, row["zwifiin"],
+                                  row["zwifiout"], row["zwiredin"], row["zwiredout"], row["zwwanin"], row["zwwanout"])
+
+
+def network_attachment_records(sqlite_connection, source, window=("", [])):
     """
-    Query to Network and MAC address data
+    Yield a NetworkAttachmentRecord per network, window is the (sql, params) time window from Plugin.time_window_sql
     """
     query = "SELECT zpk.z_name,zna.zidentifier,zna.zfirsttimestamp,zna.ztimestamp " \
             "FROM znetworkattachment zna,z_primarykey zpk " \
-            "WHERE zna.z_ent = zpk.z_ent ORDER BY zpk.z_name"
-    with sqlite_connection:
-        cur = sqlite_connection.cursor()
-        cur.execute(query)
-        rows = cur.fetchall()
-        for row in rows:
-            zfirsttimestamp = riplib.osxripper_time.get_cocoa_seconds(row["zfirsttimestamp"])
-            ztimestamp = riplib.osxripper_time.get_cocoa_seconds(row["ztimestamp"])
-            output_file.write("Name           : {0}\r\n".format(row[0]))
-            if row["zidentifier"] is None:
-                output_file.write("Network        : None\r\n")
-                output_file.write("MAC Address    : None\r\n")
-            else:
+            "WHERE zna.z_ent = zpk.z_ent" + window[0] + " ORDER BY zpk.z_name"
+    for rows in _row_batches(sqlite_connection, query, window[1]):
+        zfirsttimestamps = riplib.osxripper_time.batch_iso([row["zfirsttimestamp"] for row in rows],
+                                                           riplib.osxripper_time.COCOA_EPOCH)
+        ztimestamps = riplib.osxripper_time.batch_iso([row["ztimestamp"] for row in rows],
+                                                      riplib.osxripper_time.COCOA_EPOCH)
+        for row, zfirsttimestamp, ztimestamp in zip(rows, zfirsttimestamps, ztimestamps):
+            network_name = None
+            network_mac = None
+            if row["zidentifier"] is not None:
                 ident = row["zidentifier"]
                 dash_index = ident.rfind("-")
                 network_name = ident[0:dash_index]
                 network_mac = ident[dash_index+1:len(ident)]
-                output_file.write("Network        : {0}\r\n".format(network_name))
-                output_file.write("MAC Address    : {0}\r\n".format(network_mac))
-            output_file.write("First Timestamp: {0}\r\n".format(zfirsttimestamp))
-            output_file.write("Timestamp      : {0}\r\n".format(ztimestamp))
-            output_file.write("\r\n")
+            yield NetworkAttachmentRecord(source, row[0], network_name, network_mac, zfirsttimestamp, ztimestamp)
@@ -1,8 +1,8 @@
 """ Module to parse information from /private/var/db/systemstats/snapshots.db """
-import codecs
 import logging
 import os
 import sqlite3
+import riplib.osxripper_sqlite
 import riplib.osxripper_time
 from riplib.plugin import Plugin
 
@@ -33,20 +33,21 @@ class SystemSnapshots(Plugin):
         """
         Read the /private/var/db/systemstats/snapshots.db SQLite database
         """
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
-            query = "SELECT time, pid, uniqueid, comm FROM snapshots ORDER BY time"
+            window_sql, window_params = self.time_window_sql("time", riplib.osxripper_time.UNIX_EPOCH,
+                                                             riplib.osxripper_time.MICROS, " WHERE ")
+            query = "SELECT time, pid, uniqueid, comm FROM snapshots" + window_sql + " ORDER BY time"
             file = os.path.join(self._input_dir, "private", "var", "db", "systemstats", self._data_file)
             output_file.write("Source File: {0}\r\n\r\n".format(file))
             if self._os_version in ["el_capitan", "yosemite", "mavericks"]:
                 if os.path.isfile(file):
                     conn = None
                     try:
-                        conn = sqlite3.connect(file)
-                        conn.row_factory = sqlite3.Row
+                        conn = riplib.osxripper_sqlite.connect(file)
                         with conn:
                             cur = conn.cursor()
-                            cur.execute(query)
+                            cur.execute(query, window_params)
                             rows = cur.fetchall()
                             for row in rows:
                                 snap_time = riplib.osxripper_time.get_unix_micros(row["time"])
@@ -1,5 +1,4 @@
 """ Module to parse Time information """
-import codecs
 import logging
 import os
 import plistlib
@@ -119,7 +118,7 @@ class SystemTime(Plugin):
         """
         Parse a Binary Plist file
         """
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             output_file.write("=" * 10 + " Local Time Zone " + "=" * 10 + "\r\n")
             output_file.write("Source File: {0}\r\n\r\n".format(file))
             bplist = open(file, "rb")
@@ -138,7 +137,7 @@ class SystemTime(Plugin):
         """
         Parse a Binary Plist file
         """
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             output_file.write("=" * 10 + " Local Time Zone " + "=" * 10 + "\r\n")
             output_file.write("Source File: {0}\r\n\r\n".format(file))
             bplist = open(file, "rb")
@@ -159,7 +158,7 @@ class SystemTime(Plugin):
         output_file.close()
 
     def __read_ntp(self, file):
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             output_file.write("=" * 10 + " Time Server Setting " + "=" * 10 + "\r\n")
             output_file.write("Source File: {0}\r\n\r\n".format(file))
             # file_ntp = open(file, "rb")
@@ -174,7 +173,7 @@ class SystemTime(Plugin):
 # this deos not appear to be the case when addressing an extracted copy from an image
 ########################################################################################
 #    def __read_localtime(self, file):
-#        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+#        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
 #            output_file.write("=" * 10 + " Local Timezone " + "=" * 10 + "\r\n")
 #            output_file.write("Source File: {0}".format(file))
 #            output_file.write("N.B. On a live system this may look like a binary dump,
@@ -189,7 +188,7 @@ class SystemTime(Plugin):
         """
         Parse a plain XML Plist file
         """
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             output_file.write("="*10 + " Auto Timezone " + "="*10 + "\r\n")
             output_file.write("Source File: {0}\r\n\r\n".format(file))
             with open(file, 'rb') as auto_tz_file:
@@ -208,7 +207,7 @@ class SystemTime(Plugin):
         """
         Parse a plain XML Plist file
         """
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             output_file.write("="*10 + " Timezone Auto " + "="*10 + "\r\n")
             output_file.write("Source File: {0}\r\n\r\n".format(file))
             with open(file, 'rb') as auto_tz_file:
@@ -225,7 +224,7 @@ class SystemTime(Plugin):
         """
         Parse a binary Plist file
         """
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             output_file.write("="*8 + " Automatic Time Settings " + "="*8 + "\r\n")
             output_file.write("Source File: {0}\r\n\r\n".format(file))
             bplist = open(file, "rb")
@@ -0,0 +1,107 @@
+""" Module to parse the unified logging tracev3 files in /private/var/db/diagnostics """
+import itertools
+import logging
+import os
+import riplib.osxripper_pool
+import riplib.osxripper_tracev3
+from riplib.osxripper_records import INT, TEXT, TIME, record_type
+from riplib.plugin import Plugin
+
+
+__author__ = 'osxripper'
+__version__ = '0.1'
+__license__ = 'GPLv3'
+
+UnifiedLogRecord = record_type("UnifiedLogRecord", (
+    ("source", None, TEXT),
+    ("time", "Time", TIME),
+    ("level", "Level", TEXT),
+    ("pid", "PID", INT),
+    ("euid", "EUID", INT),
+    ("thread", "Thread", INT),
+    ("process", "Process", TEXT),
+    ("library", "Library", TEXT),
+    ("subsystem", "Subsystem", TEXT),
+    ("category", "Category", TEXT),
+    ("message", "Message", TEXT),
+))
+
+
+class SystemUnifiedLogs(Plugin):
+    """
+    Plugin to parse the unified logging tracev3 files in /private/var/db/diagnostics
+    """
+    def __init__(self):
+        """
+        Initialise the class.
+        """
+        super().__init__()
+        self.set_name("System Unified Logs")
+        self.set_description("Parse the unified logging tracev3 files in /private/var/db/diagnostics")
+        self.set_data_file("")  # listing directories so this is not needed
+        self.set_output_file("System_UnifiedLogs.txt")
+        self.set_type("multi")
+
+    def parse(self):
+        """
+        Write the log entries of each tracev3 file
+        """
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
+            output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
+            working_dir = os.path.join(self._input_dir, "private", "var", "db", "diagnostics")
+            output_file.write("Source Directory: {0}\r\n\r\n".format(working_dir))
+            if self._os_version in ["big_sur", "catalina", "mojave", "high_sierra", "sierra"]:
+                if os.path.isdir(working_dir):
+                    source = None
+                    for record in self.iter_records():
+                        if record.source != source:
+                            source = record.source
+                            output_file.write("Source File: {0}\r\n\r\n".format(source))
+                        output_file.write_record(record)
+                else:
+                    logging.warning("Directory %s does not exist or cannot be found.", working_dir)
+                    output_file.write("[WARNING] Directory {0} does not exist or cannot be found.\r\n".format(working_dir))
+                    print("[WARNING] Directory {0} does not exist or cannot be found.".format(working_dir))
+            elif self._os_version in ["el_capitan", "yosemite", "mavericks", "mountain_lion", "lion", "snow_leopard"]:
+                logging.info("This version of OSX is not supported by this plugin.")
+                print("[INFO] This version of OSX is not supported by this plugin.")
+                output_file.write("[INFO] This version of OSX is not supported by this plugin.\r\n")
+            else:
+                logging.warning("Not a known OSX version.")
+                print("[WARNING] Not a known OSX version.")
+            output_file.write("="*40 + "\r\n\r\n")
+
+    def iter_records(self):
+        """
+        Yield a UnifiedLogRecord per log entry of each tracev3 file inside the --since/--until
+        window. Files are read in path order and their chunksets decoded in parallel, a few ahead
+        of the records being read, so a large file is never held whole in memory. Format strings
+        come from the uuidtext and dsc files in /private/var/db/uuidtext.
+        """
+        working_dir = os.path.join(self._input_dir, "private", "var", "db", "diagnostics")
+        if not os.path.isdir(working_dir):
+            logging.warning("Directory %s does not exist or cannot be found.", working_dir)
+            return
+        uuidtext_dir = os.path.join(self._input_dir, "private", "var", "db", "uuidtext")
+        tracev3_files = []
+        for root, _, files in self.walk_dir(working_dir):
+            tracev3_files.extend([os.path.join(root, file_name) for file_name in files if file_name.endswith(".tracev3")])
+        tracev3_files.sort()
+        files = []  # (tracev3 file, chunkset count, problem)
+        arguments = []
+        for tracev3_file in tracev3_files:
+            chunksets, problem = riplib.osxripper_tracev3.tracev3_chunksets(tracev3_file)
+            files.append((tracev3_file, len(chunksets), problem))
+            arguments.extend([(tracev3_file, header, catalog, start, size, uuidtext_dir, self._since, self._until)
+                              for header, catalog, start, size in chunksets])
+        results = riplib.osxripper_pool.ordered_results(riplib.osxripper_tracev3.chunkset_rows, arguments)
+        for tracev3_file, count, problem in files:
+            for rows, chunkset_problem in itertools.islice(results, count):
+                if chunkset_problem is not None:
+                    logging.warning("File: %s %s.", tracev3_file, chunkset_problem)
+                    print("[WARNING] File: {0} {1}.".format(tracev3_file, chunkset_problem))
+                for row in rows:
+                    yield UnifiedLogRecord(*row)
+            if problem is not None:
+                logging.warning("File: %s %s.", tracev3_file, problem)
+                print("[WARNING] File: {0} {1}.".format(tracev3_file, problem))
@@ -1,5 +1,4 @@
 """ Module to list .wdgt directories in /Library/Widgets """
-import codecs
 import logging
 import os
 from riplib.plugin import Plugin
@@ -30,7 +29,7 @@ class SystemWidgets(Plugin):
         """
         List .wdgt files under /Library/Widgets
         """
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             working_dir = os.path.join(self._input_dir, "Library", "Widgets")
             output_file.write("Source Directory: {0}\r\n\r\n".format(working_dir))
@@ -42,7 +41,7 @@ class SystemWidgets(Plugin):
             elif self._os_version in ["mojave", "sierra", "el_capitan", "yosemite", "mavericks",
                                       "mountain_lion", "lion", "snow_leopard"]:
                 if os.path.isdir(working_dir):
-                    file_listing = os.listdir(working_dir)
+                    file_listing = self.list_dir(working_dir)
                     for file_name in file_listing:
                         if file_name.endswith(".wdgt"):
                             output_file.write(file_name + "\r\n")
@@ -0,0 +1,155 @@
+""" Module to parse the Wi-Fi join and leave history from wifi.log and its rotations """
+import datetime
+import logging
+import os
+import re
+import riplib.osxripper_rotation
+import riplib.osxripper_syslog
+from riplib.osxripper_records import INT, TEXT, TIME, record_type
+from riplib.plugin import Plugin
+
+
+__author__ = 'osxripper'
+__version__ = '0.1'
+__license__ = 'GPLv3'
+
+# "Thu Aug 24 09:18:38.613 Info: <airportd[76]> _doAutoJoin: message", the weekday, level,
+# process and function are each missing from some lines
+LINE_PATTERN = re.compile(r"(?:(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun) )?(?P<month>" + "|".join(riplib.osxripper_syslog.MONTHS) + r") +"
+                          r"(?P<day>\d{1,2}) (?P<hour>\d\d):(?P<minute>\d\d):(?P<second>\d\d)(?:\.(?P<fraction>\d{1,6}))? "
+                          r"(?:(?P<level>[A-Za-z]+): )?(?:<(?P<process>[^>\[]+)(?:\[(?P<pid>\d+)\])?> )?"
+                          r"(?:(?P<function>[-+]\[[^\]]+\]|[\w.]+): )?(?P<message>.*)")
+# (event, pattern) tried in order, the first match names the event of a line
+EVENTS = (
+    ("link down", re.compile(r"\blink down\b", re.IGNORECASE)),
+    ("link up", re.compile(r"\blink up\b", re.IGNORECASE)),
+    ("disassociated", re.compile(r"disassociat", re.IGNORECASE)),
+    ("system PSK association", re.compile(r"_processSystemPSKAssoc")),
+    ("associated", re.compile(r"\bassociated (?:to|with)\b|\bASSOC(?:IATION)?_(?:EVENT|DONE)\b", re.IGNORECASE)),
+    ("BSSID changed", re.compile(r"\bBSSID changed\b", re.IGNORECASE)),
+    ("join", re.compile(r"\b(?:auto-?join(?:ing)?|joining|join attempt|attempting to join)\b", re.IGNORECASE)),
+)
+SSID_PATTERNS = (
+    re.compile("“([^”]*)”"),  # airportd quotes network names in curly quotes
+    re.compile(r"\bSSID\s*(?:=|:)?\s*\"([^\"]*)\""),
+    re.compile(r"\bSSID\s*(?:=|:)\s*([^\s,;\"]+)"),
+)
+BSSID_PATTERN = re.compile(r"\b([0-9A-Fa-f]{1,2}(?::[0-9A-Fa-f]{1,2}){5})\b")
+SECURITY_PATTERN = re.compile(r"\b(WPA2?/WPA3 (?:Personal|Enterprise)|WPA[23]? (?:Personal|Enterprise)|WPA[23]?[ -]PSK|"
+                              r"WEP|Open(?= network| system))\b|\bsecurity\s*(?:=|:)\s*([\w/-]+)", re.IGNORECASE)
+
+WifiEventRecord = record_type("WifiEventRecord", (
+    ("source", None, TEXT),
+    ("time", "Time", TIME),
+    ("process", "Process", TEXT),
+    ("pid", "PID", INT),
+    ("function", "Function", TEXT),
+    ("event", "Event", TEXT),
+    ("ssid", "SSID", TEXT),
+    ("bssid", "BSSID", TEXT),
+    ("security", "Security", TEXT),
+    ("message", "Message", TEXT),
+))
+
+
+def _first(patterns, text):
+    """
+    Return the first group captured by the first of patterns to match text, None if none does
+    """
+    for pattern in patterns:
+        match = pattern.search(text)
+        if match is not None:
+            return next((group for group in match.groups() if group is not None), None)
+    return None
+
+
+def wifi_records(path_lines, years, since=None, until=None):
+    """
+    Yield a WifiEventRecord for each line of (path, line) pairs that records an association,
+    a join, a link change or the like, streaming. Other lines are skipped. wifi.log leaves the
+    year out, years is the riplib.osxripper_syslog.YearInference supplying it; times are the
+    local time of the Mac and are compared with the since/until window as they are.
+    """
+    for path, line in path_lines:
+        match = LINE_PATTERN.match(line)
+        if match is None:
+            continue
+        year = years.year(riplib.osxripper_syslog.MONTHS[match.group("month")])
+        text = line[match.start("function") if match.group("function") is not None else match.start("message"):]
+        event = next((name for name, pattern in EVENTS if pattern.search(text) is not None), None)
+        if event is None:
+            continue
+        fraction = match.group("fraction") or "0"
+        try:
+            date_time = datetime.datetime(year, riplib.osxripper_syslog.MONTHS[match.group("month")],
+                                          int(match.group("day")), int(match.group("hour")),
+                                          int(match.group("minute")), int(match.group("second")),
+                                          int(fraction.ljust(6, "0")))
+        except ValueError:
+            date_time = None
+        if date_time is not None:
+            if (since is not None and date_time < since) or (until is not None and date_time > until):
+                continue
+        pid = match.group("pid")
+        yield WifiEventRecord(path, date_time, match.group("process"), int(pid) if pid is not None else None,
+                              match.group("function"), event, _first(SSID_PATTERNS, text),
+                              _first((BSSID_PATTERN,), text), _first((SECURITY_PATTERN,), text), match.group("message"))
+
+
+class SystemWifiLog(Plugin):
+    """
+    Plugin to parse the Wi-Fi join and leave history from wifi.log and its rotations
+    """
+    def __init__(self):
+        """
+        Initialise the class.
+        """
+        super().__init__()
+        self.set_name("System Wi-Fi Log")
+        self.set_description("Parse the Wi-Fi join and leave history from /private/var/log/wifi.log and its rotations")
+        self.set_data_file("")  # listing directories so this is not needed
+        self.set_output_file("System_WifiLog.txt")
+        self.set_type("text")
+
+    def parse(self):
+        """
+        Write the Wi-Fi events of wifi.log and its rotations, oldest first
+        """
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
+            output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
+            working_dir = os.path.join(self._input_dir, "private", "var", "log")
+            output_file.write("Source Directory: {0}\r\n\r\n".format(working_dir))
+            if os.path.isdir(working_dir) and self.__logs(working_dir):
+                source = None
+                for record in self.iter_records():
+                    if record.source != source:
+                        source = record.source
+                        output_file.write("Source File: {0}\r\n\r\n".format(source))
+                    output_file.write_record(record)
+            else:
+                logging.warning("Directory %s or File %s does not exist or cannot be found.", working_dir, "wifi.log")
+                output_file.write("[WARNING] Directory {0} or File {1} does not exist or cannot be found.\r\n".format(working_dir, "wifi.log"))
+                print("[WARNING] Directory {0} or File {1} does not exist or cannot be found.".format(working_dir, "wifi.log"))
+            output_file.write("="*40 + "\r\n\r\n")
+
+    def iter_records(self):
+        """
+        Yield a WifiEventRecord per recognised event of the rotated wifi logs, oldest first, and
+        then of wifi.log, inside the --since/--until window. Rotated logs are decompressed in
+        parallel; the year of the first line is inferred from the modification time of the first log.
+        """
+        working_dir = os.path.join(self._input_dir, "private", "var", "log")
+        logs = self.__logs(working_dir) if os.path.isdir(working_dir) else []
+        if not logs:
+            logging.warning("File: %s does not exist or cannot be found.", os.path.join(working_dir, "wifi.log"))
+            return
+        years = riplib.osxripper_syslog.YearInference(
+            datetime.datetime.fromtimestamp(os.path.getmtime(logs[0]), datetime.timezone.utc))
+        yield from wifi_records(riplib.osxripper_rotation.log_lines(logs, self._output_dir), years,
+                                self._since, self._until)
+
+    def __logs(self, working_dir):
+        """
+        Return the paths of the rotated wifi logs in working_dir, oldest first, then wifi.log
+        """
+        return riplib.osxripper_rotation.rotated_logs(working_dir, self.list_dir(working_dir), "wifi.log")
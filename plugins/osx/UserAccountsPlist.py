@@ -1,5 +1,4 @@
 """ Module to parse /private/var/db/dslocal/nodes/Default/users/<username>.plist """
-import codecs
 import logging
 import os
 import plistlib
@@ -34,7 +33,7 @@ class UserAccountsPlist(Plugin):
         """
         working_dir = os.path.join(self._input_dir, "private", "var", "db", "dslocal", "nodes", "Default", "users")
         if os.path.exists(working_dir):
-            file_listing = os.listdir(working_dir)
+            file_listing = self.list_dir(working_dir)
             for file_name in file_listing:
                 stat_info = os.stat(working_dir + os.path.sep + file_name)
                 if file_name.endswith(".plist") and stat_info.st_size > 0:
@@ -48,7 +47,7 @@ class UserAccountsPlist(Plugin):
         """
         Parse a User Account Binary Plist files
         """
-        with codecs.open(os.path.join(self._output_dir, self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, self._output_file)) as output_file:
             if self._os_version in ["big_sur", "catalina", "mojave", "high_sierra", "sierra", "el_capitan", "yosemite",
                                     "mavericks", "mountain_lion", "lion"]:
                 parse_os = ParseVers110107(output_file, file)
@@ -1,8 +1,8 @@
 """ Module to parse information from /Users/<username>/Library/Accounts/Accounts4.sqlite """
-import codecs
 import logging
 import os
 import sqlite3
+import riplib.osxripper_sqlite
 import riplib.osxripper_time
 from riplib.plugin import Plugin
 
@@ -35,7 +35,7 @@ class UsersAccounts4(Plugin):
         users_path = os.path.join(self._input_dir, "Users")
         # username = None
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
             for username in user_list:
                 if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                     sqlite_db = os.path.join(users_path, username, "Library", "Accounts", self._data_file)
@@ -52,7 +52,7 @@ class UsersAccounts4(Plugin):
         """
         Read the Accounts4.sqlite SQLite database
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + ".txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + ".txt")) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             output_file.write("Source File: {0}\r\n\r\n".format(file))
             if self._os_version in ["big_sur", "catalina", "mojave", "high_sierra", "sierra"]:
@@ -61,8 +61,7 @@ class UsersAccounts4(Plugin):
                         "FROM zaccount za,zaccounttype zat WHERE za.zaccounttype = zat.z_pk"
                 conn = None
                 try:
-                    conn = sqlite3.connect(file)
-                    conn.row_factory = sqlite3.Row
+                    conn = riplib.osxripper_sqlite.connect(file)
                     with conn:
                         cur = conn.cursor()
                         cur.execute(query)
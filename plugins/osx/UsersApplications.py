@@ -1,5 +1,4 @@
 """ Module to list .app folders in users' home folder """
-import codecs
 import logging
 import os
 from riplib.plugin import Plugin
@@ -32,7 +31,7 @@ class UsersApplications(Plugin):
         """
         users_path = os.path.join(self._input_dir, "Users")
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
             for username in user_list:
                 if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                     user_dir = os.path.join(users_path, username)
@@ -49,10 +48,10 @@ class UsersApplications(Plugin):
         """
         List .app directories
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + '_Applications.txt'), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + '_Applications.txt')) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             output_file.write("Source Directory: {0}\r\n\r\n".format(file))
-            for root, dirs, _ in os.walk(file):
+            for root, dirs, _ in self.walk_dir(file):
                 for user_dir in dirs:
                     if user_dir.endswith(".app"):
                         output_file.write("{0}{1}{2}\r\n".format(root, os.path.sep, user_dir, sep=""))
@@ -1,7 +1,10 @@
-""" Module to parse information from /Users/username/.bash_history """
-import codecs
+""" Module to parse information from /Users/username/.bash_history and .zsh_history """
 import logging
 import os
+import riplib.osxripper_lines
+import riplib.osxripper_pool
+import riplib.osxripper_zsh
+from riplib.osxripper_records import INT, TEXT, TIME, record_type
 from riplib.plugin import Plugin
 
 
@@ -9,10 +12,28 @@ __author__ = 'osxripper - mykulh'
 __version__ = '0.1'
 __license__ = 'GPLv3'
 
+BashHistoryRecord = record_type("BashHistoryRecord", (
+    ("user", None, TEXT),
+    ("source", None, TEXT),
+    ("command", "Command", TEXT),
+))
+BashSessionRecord = record_type("BashSessionRecord", (
+    ("user", None, TEXT),
+    ("source", None, TEXT),
+    ("line", "Line", TEXT),
+))
+ZshHistoryRecord = record_type("ZshHistoryRecord", (
+    ("user", None, TEXT),
+    ("source", None, TEXT),
+    ("time", "Start Time", TIME),
+    ("duration", "Elapsed Seconds", INT),
+    ("command", "Command", TEXT),
+))
+
 
 class UsersBashHistory(Plugin):
     """
-    Parse information from /Users/username/.bash_history
+    Parse information from /Users/username/.bash_history and .zsh_history
     """
 
     def __init__(self):
@@ -21,7 +42,7 @@ class UsersBashHistory(Plugin):
         """
         super().__init__()
         self.set_name("User Console History")
-        self.set_description("Parse information from /Users/username/.bash_history file")
+        self.set_description("Parse information from /Users/username/.bash_history and .zsh_history files")
         self.set_data_file(".bash_history")
         self.set_output_file("")  # this will have to be defined per user account
         self.set_type("file")
@@ -32,14 +53,14 @@ class UsersBashHistory(Plugin):
         """
         users_path = os.path.join(self._input_dir, "Users")
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
         else:
             print("[WARNING] {0} does not exist.".format(users_path))
             return
         for username in user_list:
             if self._os_version in ["big_sur", "catalina", "mojave", "high_sierra", "sierra", "el_capitan"]:
                 if os.path.isdir(users_path):
-                    # user_list = os.listdir(users_path)
+                    # user_list = self.list_dir(users_path)
                     if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                         sessions = os.path.join(users_path, username, ".bash_sessions")
                         if os.path.isdir(sessions):
@@ -51,44 +72,122 @@ class UsersBashHistory(Plugin):
                 else:
                     logging.warning("%s does not exist.", history)
                     print("[WARNING] {0} does not exist.".format(history))
+                self.__parse_zsh_history(username)
+
+    def iter_records(self):
+        """
+        Yield, for every user, a BashSessionRecord per line of the .bash_sessions files, a
+        BashHistoryRecord per line of .bash_history and a ZshHistoryRecord per entry of the zsh
+        session histories and .zsh_history inside the --since/--until window, in the order
+        parse() writes them
+        """
+        users_path = os.path.join(self._input_dir, "Users")
+        if not os.path.isdir(users_path):
+            logging.warning("%s does not exist.", users_path)
+            return
+        for username in self.list_dir(users_path):
+            if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
+                sessions = os.path.join(users_path, username, ".bash_sessions")
+                if self._os_version in ["big_sur", "catalina", "mojave", "high_sierra", "sierra", "el_capitan"] and \
+                        os.path.isdir(sessions):
+                    for session_file in self.__bash_session_files(sessions):
+                        for line in riplib.osxripper_lines.iter_lines(session_file):
+                            yield BashSessionRecord(username, session_file, line)
+                history = os.path.join(users_path, username, self._data_file)
+                if os.path.isfile(history):
+                    for line in riplib.osxripper_lines.iter_lines(history):
+                        yield BashHistoryRecord(username, history, line)
+                else:
+                    logging.warning("%s does not exist.", history)
+                yield from self.__zsh_records(username)
+
+    def __zsh_records(self, username):
+        """
+        Yield the ZshHistoryRecords of /Users/username/.zsh_sessions/*.history(new), the session
+        files parsed in parallel, followed by those of /Users/username/.zsh_history, streamed
+        """
+        user_path = os.path.join(self._input_dir, "Users", username)
+        sessions_dir = os.path.join(user_path, ".zsh_sessions")
+        if self._os_version in ["big_sur", "catalina"] and os.path.isdir(sessions_dir):
+            sessions = [os.path.join(sessions_dir, session_file) for session_file in sorted(self.list_dir(sessions_dir))
+                        if session_file.endswith(".history") or session_file.endswith(".historynew")]
+            arguments = [(session, self._since, self._until) for session in sessions]
+            for session, rows in zip(sessions, riplib.osxripper_pool.ordered_results(riplib.osxripper_zsh.history_rows,
+                                                                                     arguments)):
+                for row in rows:
+                    yield ZshHistoryRecord(username, session, *row)
+        history = os.path.join(user_path, ".zsh_history")
+        if os.path.isfile(history):
+            for entry in riplib.osxripper_zsh.iter_entries(history):
+                if self.in_time_window(entry[0]):
+                    yield ZshHistoryRecord(username, history, *entry)
 
     def __parse_bash_sessions(self, username, sessions_dir):
         """
         Read /Users/username/.bash_sessions/*
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + ".txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + ".txt")) as output_file:
             output_file.write("=" * 10 + " " + self._name + " " + "=" * 10 + "\r\n")
             output_file.write("Bash Sessions\r\n")
-            sessions_files = os.listdir(sessions_dir)
+            sessions_files = self.list_dir(sessions_dir)
             for session_file in sessions_files:
-                if ".session" in session_file:
-                    s_file = codecs.open(os.path.join(sessions_dir, session_file), "r", encoding="utf-8")
-                    for lines in s_file:
-                        output_file.write(lines.replace("\n", "\r\n"))
-                    s_file.close()
-                if ".historynew" in session_file:
-                    s_file = codecs.open(os.path.join(sessions_dir, session_file), "r", encoding="utf-8")
-                    for lines in s_file:
-                        output_file.write(lines.replace("\n", "\r\n"))
-                    s_file.close()
+                if ".session" in session_file or ".historynew" in session_file:
+                    self.__copy_lines(os.path.join(sessions_dir, session_file), output_file,
+                                      username, BashSessionRecord)
                 output_file.write("=" * 10 + "\r\n")
 
+    def __bash_session_files(self, sessions_dir):
+        """
+        Return the paths of the .session and .historynew files of a .bash_sessions directory,
+        in the order __parse_bash_sessions copies them
+        """
+        return [os.path.join(sessions_dir, session_file) for session_file in self.list_dir(sessions_dir)
+                if ".session" in session_file or ".historynew" in session_file]
+
+    def __copy_lines(self, path, output_file, username, record_class):
+        """
+        Copy the lines of path to output_file, and pass each to the record sink, if one is set,
+        as a record_class so a timeline or database written alongside the text keeps them
+        """
+        if self._record_sink is None:
+            riplib.osxripper_lines.copy_lines(path, output_file)
+            return
+        for line in riplib.osxripper_lines.iter_lines(path):
+            output_file.write(line + riplib.osxripper_lines.NEWLINE)
+            self.emit_record(record_class(username, path, line))
+
     def __parse_history(self, file, username):
         """
         Parse /Users/username/.bash_history
         N.B. OSX version checking removed as this is a common directory and file across versions
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + ".txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + ".txt")) as output_file:
             output_file.write("=" * 10 + " " + self._name + " " + "=" * 10 + "\r\n")
             output_file.write("Source File: {0}\r\n\r\n".format(file))
             if os.path.isfile(file):
-                history_file = codecs.open(file, "r", encoding="utf-8")
-                for lines in history_file:
-                    output_file.write(lines.replace("\n", "\r\n"))
-                history_file.close()
+                self.__copy_lines(file, output_file, username, BashHistoryRecord)
             else:
                 logging.warning("File: %s does not exist or cannot be found.\r\n", file)
                 output_file.write("[WARNING] File: {0} does not exist or cannot be found.\r\n".format(file))
                 print("[WARNING] File: {0} does not exist or cannot be found.\r\n".format(file))
             output_file.write("=" * 40 + "\r\n\r\n")
         output_file.close()
+
+    def __parse_zsh_history(self, username):
+        """
+        Parse /Users/username/.zsh_sessions/*.history(new) and /Users/username/.zsh_history
+        """
+        user_path = os.path.join(self._input_dir, "Users", username)
+        if not os.path.isdir(os.path.join(user_path, ".zsh_sessions")) and \
+                not os.path.isfile(os.path.join(user_path, ".zsh_history")):
+            return
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + ".txt")) as output_file:
+            output_file.write("=" * 10 + " " + self._name + " " + "=" * 10 + "\r\n")
+            output_file.write("Zsh History\r\n")
+            source = None
+            for record in self.__zsh_records(username):
+                if record.source != source:
+                    source = record.source
+                    output_file.write("Source File: {0}\r\n\r\n".format(source))
+                output_file.write_record(record)
+            output_file.write("=" * 40 + "\r\n\r\n")
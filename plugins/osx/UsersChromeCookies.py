@@ -1,8 +1,8 @@
 """ Module to parse Google Chrome Cookies database"""
-import codecs
 import logging
 import os
 import sqlite3
+import riplib.osxripper_sqlite
 import riplib.osxripper_time
 from riplib.plugin import Plugin
 
@@ -35,7 +35,7 @@ class UsersChromeCookies(Plugin):
         users_path = os.path.join(self._input_dir, "Users")
         # username = None
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
             for username in user_list:
                 if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                     history_path = os.path.join(users_path, username, "Library", "Application Support", "Google", "Chrome", "Default")
@@ -52,41 +52,40 @@ class UsersChromeCookies(Plugin):
         """
         Read the History SQLite database
         """
-        query = "SELECT host_key,name,value,path,creation_utc,last_access_utc,expires_utc," \
+        window_sql, window_params = self.time_window_sql("last_access_utc", riplib.osxripper_time.GREGORIAN_1601,
+                                                         riplib.osxripper_time.MICROS, " WHERE ")
+        query = "SELECT host_key,name,value,path,webkit_to_iso(creation_utc) AS creation_utc_iso," \
+                    "webkit_to_iso(last_access_utc) AS last_access_utc_iso,webkit_to_iso(expires_utc) AS expires_utc_iso," \
                     "secure,httponly,has_expires,persistent,priority " \
-                    "FROM cookies ORDER BY creation_utc;"
+                    "FROM cookies" + window_sql + " ORDER BY creation_utc;"
 
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + "_Chrome_Cookies.txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + "_Chrome_Cookies.txt")) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             history_db = os.path.join(file, self._data_file)
             if os.path.isfile(history_db):
                 output_file.write("Source File: {0}\r\n\r\n".format(history_db))
                 conn = None
                 try:
-                    conn = sqlite3.connect(history_db)
-                    conn.row_factory = sqlite3.Row
+                    conn = riplib.osxripper_sqlite.connect(history_db)
                     with conn:
                         cur = conn.cursor()
-                        cur.execute(query)
+                        cur.execute(query, window_params)
                         rows = cur.fetchall()
                         for row in rows:
-                            creation_utc = riplib.osxripper_time.get_gregorian_micros(row["creation_utc"])
-                            last_access_utc = riplib.osxripper_time.get_gregorian_micros(row["last_access_utc"])
-                            expires_utc = riplib.osxripper_time.get_gregorian_micros(row["expires_utc"])
-
-                            output_file.write("Host Key       : {0}\r\n".format(row["host_key"]))
-                            output_file.write("Name           : {0}\r\n".format(row["name"]))
-                            output_file.write("Value          : {0}\r\n".format(row["value"]))
-                            output_file.write("Path           : {0}\r\n".format(row["path"]))
-                            output_file.write("Creation UTC   : {0}\r\n".format(creation_utc))
-                            output_file.write("Last Access UTC: {0}\r\n".format(last_access_utc))
-                            output_file.write("Expires UTC    : {0}\r\n".format(expires_utc))
-                            output_file.write("Secure         : {0}\r\n".format(row["secure"]))
-                            output_file.write("HTTP Only      : {0}\r\n".format(row["httponly"]))
-                            output_file.write("Has Expires    : {0}\r\n".format(row["has_expires"]))
-                            output_file.write("Persistent     : {0}\r\n".format(row["persistent"]))
-                            output_file.write("Priority       : {0}\r\n".format(row["priority"]))
-                            output_file.write("\r\n")
+                            output_file.write_record((
+                                ("Host Key", row["host_key"]),
+                                ("Name", row["name"]),
+                                ("Value", row["value"]),
+                                ("Path", row["path"]),
+                                ("Creation UTC", row["creation_utc_iso"]),
+                                ("Last Access UTC", row["last_access_utc_iso"]),
+                                ("Expires UTC", row["expires_utc_iso"]),
+                                ("Secure", row["secure"]),
+                                ("HTTP Only", row["httponly"]),
+                                ("Has Expires", row["has_expires"]),
+                                ("Persistent", row["persistent"]),
+                                ("Priority", row["priority"]),
+                            ))
                 except sqlite3.Error as _:
                     self.__parse_alt(output_file, conn)
             else:
@@ -100,30 +99,30 @@ class UsersChromeCookies(Plugin):
         """
         Alternate schema
         """
-        query_alt = "SELECT host_key,name,value,path,creation_utc,last_access_utc,expires_utc,is_secure," \
-                    "is_httponly,has_expires,is_persistent,priority FROM cookies ORDER BY creation_utc;"
+        window_sql, window_params = self.time_window_sql("last_access_utc", riplib.osxripper_time.GREGORIAN_1601,
+                                                         riplib.osxripper_time.MICROS, " WHERE ")
+        query_alt = "SELECT host_key,name,value,path,webkit_to_iso(creation_utc) AS creation_utc_iso," \
+                    "webkit_to_iso(last_access_utc) AS last_access_utc_iso,webkit_to_iso(expires_utc) AS expires_utc_iso,is_secure," \
+                    "is_httponly,has_expires,is_persistent,priority FROM cookies" + window_sql + " ORDER BY creation_utc;"
         try:
             cur = db_connection.cursor()
-            cur.execute(query_alt)
+            cur.execute(query_alt, window_params)
             rows = cur.fetchall()
             for row in rows:
-                creation_utc = riplib.osxripper_time.get_gregorian_micros(row["creation_utc"])
-                last_access_utc = riplib.osxripper_time.get_gregorian_micros(row["last_access_utc"])
-                expires_utc = riplib.osxripper_time.get_gregorian_micros(row["expires_utc"])
-
-                output_file.write("Host Key       : {0}\r\n".format(row["host_key"]))
-                output_file.write("Name           : {0}\r\n".format(row["name"]))
-                output_file.write("Value          : {0}\r\n".format(row["value"]))
-                output_file.write("Path           : {0}\r\n".format(row["path"]))
-                output_file.write("Creation UTC   : {0}\r\n".format(creation_utc))
-                output_file.write("Last Access UTC: {0}\r\n".format(last_access_utc))
-                output_file.write("Expires UTC    : {0}\r\n".format(expires_utc))
-                output_file.write("Secure         : {0}\r\n".format(row["is_secure"]))
-                output_file.write("HTTP Only      : {0}\r\n".format(row["is_httponly"]))
-                output_file.write("Has Expires    : {0}\r\n".format(row["has_expires"]))
-                output_file.write("Persistent     : {0}\r\n".format(row["is_persistent"]))
-                output_file.write("Priority       : {0}\r\n".format(row["priority"]))
-                output_file.write("\r\n")
+                output_file.write_record((
+                    ("Host Key", row["host_key"]),
+                    ("Name", row["name"]),
+                    ("Value", row["value"]),
+                    ("Path", row["path"]),
+                    ("Creation UTC", row["creation_utc_iso"]),
+                    ("Last Access UTC", row["last_access_utc_iso"]),
+                    ("Expires UTC", row["expires_utc_iso"]),
+                    ("Secure", row["is_secure"]),
+                    ("HTTP Only", row["is_httponly"]),
+                    ("Has Expires", row["has_expires"]),
+                    ("Persistent", row["is_persistent"]),
+                    ("Priority", row["priority"]),
+                ))
         except sqlite3.Error as error:
             logging.error("%s", error.args[0])
             print("[ERROR] {0}".format(error.args[0]))
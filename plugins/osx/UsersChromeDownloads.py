@@ -1,9 +1,10 @@
 """ Module to parse Downloads data from Google Chrome """
-import codecs
 import logging
 import os
 import sqlite3
+import riplib.osxripper_sqlite
 import riplib.osxripper_time
+from riplib.osxripper_records import INT, TEXT, TIME, record_type
 from riplib.plugin import Plugin
 
 
@@ -11,6 +12,18 @@ __author__ = 'osxripper'
 __version__ = '0.1'
 __license__ = 'GPLv3'
 
+DownloadRecord = record_type("DownloadRecord", (
+    ("user", None, TEXT),
+    ("source", None, TEXT),
+    ("id", "ID", INT),
+    ("current_path", "Current Path", TEXT),
+    ("target_path", "Target Path", TEXT),
+    ("start_time", "Start Time", TIME),
+    ("received_bytes", "Received", INT),
+    ("total_bytes", "Total Bytes", INT),
+    ("referrer", "Referer", TEXT),
+))
+
 
 class UsersChromeDownloads(Plugin):
     """
@@ -22,25 +35,43 @@ class UsersChromeDownloads(Plugin):
         Initialise the class.
         """
         super().__init__()
-        self.set_name = "User Chrome Browser Download History"
-        self.set_description = "Parse information from /Users/<username>/Library/Application Support/Google/Chrome/Default/History"
-        self.set_data_file = "History"
-        self.set_output_file = ""  # this will have to be defined per user account
-        self.set_type = "sqlite"
+        self.set_name("User Chrome Browser Download History")
+        self.set_description("Parse information from /Users/<username>/Library/Application Support/Google/Chrome/Default/History")
+        self.set_data_file("History")
+        self.set_output_file("")  # this will have to be defined per user account
+        self.set_type("sqlite")
 
     def parse(self):
         """
         Iterate over /Users directory and find user sub-directories
         """
+        for username, history_path in self.__history_paths():
+            self.__parse_sqlite_db(history_path, username)
+
+    def iter_records(self):
+        """
+        Yield a DownloadRecord per download in the Chrome History of every user
+        """
+        for username, history_path in self.__history_paths():
+            history_db = os.path.join(history_path, "History")
+            if os.path.isfile(history_db):
+                yield from self.__records(history_db, username)
+            else:
+                logging.warning("File: %s does not exist or cannot be found.", history_db)
+
+    def __history_paths(self):
+        """
+        Yield (username, Chrome profile directory) for each user that has one
+        """
         users_path = os.path.join(self._input_dir, "Users")
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
             for username in user_list:
                 if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                     history_path = os.path\
                         .join(users_path, username, "Library", "Application Support", "Google", "Chrome", "Default")
                     if os.path.isdir(history_path):
-                        self.__parse_sqlite_db(history_path, username)
+                        yield username, history_path
                     else:
                         logging.warning("%s does not exist.", history_path)
                         print("[WARNING] {0} does not exist.".format(history_path))
@@ -50,43 +81,44 @@ class UsersChromeDownloads(Plugin):
 
     def __parse_sqlite_db(self, file, username):
         """
-        Read the History SQLite database
+        Write the records of the History SQLite database
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + "_Chrome_Downloads.txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + "_Chrome_Downloads.txt")) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             history_db = os.path.join(file, "History")
-            query = "SELECT id, current_path, target_path," \
-                    "start_time," \
-                    "received_bytes, total_bytes, referrer FROM downloads"
             if os.path.isfile(history_db):
                 output_file.write("Source File: {0}\r\n\r\n".format(history_db))
-                conn = None
-                try:
-                    conn = sqlite3.connect(history_db)
-                    conn.row_factory = sqlite3.Row
-                    with conn:
-                        cur = conn.cursor()
-                        cur.execute(query)
-                        rows = cur.fetchall()
-                        for row in rows:
-                            start_time = riplib.osxripper_time.get_gregorian_micros(row["start_time"])
-                            output_file.write("ID          : {0}\r\n".format(row["id"]))
-                            output_file.write("Current Path: {0}\r\n".format(row["current_path"]))
-                            output_file.write("Target Path : {0}\r\n".format(row["target_path"]))
-                            output_file.write("Start Time  : {0}\r\n".format(start_time))
-                            output_file.write("Received    : {0}\r\n".format(row["received_bytes"]))
-                            output_file.write("Total Bytes : {0}\r\n".format(row["total_bytes"]))
-                            output_file.write("Referer     : {0}\r\n".format(row["referrer"]))
-                            output_file.write("\r\n")
-                except sqlite3.Error as error:
-                    logging.error("%s", error.args[0])
-                    print("[ERROR] {0}".format(error.args[0]))
-                finally:
-                    if conn:
-                        conn.close()
+                for record in self.__records(history_db, username):
+                    output_file.write_record(record)
             else:
                 logging.warning("File: %s does not exist or cannot be found.\r\n", file)
                 output_file.write("[WARNING] File: {0} does not exist or cannot be found.\r\n".format(file))
                 print("[WARNING] File: {0} does not exist or cannot be found.".format(file))
             output_file.write("="*40 + "\r\n\r\n")
         output_file.close()
+
+    def __records(self, history_db, username):
+        """
+        Yield the downloads of the History SQLite database
+        """
+        window_sql, window_params = self.time_window_sql("start_time", riplib.osxripper_time.GREGORIAN_1601,
+                                                         riplib.osxripper_time.MICROS, " WHERE ")
+        query = "SELECT id, current_path, target_path," \
+                "webkit_to_iso(start_time) AS start_time_iso," \
+                "received_bytes, total_bytes, referrer FROM downloads" + window_sql
+        conn = None
+        try:
+            conn = riplib.osxripper_sqlite.connect(history_db)
+            with conn:
+                cur = conn.cursor()
+                cur.execute(query, window_params)
+                for row in cur:
+                    yield DownloadRecord(username, history_db, row["id"], row["current_path"], row["target_path"],
+                                         row["start_time_iso"], row["received_bytes"], row["total_bytes"],
+                                         row["referrer"])
+        except sqlite3.Error as error:
+            logging.error("%s", error.args[0])
+            print("[ERROR] {0}".format(error.args[0]))
+        finally:
+            if conn:
+                conn.close()
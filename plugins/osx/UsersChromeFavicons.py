@@ -1,8 +1,8 @@
 """ Module to parse Google Chrome Favicons """
-import codecs
 import logging
 import os
 import sqlite3
+import riplib.osxripper_sqlite
 import riplib.osxripper_time
 from riplib.plugin import Plugin
 
@@ -35,7 +35,7 @@ class UsersChromeFavicons(Plugin):
         users_path = os.path.join(self._input_dir, "Users")
         # username = None
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
             for username in user_list:
                 if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                     history_path = os.path\
@@ -53,26 +53,27 @@ class UsersChromeFavicons(Plugin):
         """
         Read the Favicons SQLite database
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + "_Chrome_Favicons.txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + "_Chrome_Favicons.txt")) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             history_db = os.path.join(file, self._data_file)
-            query = "SELECT im.page_url,fi.url,fb.last_updated FROM " \
-                    "favicon_bitmaps fb,favicons fi,icon_mapping im WHERE fb.icon_id = fi.id AND im.icon_id = fi.id"
+            window_sql, window_params = self.time_window_sql("fb.last_updated", riplib.osxripper_time.GREGORIAN_1601,
+                                                             riplib.osxripper_time.MICROS)
+            query = "SELECT im.page_url,fi.url,webkit_to_iso(fb.last_updated) AS last_updated_iso FROM " \
+                    "favicon_bitmaps fb,favicons fi,icon_mapping im WHERE fb.icon_id = fi.id AND im.icon_id = fi.id" \
+                    + window_sql
             if os.path.isfile(history_db):
                 output_file.write("Source File: {0}\r\n\r\n".format(history_db))
                 conn = None
                 try:
-                    conn = sqlite3.connect(history_db)
-                    conn.row_factory = sqlite3.Row
+                    conn = riplib.osxripper_sqlite.connect(history_db)
                     with conn:
                         cur = conn.cursor()
-                        cur.execute(query)
+                        cur.execute(query, window_params)
                         rows = cur.fetchall()
                         for row in rows:
-                            last_updated = riplib.osxripper_time.get_gregorian_micros(row["last_updated"])
                             output_file.write("Page URL    : {0}\r\n".format(row["page_url"]))
                             output_file.write("Icon URL    : {0}\r\n".format(row["url"]))
-                            output_file.write("Last Updated: {0}\r\n".format(last_updated))
+                            output_file.write("Last Updated: {0}\r\n".format(row["last_updated_iso"]))
                             output_file.write("\r\n")
                 except sqlite3.Error as error:
                     logging.error("%s", error.args[0])
@@ -1,9 +1,11 @@
 """ Module to parse Google Chrome History """
-import codecs
 import logging
 import os
 import sqlite3
+import riplib.osxripper_carve
+import riplib.osxripper_sqlite
 import riplib.osxripper_time
+from riplib.osxripper_records import INT, TEXT, TIME, record_type
 from riplib.plugin import Plugin
 
 
@@ -11,6 +13,32 @@ __author__ = 'osxripper'
 __version__ = '0.1'
 __license__ = 'GPLv3'
 
+HistoryRecord = record_type("HistoryRecord", (
+    ("user", None, TEXT),
+    ("source", None, TEXT),
+    ("id", "ID", INT),
+    ("url", "URL", TEXT),
+    ("title", "Title", TEXT),
+    ("search_term", "Search Term", TEXT),
+    ("visit_count", "Visit Count", INT),
+    ("last_visit", "Last Visit", TIME),
+    ("typed_count", "Typed Count", INT),
+    ("hidden", "Hidden", INT),
+))
+
+CarvedHistoryRecord = record_type("CarvedHistoryRecord", (
+    ("user", None, TEXT),
+    ("source", None, TEXT),
+    ("carved_from", "Carved From", TEXT),
+    ("id", "ID", INT),
+    ("url", "URL", TEXT),
+    ("title", "Title", TEXT),
+    ("visit_count", "Visit Count", INT),
+    ("last_visit", "Last Visit", TIME),
+    ("typed_count", "Typed Count", INT),
+    ("hidden", "Hidden", INT),
+))
+
 
 class UsersChromeHistory(Plugin):
     """
@@ -32,15 +60,33 @@ class UsersChromeHistory(Plugin):
         """
         Iterate over /Users directory and find user sub-directories
         """
+        for username, history_path in self.__history_paths():
+            self.__parse_sqlite_db(history_path, username)
+
+    def iter_records(self):
+        """
+        Yield a HistoryRecord per searched url and a CarvedHistoryRecord per deleted url of every user
+        """
+        for username, history_path in self.__history_paths():
+            history_db = os.path.join(history_path, "History")
+            if os.path.isfile(history_db):
+                yield from self.__records(history_db, username)
+            else:
+                logging.warning("File: %s does not exist or cannot be found.", history_db)
+
+    def __history_paths(self):
+        """
+        Yield (username, Chrome profile directory) for each user that has one
+        """
         users_path = os.path.join(self._input_dir, "Users")
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
             for username in user_list:
                 if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                     history_path = os.path\
                         .join(users_path, username, "Library", "Application Support", "Google", "Chrome", "Default")
                     if os.path.isdir(history_path):
-                        self.__parse_sqlite_db(history_path, username)
+                        yield username, history_path
                     else:
                         logging.warning("%s does not exist.", history_path)
                         print("[WARNING] {0} does not exist.".format(history_path))
@@ -50,43 +96,72 @@ class UsersChromeHistory(Plugin):
 
     def __parse_sqlite_db(self, file, username):
         """
-        Read the History SQLite database
+        Write the records of the History SQLite database
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + "_Chrome_History.txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + "_Chrome_History.txt")) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             history_db = os.path.join(file, "History")
-            query = "SELECT id, url,title,term,visit_count,last_visit_time," \
-                    "typed_count,hidden FROM urls, keyword_search_terms WHERE keyword_search_terms.url_id=urls.id"
             if os.path.isfile(history_db):
                 output_file.write("Source File: {0}\r\n\r\n".format(history_db))
-                conn = None
-                try:
-                    conn = sqlite3.connect(history_db)
-                    conn.row_factory = sqlite3.Row
-                    with conn:
-                        cur = conn.cursor()
-                        cur.execute(query)
-                        rows = cur.fetchall()
-                        for row in rows:
-                            last_visit_time = riplib.osxripper_time.get_gregorian_micros(row["last_visit_time"])
-                            output_file.write("ID         : {0}\r\n".format(row["id"]))
-                            output_file.write("URL        : {0}\r\n".format(row["url"]))
-                            output_file.write("Title      : {0}\r\n".format(row["term"]))
-                            output_file.write("Search Term: {0}\r\n".format(row["term"]))
-                            output_file.write("Visit Count: {0}\r\n".format(row["visit_count"]))
-                            output_file.write("Last Visit : {0}\r\n".format(last_visit_time))
-                            output_file.write("Typed Count: {0}\r\n".format(row["typed_count"]))
-                            output_file.write("Hidden     : {0}\r\n".format(row["hidden"]))
-                            output_file.write("\r\n")
-                except sqlite3.Error as error:
-                    logging.error("%s", error.args[0])
-                    print("[ERROR] {0}".format(error.args[0]))
-                finally:
-                    if conn:
-                        conn.close()
+                carved_heading = False
+                for record in self.__records(history_db, username):
+                    if isinstance(record, CarvedHistoryRecord) and not carved_heading:
+                        output_file.write("="*10 + " Carved urls Records (deleted, recovered from free space) "
+                                          + "="*10 + "\r\n")
+                        carved_heading = True
+                    output_file.write_record(record)
             else:
                 logging.warning("File: %s does not exist or cannot be found.\r\n", file)
                 output_file.write("[WARNING] File: {0} does not exist or cannot be found.\r\n".format(file))
                 print("[WARNING] File: {0} does not exist or cannot be found.".format(file))
             output_file.write("="*40 + "\r\n\r\n")
         output_file.close()
+
+    def __records(self, history_db, username):
+        """
+        Yield the searched urls of the History database followed by the deleted urls carved from its free pages
+        """
+        window_sql, window_params = self.time_window_sql("last_visit_time", riplib.osxripper_time.GREGORIAN_1601,
+                                                         riplib.osxripper_time.MICROS)
+        query = "SELECT id, url,title,term,visit_count,webkit_to_iso(last_visit_time) AS last_visit_time_iso," \
+                "typed_count,hidden FROM urls, keyword_search_terms WHERE keyword_search_terms.url_id=urls.id" \
+                + window_sql
+        conn = None
+        try:
+            conn = riplib.osxripper_sqlite.connect(history_db)
+            with conn:
+                cur = conn.cursor()
+                cur.execute(query, window_params)
+                for row in cur:
+                    yield HistoryRecord(username, history_db, row["id"], row["url"], row["title"], row["term"],
+                                        row["visit_count"], row["last_visit_time_iso"], row["typed_count"],
+                                        row["hidden"])
+                yield from self.__carved_records(history_db, conn, username)
+        except sqlite3.Error as error:
+            logging.error("%s", error.args[0])
+            print("[ERROR] {0}".format(error.args[0]))
+        finally:
+            if conn:
+                conn.close()
+
+    def __carved_records(self, history_db, conn, username):
+        """
+        Yield the deleted urls rows carved from the free pages of the History database, of the
+        newest committed WAL state read by conn when it has a -wal, streamed
+        """
+        try:
+            columns, carved = riplib.osxripper_carve.carve_table(history_db, conn, "urls")
+        except (OSError, riplib.osxripper_carve.CarveError) as error:
+            logging.error("%s", error)
+            print("[ERROR] {0}".format(error))
+            return
+        for carved_record in carved:
+            row = dict(zip(columns, carved_record.values))
+            last_visit_time = riplib.osxripper_time.get_gregorian_micros(row.get("last_visit_time"))
+            if not self.in_time_window(last_visit_time):
+                continue
+            yield CarvedHistoryRecord(
+                username, history_db,
+                "{0} page {1} offset {2}".format(carved_record.source, carved_record.page, carved_record.offset),
+                row.get("id"), row.get("url"), row.get("title"), row.get("visit_count"), last_visit_time,
+                row.get("typed_count"), row.get("hidden"))
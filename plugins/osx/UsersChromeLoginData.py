@@ -1,9 +1,8 @@
 """ Module to parse information from Google Chrome login data """
-import codecs
 import logging
 import os
 import sqlite3
-import riplib.osxripper_time
+import riplib.osxripper_sqlite
 from riplib.plugin import Plugin
 
 __author__ = 'osxripper'
@@ -34,7 +33,7 @@ class UsersChromeLoginData(Plugin):
         users_path = os.path.join(self._input_dir, "Users")
         # username = None
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
             for username in user_list:
                 if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                     history_path = os.path\
@@ -52,7 +51,7 @@ class UsersChromeLoginData(Plugin):
         """
         Read the Login Data SQLite database
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + "_Chrome_Login_Data.txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + "_Chrome_Login_Data.txt")) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             history_db = os.path.join(file, self._data_file)
             # query = "SELECT username_value,display_name,origin_url,action_url," \
@@ -60,7 +59,7 @@ class UsersChromeLoginData(Plugin):
             #         "signon_realm,ssl_valid,preferred,times_used,blacklisted_by_user," \
             #         "scheme,password_type,avatar_url,federation_url FROM logins ORDER BY username_value"
             query = "SELECT username_value,display_name,origin_url,action_url," \
-                    "date_created,date_synced," \
+                    "webkit_to_iso(date_created) AS date_created_iso,webkit_to_iso(date_synced) AS date_synced_iso," \
                     "signon_realm,preferred,times_used,blacklisted_by_user," \
                     "scheme,password_type,federation_url FROM logins ORDER BY username_value"
             if os.path.isfile(history_db):
@@ -68,8 +67,7 @@ class UsersChromeLoginData(Plugin):
                 output_file.write("N.B. Creds are stored as BLOBS, not retrieved by this plugin\r\n\r\n")
                 conn = None
                 try:
-                    conn = sqlite3.connect(history_db)
-                    conn.row_factory = sqlite3.Row
+                    conn = riplib.osxripper_sqlite.connect(history_db)
                     with conn:
                         cur = conn.cursor()
                         cur.execute(query)
@@ -78,14 +76,12 @@ class UsersChromeLoginData(Plugin):
                             output_file.write("No data found in this database.\r\n\r\n")
                         else:
                             for row in rows:
-                                date_created = riplib.osxripper_time.get_gregorian_micros(row["date_created"])
-                                date_synced = riplib.osxripper_time.get_gregorian_micros(row["date_synced"])
                                 output_file.write("Username           : {0}\r\n".format(row["username_value"]))
                                 output_file.write("Display Name       : {0}\r\n".format(row["display_name"]))
                                 output_file.write("Origin URL         : {0}\r\n".format(row["origin_url"]))
                                 output_file.write("Action URL         : {0}\r\n".format(row["action_url"]))
-                                output_file.write("Date Created       : {0}\r\n".format(date_created))
-                                output_file.write("Date Synced        : {0}\r\n".format(date_synced))
+                                output_file.write("Date Created       : {0}\r\n".format(row["date_created_iso"]))
+                                output_file.write("Date Synced        : {0}\r\n".format(row["date_synced_iso"]))
                                 output_file.write("Signon Realm       : {0}\r\n".format(row["signon_realm"]))
                                 output_file.write("SSL Valid          : {0}\r\n".format(row["ssl_valid"]))
                                 output_file.write("Preferred          : {0}\r\n".format(row["preferred"]))
@@ -1,8 +1,8 @@
 """ Module to parse Autofill data form Google Chrome """
-import codecs
 import logging
 import os
 import sqlite3
+import riplib.osxripper_sqlite
 import riplib.osxripper_time
 from riplib.plugin import Plugin
 
@@ -34,7 +34,7 @@ class UsersChromeWebData(Plugin):
         """
         users_path = os.path.join(self._input_dir, "Users")
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
             for username in user_list:
                 if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                     history_path = os.path.join(users_path, username, "Library", "Application Support", "Google", "Chrome", "Default")
@@ -51,7 +51,7 @@ class UsersChromeWebData(Plugin):
         """
         Read the Web Data SQLite database
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + "_Chrome_Web_Data.txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + "_Chrome_Web_Data.txt")) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             web_data_db = os.path.join(file, "Web Data")
 
@@ -59,8 +59,7 @@ class UsersChromeWebData(Plugin):
                 output_file.write("Source File: {0}\r\n\r\n".format(web_data_db))
                 conn = None
                 try:
-                    conn = sqlite3.connect(web_data_db)
-                    conn.row_factory = sqlite3.Row
+                    conn = riplib.osxripper_sqlite.connect(web_data_db)
                     self._parse_autofill(output_file, conn)
                     self._parse_autofill_profile_emails(output_file, conn)
                     self._parse_autofill_profile_names(output_file, conn)
@@ -1,5 +1,4 @@
 """ Mdule to parse CyberGhost plist """
-import codecs
 import datetime
 import logging
 import os
@@ -34,7 +33,7 @@ class UsersCyberGhost(Plugin):
         """
         users_path = os.path.join(self._input_dir, "Users")
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
             for username in user_list:
                 if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                     config = os.path.join(users_path, username, "Library", "Preferences", self._data_file)
@@ -50,7 +49,7 @@ class UsersCyberGhost(Plugin):
         """
         Parse /Users/{username}/Library/Preferences/com.cyberghostsrl.cyberghostmac.plist
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + "_VPN_CyberGhost.txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + "_VPN_CyberGhost.txt")) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             output_file.write("Source File: {0}\r\n\r\n".format(file))
             if os.path.isfile(file):
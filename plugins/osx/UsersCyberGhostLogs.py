@@ -1,7 +1,7 @@
 """ Module to parse information from CyberGhost log """
-import codecs
 import logging
 import os
+import riplib.osxripper_lines
 from riplib.plugin import Plugin
 
 __author__ = 'osxripper'
@@ -31,7 +31,7 @@ class UsersCyberGhostLogs(Plugin):
         """
         users_path = os.path.join(self._input_dir, "Users")
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
             for username in user_list:
                 if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                     config = os.path.join(users_path, username, "Library", "Application Support")
@@ -47,28 +47,22 @@ class UsersCyberGhostLogs(Plugin):
         """
         Parse /Users/{username}/Library/Application Support/CyberGhost {version}
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + "_VPN_CyberGhost.txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + "_VPN_CyberGhost.txt")) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
-            app_support_dir = os.listdir(file)
+            app_support_dir = self.list_dir(file)
             for directory in app_support_dir:
                 if "CyberGhost" in directory:
                     ghost_dir = os.path.join(file, directory)
                     output_file.write("Source Directory: {0}\r\n\r\n".format(ghost_dir))
-                    ghost_dir_list = os.listdir(ghost_dir)
+                    ghost_dir_list = self.list_dir(ghost_dir)
                     for ghost_file in ghost_dir_list:
                         if ghost_file == "CyberGhostMacLog.log":
                             output_file.write("="*10 + " " + ghost_file + " " + "="*10 + "\r\n")
-                            with open(os.path.join(ghost_dir, ghost_file), "r") as mac_log:
-                                for line in mac_log.readlines():
-                                    output_file.write("{0}\r\n".format(line))
-                            mac_log.close()
+                            riplib.osxripper_lines.copy_lines(os.path.join(ghost_dir, ghost_file), output_file)
                             output_file.write("\r\n")
                         if ghost_file == "CyberGhostMacLogScripts.log":
                             output_file.write("="*10 + " " + ghost_file + " " + "="*10 + "\r\n")
-                            with open(os.path.join(ghost_dir, ghost_file), "r") as scripts_log:
-                                for line in scripts_log.readlines():
-                                    output_file.write("{0}\r\n".format(line))
-                            scripts_log.close()
+                            riplib.osxripper_lines.copy_lines(os.path.join(ghost_dir, ghost_file), output_file)
                             output_file.write("\r\n")
             output_file.write("="*40 + "\r\n\r\n")
         output_file.close()
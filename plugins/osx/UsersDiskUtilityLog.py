@@ -1,7 +1,7 @@
 """ Module to parse DiskUtilit log """
-import codecs
 import logging
 import os
+import riplib.osxripper_lines
 from riplib.plugin import Plugin
 
 
@@ -33,7 +33,7 @@ class UsersDiskUtilityLog(Plugin):
         """
         users_path = os.path.join(self._input_dir, "Users")
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
             for username in user_list:
                 if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                     du_log = os.path.join(users_path, username, "Library", "Logs", self._data_file)
@@ -47,15 +47,11 @@ class UsersDiskUtilityLog(Plugin):
         """
         Read the DiskUtility.log
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + ".txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + ".txt")) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             output_file.write("Source File: {0}\r\n\r\n".format(file))
             if self._os_version in ["yosemite", "mavericks", "mountain_lion", "lion", "snow_leopard"]:
-                with codecs.open(file, "r", encoding="utf-8") as du_log:
-                    for line in du_log.readlines():
-                        if "**" not in line and len(line) != 0:
-                            output_file.write(line.replace("\n", "\r\n"))
-                du_log.close()
+                riplib.osxripper_lines.copy_lines(file, output_file, lambda line: "**" not in line)
             if self._os_version in ["big_sur", "catalina", "mojave", "high_sierra", "sierra", "el_capitan"]:
                 logging.info("This version of OSX is not supported by this plugin.")
                 print("[INFO] This version of OSX is not supported by this plugin.")
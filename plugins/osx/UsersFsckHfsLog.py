@@ -1,7 +1,7 @@
 """ Module to parse fsck log """
-import codecs
 import logging
 import os
+import riplib.osxripper_lines
 from riplib.plugin import Plugin
 
 
@@ -32,7 +32,7 @@ class UsersFsckHfsLog(Plugin):
         """
         users_path = os.path.join(self._input_dir, "Users")
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
             for username in user_list:
                 if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                     fsck_log = os.path.join(users_path, username, "Library", "Logs", self._data_file)
@@ -49,23 +49,14 @@ class UsersFsckHfsLog(Plugin):
         """
         Read the fsck_hfs.log file
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + ".txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + ".txt")) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             output_file.write("Source File: {0}\r\n\r\n".format(file))
             if self._os_version in ["big_sur", "catalina", "mojave", "high_sierra", "sierra", "el_capitan", "yosemite",
                                     "mavericks", "mountain_lion", "lion", "snow_leopard"]:
-                with codecs.open(file, "r", encoding="utf-8") as fsck:
-                    for line in fsck.readlines():
-                        # fsck_hfs started
-                        if "fsck_hfs started" in line:
-                            output_file.write(line + "\r\n")
-                        # The volume
-                        if "The volume" in line:
-                            output_file.write(line + "\r\n")
-                        # fsck_hfs completed
-                        if "fsck_hfs completed" in line:
-                            output_file.write(line + "\r\n")
-                fsck.close()
+                # fsck_hfs started, The volume ..., fsck_hfs completed
+                riplib.osxripper_lines.copy_lines(file, output_file, lambda line: "fsck_hfs started" in line or
+                                                  "The volume" in line or "fsck_hfs completed" in line)
             else:
                 logging.warning("Not a known OSX version.")
                 print("[WARNING] Not a known OSX version.")
@@ -1,5 +1,4 @@
 """ Module to list iOS backups """
-import codecs
 import logging
 import os
 from riplib.plugin import Plugin
@@ -31,7 +30,7 @@ class UsersIosBackupList(Plugin):
         """
         users_path = os.path.join(self._input_dir, "Users")
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
             for username in user_list:
                 if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                     ios_backup_dir = os.path\
@@ -49,12 +48,12 @@ class UsersIosBackupList(Plugin):
         """
         List information from /Users/username/Library/Application Support/MobileSync/Backup
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + "_ios_backup_list.txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + "_ios_backup_list.txt")) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             output_file.write("Source Directory: {0}\r\n\r\n".format(file))
             if self._os_version in ["big_sur", "catalina", "mojave", "high_sierra", "sierra", "el_capitan", "yosemite",
                                     "mavericks", "mountain_lion", "lion", "snow_leopard"]:
-                dir_listing = os.listdir(file)
+                dir_listing = self.list_dir(file)
                 for file_item in dir_listing:
                     output_file.write("iOS Backup: {0}\r\n".format(file_item))
             else:
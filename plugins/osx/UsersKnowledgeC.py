@@ -1,8 +1,9 @@
 """ Module to parse KnowledgeC database """
-import codecs
 import logging
 import os
 import sqlite3
+import riplib.osxripper_sqlite
+import riplib.osxripper_time
 from riplib.plugin import Plugin
 
 
@@ -33,9 +34,9 @@ class UsersKnowledgeC(Plugin):
         users_path = os.path.join(self._input_dir, "Users")
 
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
             for username in user_list:
-                with codecs.open(os.path.join(self._output_dir, "Users_" + username + "_KnowledgeC.txt"), "a", encoding="utf-8") as output_file:
+                with self.open_output(os.path.join(self._output_dir, "Users_" + username + "_KnowledgeC.txt")) as output_file:
                     if self._os_version in ["big_sur", "catalina"]:
                         logging.info("This version of OSX is not supported by this plugin.")
                         print("[INFO] This version of OSX is not supported by this plugin.")
@@ -63,6 +64,7 @@ class UsersKnowledgeC(Plugin):
         """
         Read the /private/var/db/CoreDuet/Knowledge/KnowledgeC.db SQLite database
         """
+        window_sql, window_params = self.time_window_sql("ZSTARTDATE", riplib.osxripper_time.COCOA_EPOCH)
         mac4n6_sql = "SELECT datetime(ZCREATIONDATE+978307200, 'UNIXEPOCH', 'LOCALTIME') as \"ENTRY CREATION\"," \
                      "CASE ZSTARTDAYOFWEEK" \
                      " WHEN \"1\" THEN \"Sunday\"" \
@@ -82,7 +84,7 @@ class UsersKnowledgeC(Plugin):
                      "FROM " \
                      "ZOBJECT " \
                      "WHERE " \
-                     "ZSTREAMNAME IS \"/app/inFocus\" " \
+                     "ZSTREAMNAME IS \"/app/inFocus\"" + window_sql + " " \
                      "ORDER BY \"START\""
         headers = "ENTRY CREATION\tDAY OF WEEK\tGMT OFFSET\tSTART\tEND\tUSAGE IN SECONDS\tSTREAMNAME\tVALUESTRING\r\n"
         output_file.write("=" * 10 + " " + self._name + " " + "=" * 10 + "\r\n")
@@ -92,11 +94,10 @@ class UsersKnowledgeC(Plugin):
             output_file.write("Source File: {0}\r\n\r\n".format(knowledgec_db))
             sqlite_connection = None
             try:
-                sqlite_connection = sqlite3.connect(knowledgec_db)
-                sqlite_connection.row_factory = sqlite3.Row
+                sqlite_connection = riplib.osxripper_sqlite.connect(knowledgec_db)
                 with sqlite_connection:
                     cur = sqlite_connection.cursor()
-                    cur.execute(mac4n6_sql)
+                    cur.execute(mac4n6_sql, window_params)
                     rows = cur.fetchall()
                     if len(rows) == 0:
                         output_file.write("No rows returned from query\r\n")
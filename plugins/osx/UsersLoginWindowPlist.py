@@ -1,5 +1,4 @@
 """ Module to parse LoginWindow plist """
-import codecs
 import logging
 import os
 import riplib.ccl_bplist
@@ -33,7 +32,7 @@ class UsersLoginWindowPlist(Plugin):
         """
         users_path = os.path.join(self._input_dir, "Users")
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
             for username in user_list:
                 if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                     plist = os.path.join(users_path, username, "Library", "Preferences", self._data_file)
@@ -50,7 +49,7 @@ class UsersLoginWindowPlist(Plugin):
         """
         Parse /Users/username/Library/Preferences/com.apple.loginwindow.plist
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + ".txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + ".txt")) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             output_file.write("Source File: {0}\r\n\r\n".format(file))
             if self._os_version in ["big_sur", "catalina", "mojave", "high_sierra", "sierra", "el_capitan"]:
@@ -1,8 +1,8 @@
 """ Module to parse Firefox cookiess """
-import codecs
 import logging
 import os
 import sqlite3
+import riplib.osxripper_sqlite
 import riplib.osxripper_time
 from riplib.plugin import Plugin
 
@@ -34,7 +34,7 @@ class UsersMozillaFirefoxCookies(Plugin):
         """
         users_path = os.path.join(self._input_dir, "Users")
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
         else:
             logging.warning("%s does not exist.", users_path)
             print("[WARNING] {0} does not exist.".format(users_path))
@@ -45,7 +45,7 @@ class UsersMozillaFirefoxCookies(Plugin):
             if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                 profile_search_path = os.path.join(users_path, username, "Library", "Application Support", "Firefox", "Profiles")
             if os.path.isdir(profile_search_path):
-                profiles_list = os.listdir(profile_search_path)
+                profiles_list = self.list_dir(profile_search_path)
                 for profile in profiles_list:
                     if profile.endswith(".default"):
                         sqlite_db = os.path.join(profile_search_path, profile, self._data_file)
@@ -60,36 +60,34 @@ class UsersMozillaFirefoxCookies(Plugin):
         """
         Read the places.sqlite SQLite database
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + "_Firefox_Cookies.txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + "_Firefox_Cookies.txt")) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             if os.path.isfile(file):
                 output_file.write("Source File: {0}\r\n\r\n".format(file))
                 conn = None
                 try:
+                    window_sql, window_params = self.time_window_sql("lastAccessed", riplib.osxripper_time.UNIX_EPOCH,
+                                                                     riplib.osxripper_time.MICROS, " WHERE ")
                     query = "SELECT baseDomain,name,value,host,path," \
-                            "creationTime," \
-                            "lastAccessed," \
-                            "expiry," \
-                            "isSecure,isHttpOnly FROM moz_cookies ORDER BY creationTime"
+                            "unix_us_to_iso(creationTime) AS creationTime_iso," \
+                            "unix_us_to_iso(lastAccessed) AS lastAccessed_iso," \
+                            "unix_us_to_iso(expiry) AS expiry_iso," \
+                            "isSecure,isHttpOnly FROM moz_cookies" + window_sql + " ORDER BY creationTime"
 
-                    conn = sqlite3.connect(file)
-                    conn.row_factory = sqlite3.Row
+                    conn = riplib.osxripper_sqlite.connect(file)
                     with conn:
                         cur = conn.cursor()
-                        cur.execute(query)
+                        cur.execute(query, window_params)
                         rows = cur.fetchall()
                         for row in rows:
-                            creation_time = riplib.osxripper_time.get_unix_micros(row["creationTime"])
-                            last_accessed = riplib.osxripper_time.get_unix_micros(row["lastAccessed"])
-                            expiry = riplib.osxripper_time.get_unix_micros(row["expiry"])
                             output_file.write("Base Domain  : {0}\r\n".format(row["baseDomain"]))
                             output_file.write("Name         : {0}\r\n".format(row["name"]))
                             output_file.write("Value        : {0}\r\n".format(row["value"]))
                             output_file.write("Host         : {0}\r\n".format(row["host"]))
                             output_file.write("Path         : {0}\r\n".format(row["path"]))
-                            output_file.write("Creation Time: {0}\r\n".format(creation_time))
-                            output_file.write("Last Accessed: {0}\r\n".format(last_accessed))
-                            output_file.write("Expiry       : {0}\r\n".format(expiry))
+                            output_file.write("Creation Time: {0}\r\n".format(row["creationTime_iso"]))
+                            output_file.write("Last Accessed: {0}\r\n".format(row["lastAccessed_iso"]))
+                            output_file.write("Expiry       : {0}\r\n".format(row["expiry_iso"]))
                             output_file.write("Is Secure    : {0}\r\n".format(row["isSecure"]))
                             output_file.write("Is HTTP Only : {0}\r\n".format(row["isHttpOnly"]))
                             output_file.write("\r\n")
@@ -1,8 +1,8 @@
 """ Module to parse Firefox form history database """
-import codecs
 import logging
 import os
 import sqlite3
+import riplib.osxripper_sqlite
 import riplib.osxripper_time
 from riplib.plugin import Plugin
 
@@ -34,7 +34,7 @@ class UsersMozillaFirefoxFormHistory(Plugin):
         """
         users_path = os.path.join(self._input_dir, "Users")
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
         else:
             logging.warning("%s does not exist.", users_path)
             print("[WARNING] {0} does not exist.".format(users_path))
@@ -44,7 +44,7 @@ class UsersMozillaFirefoxFormHistory(Plugin):
             if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                 profile_search_path = os.path.join(users_path, username, "Library", "Application Support", "Firefox", "Profiles")
             if os.path.isdir(profile_search_path):
-                profiles_list = os.listdir(profile_search_path)
+                profiles_list = self.list_dir(profile_search_path)
                 for profile in profiles_list:
                     if profile.endswith(".default"):
                         sqlite_db = os.path.join(profile_search_path, profile, self._data_file)
@@ -58,31 +58,30 @@ class UsersMozillaFirefoxFormHistory(Plugin):
         """
         Read the formhistory.sqlite SQLite database
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + "_Firefox_Form_History.txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + "_Firefox_Form_History.txt")) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             if os.path.isfile(file):
                 output_file.write("Source File: {0}\r\n\r\n".format(file))
                 conn = None
                 try:
+                    window_sql, window_params = self.time_window_sql("lastUsed", riplib.osxripper_time.UNIX_EPOCH,
+                                                                     riplib.osxripper_time.MICROS, " WHERE ")
                     query = "SELECT fieldname,value,timesUsed," \
-                            "firstUsed," \
-                            "lastUsed " \
-                            "FROM moz_formhistory ORDER BY firstUsed"
+                            "unix_us_to_iso(firstUsed) AS firstUsed_iso," \
+                            "unix_us_to_iso(lastUsed) AS lastUsed_iso " \
+                            "FROM moz_formhistory" + window_sql + " ORDER BY firstUsed"
 
-                    conn = sqlite3.connect(file)
-                    conn.row_factory = sqlite3.Row
+                    conn = riplib.osxripper_sqlite.connect(file)
                     with conn:
                         cur = conn.cursor()
-                        cur.execute(query)
+                        cur.execute(query, window_params)
                         rows = cur.fetchall()
                         for row in rows:
-                            first_used = riplib.osxripper_time.get_unix_micros(row["firstUsed"])
-                            last_used = riplib.osxripper_time.get_unix_micros(row["lastUsed"])
                             output_file.write("Field Name: {0}\r\n".format(row["fieldname"]))
                             output_file.write("Value     : {0}\r\n".format(row["value"]))
                             output_file.write("Times Used: {0}\r\n".format(row["timesUsed"]))
-                            output_file.write("First Used: {0}\r\n".format(first_used))
-                            output_file.write("Last Used : {0}\r\n".format(last_used))
+                            output_file.write("First Used: {0}\r\n".format(row["firstUsed_iso"]))
+                            output_file.write("Last Used : {0}\r\n".format(row["lastUsed_iso"]))
                             output_file.write("\r\n")
 
                 except sqlite3.Error as error:
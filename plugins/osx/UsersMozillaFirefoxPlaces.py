@@ -1,8 +1,8 @@
 """ Module to parse Firefox places database """
-import codecs
 import logging
 import os
 import sqlite3
+import riplib.osxripper_sqlite
 import riplib.osxripper_time
 from riplib.plugin import Plugin
 
@@ -34,7 +34,7 @@ class UsersMozillaFirefoxPlaces(Plugin):
         """
         users_path = os.path.join(self._input_dir, "Users")
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
         else:
             logging.warning("%s does not exist.", users_path)
             print("[WARNING] {0} does not exist.".format(users_path))
@@ -43,7 +43,7 @@ class UsersMozillaFirefoxPlaces(Plugin):
             if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                 profile_search_path = os.path.join(users_path, username, "Library", "Application Support", "Firefox", "Profiles")
             if os.path.isdir(profile_search_path):
-                profiles_list = os.listdir(profile_search_path)
+                profiles_list = self.list_dir(profile_search_path)
                 for profile in profiles_list:
                     if profile.endswith(".default"):
                         sqlite_db = os.path.join(profile_search_path, profile, self._data_file)
@@ -57,7 +57,7 @@ class UsersMozillaFirefoxPlaces(Plugin):
         """
         Read the places.sqlite SQLite database
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + "_Firefox_Places.txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + "_Firefox_Places.txt")) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             if os.path.isfile(file):
                 output_file.write("Source File: {0}\r\n\r\n".format(file))
@@ -70,43 +70,45 @@ class UsersMozillaFirefoxPlaces(Plugin):
 
             conn = None
             try:
+                window_sql, window_params = self.time_window_sql("last_visit_date", riplib.osxripper_time.UNIX_EPOCH,
+                                                                 riplib.osxripper_time.MICROS, " WHERE ")
                 query = "SELECT url, title, rev_host, visit_count," \
-                        "last_visit_date," \
-                        "hidden, typed FROM moz_places ORDER BY visit_count DESC"
-                conn = sqlite3.connect(file)
-                conn.row_factory = sqlite3.Row
+                        "unix_us_to_iso(last_visit_date) AS last_visit_date_iso," \
+                        "hidden, typed FROM moz_places" + window_sql + " ORDER BY visit_count DESC"
+                conn = riplib.osxripper_sqlite.connect(file)
                 with conn:
                     cur = conn.cursor()
-                    cur.execute(query)
+                    cur.execute(query, window_params)
                     rows = cur.fetchall()
                     for row in rows:
-                        last_visit_date = riplib.osxripper_time.get_unix_micros(row["last_visit_date"])
-                        output_file.write("URL            : {0}\r\n".format(row["url"]))
-                        output_file.write("Title          : {0}\r\n".format(row["title"]))
-                        output_file.write("Rev. Host      : {0}\r\n".format(row["rev_host"]))
-                        output_file.write("Visit Count    : {0}\r\n".format(row["visit_count"]))
-                        output_file.write("Last Visit Date: {0}\r\n".format(last_visit_date))
-                        output_file.write("Hidden         : {0}\r\n".format(row["hidden"]))
-                        output_file.write("Typed          : {0}\r\n".format(row["typed"]))
-                        output_file.write("\r\n")
+                        output_file.write_record((
+                            ("URL", row["url"]),
+                            ("Title", row["title"]),
+                            ("Rev. Host", row["rev_host"]),
+                            ("Visit Count", row["visit_count"]),
+                            ("Last Visit Date", row["last_visit_date_iso"]),
+                            ("Hidden", row["hidden"]),
+                            ("Typed", row["typed"]),
+                        ))
 
                     output_file.write("="*10 + " Mozilla Firefox Annotations " + "="*10 + "\r\n")
                     query = "SELECT mp.url,ma.content,maa.name," \
-                            "ma.dateAdded," \
-                            "ma.lastModified " \
+                            "unix_us_to_iso(ma.dateAdded) AS dateAdded_iso," \
+                            "unix_us_to_iso(ma.lastModified) AS lastModified_iso " \
                             "FROM moz_annos ma,moz_anno_attributes maa,moz_places mp " \
                             "WHERE ma.anno_attribute_id = maa.id AND mp.id = ma.place_id"
-                    cur.execute(query)
+                    window_sql, window_params = self.time_window_sql("ma.lastModified", riplib.osxripper_time.UNIX_EPOCH,
+                                                                     riplib.osxripper_time.MICROS)
+                    cur.execute(query + window_sql, window_params)
                     rows = cur.fetchall()
                     for row in rows:
-                        date_added = riplib.osxripper_time.get_unix_micros(row["dateAdded"])
-                        last_modified = riplib.osxripper_time.get_unix_micros(row["lastModified"])
-                        output_file.write("URL               : {0}\r\n".format(row["url"]))
-                        output_file.write("Content           : {0}\r\n".format(row["content"]))
-                        output_file.write("Name              : {0}\r\n".format(row["name"]))
-                        output_file.write("Date Added        : {0}\r\n".format(date_added))
-                        output_file.write("Date Last Modified: {0}\r\n".format(last_modified))
-                        output_file.write("\r\n")
+                        output_file.write_record((
+                            ("URL", row["url"]),
+                            ("Content", row["content"]),
+                            ("Name", row["name"]),
+                            ("Date Added", row["dateAdded_iso"]),
+                            ("Date Last Modified", row["lastModified_iso"]),
+                        ))
 
                     output_file.write("="*10 + " Mozilla Firefox Input History " + "="*10 + "\r\n")
                     query = "SELECT mp.url,mi.input,mi.use_count FROM moz_inputhistory mi,moz_places mp " \
@@ -117,10 +119,11 @@ class UsersMozillaFirefoxPlaces(Plugin):
                         output_file.write("No input history data.\r\n\r\n")
                     else:
                         for row in rows:
-                            output_file.write("URL      : {0}\r\n".format(row["url"]))
-                            output_file.write("Input    : {0}\r\n".format(row["input"]))
-                            output_file.write("Use Count: {0}\r\n".format(row["use_count"]))
-                            output_file.write("\r\n")
+                            output_file.write_record((
+                                ("URL", row["url"]),
+                                ("Input", row["input"]),
+                                ("Use Count", row["use_count"]),
+                            ))
 
             except sqlite3.Error as error:
                 logging.error("%s", error.args[0])
@@ -1,16 +1,47 @@
 """ Module to parse QuarantineEventsV2 database """
-import codecs
 # import datetime
 import logging
 import os
 import sqlite3
+import riplib.osxripper_carve
+import riplib.osxripper_sqlite
 import riplib.osxripper_time
+from riplib.osxripper_records import INT, TEXT, TIME, record_type
 from riplib.plugin import Plugin
 
 __author__ = 'osxripper'
 __version__ = '0.1'
 __license__ = 'GPLv3'
 
+_EVENT_FIELDS = (
+    ("event_identifier", "Event Identifier", TEXT),
+    ("timestamp", "Timestamp", TIME),
+    ("agent_bundle_identifier", "AgentBundle Identifier", TEXT),
+    ("agent_name", "Agent Name", TEXT),
+    ("data_url", "Data URL String", TEXT),
+    ("sender_name", "Sender Name", TEXT),
+    ("sender_address", "Sender Address", TEXT),
+    ("type_number", "Type Number", INT),
+    ("origin_title", "Origin Title", TEXT),
+    ("origin_url", "Origin URL String", TEXT),
+    ("origin_alias", "Origin Alias", TEXT),
+)
+_COLUMNS = ("LSQuarantineEventIdentifier", "LSQuarantineTimeStamp", "LSQuarantineAgentBundleIdentifier",
+            "LSQuarantineAgentName", "LSQuarantineDataURLString", "LSQuarantineSenderName",
+            "LSQuarantineSenderAddress", "LSQuarantineTypeNumber", "LSQuarantineOriginTitle",
+            "LSQuarantineOriginURLString", "LSQuarantineOriginAlias")
+
+QuarantineEventRecord = record_type("QuarantineEventRecord", (
+    ("user", None, TEXT),
+    ("source", None, TEXT),
+) + _EVENT_FIELDS)
+
+CarvedQuarantineEventRecord = record_type("CarvedQuarantineEventRecord", (
+    ("user", None, TEXT),
+    ("source", None, TEXT),
+    ("carved_from", "Carved From", TEXT),
+) + _EVENT_FIELDS)
+
 
 class UsersQuarantineEventsV2(Plugin):
     """
@@ -32,9 +63,27 @@ class UsersQuarantineEventsV2(Plugin):
         """
         Iterate over /Users directory and find user sub-directories
         """
+        for username, sqlite_db in self.__quarantine_dbs():
+            self.__parse_sqlite_db(sqlite_db, username)
+
+    def iter_records(self):
+        """
+        Yield a QuarantineEventRecord per event and a CarvedQuarantineEventRecord per deleted event of every user
+        """
+        if self._os_version not in ["big_sur", "catalina", "mojave", "high_sierra", "sierra", "el_capitan",
+                                    "yosemite", "mavericks", "mountain_lion", "lion", "snow_leopard"]:
+            logging.warning("Not a known OSX version.")
+            return
+        for username, sqlite_db in self.__quarantine_dbs():
+            yield from self.__records(sqlite_db, username)
+
+    def __quarantine_dbs(self):
+        """
+        Yield (username, quarantine database) for each user that has one
+        """
         users_path = os.path.join(self._input_dir, "Users")
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
             for username in user_list:
                 if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                     if self._os_version != "snow_leopard":
@@ -44,7 +93,7 @@ class UsersQuarantineEventsV2(Plugin):
                             .join(users_path, username, "Library", "Preferences",
                                   "com.apple.LaunchServices.QuarantineEvents")
                     if os.path.isfile(sqlite_db):
-                        self.__parse_sqlite_db(sqlite_db, username)
+                        yield username, sqlite_db
                     else:
                         logging.warning("%s does not exist.", sqlite_db)
                         print("[WARNING] {0} does not exist.".format(sqlite_db))
@@ -54,87 +103,21 @@ class UsersQuarantineEventsV2(Plugin):
 
     def __parse_sqlite_db(self, file, username):
         """
-        Read the com.apple.LaunchServices.QuarantineEventsV2 SQLite database
+        Write the records of the com.apple.LaunchServices.QuarantineEventsV2 SQLite database
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + "_Quarantine_Events.txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + "_Quarantine_Events.txt")) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             if self._os_version in ["big_sur", "catalina", "mojave", "high_sierra", "sierra", "el_capitan", "yosemite",
-                                    "mavericks", "mountain_lion", "lion"]:
-                query = "SELECT LSQuarantineEventIdentifier,LSQuarantineTimeStamp,LSQuarantineAgentBundleIdentifier," \
-                        "LSQuarantineAgentName,LSQuarantineDataURLString,LSQuarantineSenderName," \
-                        "LSQuarantineSenderAddress,LSQuarantineTypeNumber,LSQuarantineOriginTitle," \
-                        "LSQuarantineOriginURLString,LSQuarantineOriginAlias FROM LSQuarantineEvent"
+                                    "mavericks", "mountain_lion", "lion", "snow_leopard"]:
                 if os.path.isfile(file):
                     output_file.write("Source File: {0}\r\n\r\n".format(file))
-                    conn = None
-                    try:
-                        conn = sqlite3.connect(file)
-                        conn.row_factory = sqlite3.Row
-                        with conn:
-                            cur = conn.cursor()
-                            cur.execute(query)
-                            rows = cur.fetchall()
-                            for row in rows:
-                                timestamp = riplib.osxripper_time.get_cocoa_seconds(row["LSQuarantineTimeStamp"])
-                                output_file.write("Event Identifier      : {0}\r\n".format(row["LSQuarantineEventIdentifier"]))
-                                output_file.write("Timestamp             : {0}\r\n".format(timestamp))
-                                output_file.write("AgentBundle Identifier: {0}\r\n".format(row["LSQuarantineAgentBundleIdentifier"]))
-                                output_file.write("Agent Name            : {0}\r\n".format(row["LSQuarantineAgentName"]))
-                                output_file.write("Data URL String       : {0}\r\n".format(row["LSQuarantineDataURLString"]))
-                                output_file.write("Sender Name           : {0}\r\n".format(row["LSQuarantineSenderName"]))
-                                output_file.write("Sender Address        : {0}\r\n".format(row["LSQuarantineSenderAddress"]))
-                                output_file.write("Type Number           : {0}\r\n".format(row["LSQuarantineTypeNumber"]))
-                                output_file.write("Origin Title          : {0}\r\n".format(row["LSQuarantineOriginTitle"]))
-                                output_file.write("Origin URL String     : {0}\r\n".format(row["LSQuarantineOriginURLString"]))
-                                output_file.write("Origin Alias          : {0}\r\n".format(row["LSQuarantineOriginAlias"]))
-                                output_file.write("\r\n")
-
-                    except sqlite3.Error as error:
-                        logging.error("%s", error.args[0])
-                        print("[ERROR] {0}".format(error.args[0]))
-                    finally:
-                        if conn:
-                            conn.close()
-                else:
-                    logging.warning("File: %s does not exist or cannot be found.\r\n", file)
-                    output_file.write("[WARNING] File: {0} does not exist or cannot be found.\r\n".format(file))
-                    print("[WARNING] File: {0} does not exist or cannot be found.\r\n".format(file))
-            elif self._os_version == "snow_leopard":
-                query = "SELECT LSQuarantineEventIdentifier,LSQuarantineTimeStamp,LSQuarantineAgentBundleIdentifier," \
-                        "LSQuarantineAgentName,LSQuarantineDataURLString,LSQuarantineSenderName," \
-                        "LSQuarantineSenderAddress,LSQuarantineTypeNumber,LSQuarantineOriginTitle," \
-                        "LSQuarantineOriginURLString,LSQuarantineOriginAlias FROM LSQuarantineEvent"
-                if os.path.isfile(file):
-                    output_file.write("Source File: {0}\r\n\r\n".format(file))
-                    conn = None
-                    try:
-                        conn = sqlite3.connect(file)
-                        conn.row_factory = sqlite3.Row
-                        with conn:
-                            cur = conn.cursor()
-                            cur.execute(query)
-                            rows = cur.fetchall()
-                            for row in rows:
-                                timestamp = riplib.osxripper_time.get_cocoa_seconds(row["LSQuarantineTimeStamp"])
-                                output_file.write("Event Identifier      : {0}\r\n".format(row["LSQuarantineEventIdentifier"]))
-                                output_file.write("Timestamp             : {0}\r\n".format(timestamp))
-                                output_file.write("AgentBundle Identifier: {0}\r\n".format(row["LSQuarantineAgentBundleIdentifier"]))
-                                output_file.write("Agent Name            : {0}\r\n".format(row["LSQuarantineAgentName"]))
-                                output_file.write("Data URL String       : {0}\r\n".format(row["LSQuarantineDataURLString"]))
-                                output_file.write("Sender Name           : {0}\r\n".format(row["LSQuarantineSenderName"]))
-                                output_file.write("Sender Address        : {0}\r\n".format(row["LSQuarantineSenderAddress"]))
-                                output_file.write("Type Number           : {0}\r\n".format(row["LSQuarantineTypeNumber"]))
-                                output_file.write("Origin Title          : {0}\r\n".format(row["LSQuarantineOriginTitle"]))
-                                output_file.write("Origin URL String     : {0}\r\n".format(row["LSQuarantineOriginURLString"]))
-                                output_file.write("Origin Alias          : {0}\r\n".format(row["LSQuarantineOriginAlias"]))
-                                output_file.write("\r\n")
-
-                    except sqlite3.Error as error:
-                        logging.error("%s", error.args[0])
-                        print("[ERROR] {0}".format(error.args[0]))
-                    finally:
-                        if conn:
-                            conn.close()
+                    carved_heading = False
+                    for record in self.__records(file, username):
+                        if isinstance(record, CarvedQuarantineEventRecord) and not carved_heading:
+                            output_file.write("="*10 + " Carved Records (deleted, recovered from free space) "
+                                              + "="*10 + "\r\n")
+                            carved_heading = True
+                        output_file.write_record(record)
                 else:
                     logging.warning("File: %s does not exist or cannot be found.\r\n", file)
                     output_file.write("[WARNING] File: {0} does not exist or cannot be found.\r\n".format(file))
@@ -144,3 +127,50 @@ class UsersQuarantineEventsV2(Plugin):
                 print("[WARNING] Not a known OSX version.")
             output_file.write("="*40 + "\r\n\r\n")
         output_file.close()
+
+    def __records(self, file, username):
+        """
+        Yield the events of the quarantine database followed by the deleted events carved from its free pages
+        """
+        window_sql, window_params = self.time_window_sql("LSQuarantineTimeStamp",
+                                                         riplib.osxripper_time.COCOA_EPOCH, prefix=" WHERE ")
+        query = "SELECT " + ",".join(_COLUMNS) + " FROM LSQuarantineEvent" + window_sql
+        conn = None
+        try:
+            conn = riplib.osxripper_sqlite.connect(file)
+            with conn:
+                cur = conn.cursor()
+                cur.execute(query, window_params)
+                for row in cur:
+                    values = [row[column] for column in _COLUMNS]
+                    values[1] = riplib.osxripper_time.get_cocoa_seconds(values[1])
+                    yield QuarantineEventRecord(username, file, *values)
+                yield from self.__carved_records(file, conn, username)
+        except sqlite3.Error as error:
+            logging.error("%s", error.args[0])
+            print("[ERROR] {0}".format(error.args[0]))
+        finally:
+            if conn:
+                conn.close()
+
+    def __carved_records(self, file, conn, username):
+        """
+        Yield the deleted LSQuarantineEvent rows carved from the free pages of the database, of
+        the newest committed WAL state read by conn when it has a -wal, streamed
+        """
+        try:
+            columns, carved = riplib.osxripper_carve.carve_table(file, conn, "LSQuarantineEvent")
+        except (OSError, riplib.osxripper_carve.CarveError) as error:
+            logging.error("%s", error)
+            print("[ERROR] {0}".format(error))
+            return
+        for carved_record in carved:
+            row = dict(zip(columns, carved_record.values))
+            values = [row.get(column) for column in _COLUMNS]
+            values[1] = riplib.osxripper_time.get_cocoa_seconds(values[1])
+            if not self.in_time_window(values[1]):
+                continue
+            yield CarvedQuarantineEventRecord(
+                username, file,
+                "{0} page {1} offset {2}".format(carved_record.source, carved_record.page, carved_record.offset),
+                *values)
@@ -1,5 +1,4 @@
 """ Module to extract Recent Application information """
-import codecs
 import logging
 import os
 import riplib.ccl_bplist
@@ -34,7 +33,7 @@ class UsersRecentApplications(Plugin):
         """
         users_path = os.path.join(self._input_dir, "Users")
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
             for username in user_list:
                 if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                     plist = os.path.join(users_path, username, "Library", "Application Support", "com.apple.sharedfilelist", self._data_file)
@@ -51,7 +50,7 @@ class UsersRecentApplications(Plugin):
         """
         Parse com.apple.LSSharedFileList.RecentApplications.sfl
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + self._output_file), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + self._output_file)) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             output_file.write("Source File: {0}\r\n\r\n".format(file))
             if self._os_version in ["big_sur", "catalina", "mojave", "high_sierra"]:
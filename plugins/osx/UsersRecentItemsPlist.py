@@ -1,5 +1,4 @@
 """ Module to extract information from recentitems plist """
-import codecs
 import logging
 import os
 import riplib.ccl_bplist
@@ -33,7 +32,7 @@ class UsersRecentItemsPlist(Plugin):
         """
         users_path = os.path.join(self._input_dir, "Users")
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
             for username in user_list:
                 if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                     # if self._os_version in ["big_sur", "catalina", "mojave", "high_sierra"]:
@@ -60,7 +59,7 @@ class UsersRecentItemsPlist(Plugin):
         Parse /Users/username/Library/Preferences/com.apple.recentitems.plist or in El Capitan
         /Users/<username>/Library/Application Support/com.apple.sharedfilelist/com.apple.LSSharedFileList.RecentHosts.sfl
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + ".txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + ".txt")) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             if self._os_version in ["high_sierra", "sierra", "el_capitan"]:
                 if os.path.isfile(file):
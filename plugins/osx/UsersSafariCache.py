@@ -1,8 +1,8 @@
 """ Module to parse Safari cache database """
-import codecs
 import logging
 import os
 import sqlite3
+import riplib.osxripper_sqlite
 from riplib.plugin import Plugin
 
 
@@ -35,7 +35,7 @@ class UsersSafariCache(Plugin):
         """
         users_path = os.path.join(self._input_dir, "Users")
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
             for username in user_list:
                 sqlite_db = None
                 if self._os_version in ["mojave", "catalina"]:
@@ -57,7 +57,7 @@ class UsersSafariCache(Plugin):
         """
         Read the WebpageIcons.db SQLite database
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + "_Safari_Cache.txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + "_Safari_Cache.txt")) as output_file:
             output_file.write("=" * 10 + " " + self._name + " " + "=" * 10 + "\r\n")
             # if self._os_version in ["big_sur", "mojave", "catalina"]:
             if self._os_version in ["mojave", "catalina"]:
@@ -103,8 +103,7 @@ class ParseVers1013108():
         conn = None
         query = "SELECT request_key, partition, time_stamp FROM cfurl_cache_response"
         try:
-            conn = sqlite3.connect(self._data_file)
-            conn.row_factory = sqlite3.Row
+            conn = riplib.osxripper_sqlite.connect(self._data_file)
             with conn:
                 cur = conn.cursor()
                 cur.execute(query)
@@ -137,8 +136,7 @@ class ParseVers107106():
         query = "SELECT request_key, time_stamp FROM cfurl_cache_response"
         conn = None
         try:
-            conn = sqlite3.connect(self._data_file)
-            conn.row_factory = sqlite3.Row
+            conn = riplib.osxripper_sqlite.connect(self._data_file)
             with conn:
                 cur = conn.cursor()
                 cur.execute(query)
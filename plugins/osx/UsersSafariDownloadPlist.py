@@ -1,5 +1,4 @@
 """ Module tp parse Downloads plist """
-import codecs
 import logging
 import os
 import plistlib
@@ -34,7 +33,7 @@ class UsersSafariDownloadPlist(Plugin):
         """
         users_path = os.path.join(self._input_dir, "Users")
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
             for username in user_list:
                 if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                     plist = os.path.join(users_path, username, "Library", "Safari", self._data_file)
@@ -51,7 +50,7 @@ class UsersSafariDownloadPlist(Plugin):
         """
         Parse /Users/username/Library/Safari/Downloads.plist
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + "_Safari_Downloads.txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + "_Safari_Downloads.txt")) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             output_file.write("Source File: {0}\r\n\r\n".format(file))
             if self._os_version in ["big_sur", "catalina", "mojave"]:
@@ -1,11 +1,12 @@
 """ Module to parse Safari History plist """
-import codecs
 import datetime
 import logging
 import os
 import sqlite3
 import riplib.ccl_bplist
+import riplib.osxripper_sqlite
 import riplib.osxripper_time
+from riplib.osxripper_records import INT, TEXT, TIME, record_type
 from riplib.plugin import Plugin
 
 
@@ -13,6 +14,18 @@ __author__ = 'osxripper'
 __version__ = '0.1'
 __license__ = 'GPLv3'
 
+HistoryVisitRecord = record_type("HistoryVisitRecord", (
+    ("user", None, TEXT),
+    ("source", None, TEXT),
+    ("id", "ID", INT),
+    ("url", "URL", TEXT),
+    ("visit_count", "Visit Count", INT),
+    ("visit_time", "Visit Time", TIME),
+    ("title", "Title", TEXT),
+    ("redirect_source", "Redirect ID", INT),
+    ("redirect_destination", "Redirect Dest. ID", INT),
+))
+
 
 class UsersSafariHistory(Plugin):
     """
@@ -34,22 +47,40 @@ class UsersSafariHistory(Plugin):
         """
         Iterate over /Users directory and find user sub-directories
         """
+        for username, history_path in self.__history_paths():
+            if self._os_version in ["big_sur", "catalina", "mojave", "high_sierra", "sierra", "el_capitan", "yosemite"]:
+                self.__parse_sqlite_db(history_path, username)
+            elif self._os_version in ["mavericks", "mountain_lion", "lion", "snow_leopard"]:
+                self.__parse_history_plist(history_path, username)
+            else:
+                logging.warning("Not a known OSX version.")
+                print("[WARNING] Not a known OSX version.")
+
+    def iter_records(self):
+        """
+        Yield a HistoryVisitRecord per visit in the History.db of every user
+        """
+        if self._os_version not in ["big_sur", "catalina", "mojave", "high_sierra", "sierra", "el_capitan", "yosemite"]:
+            return
+        for username, history_path in self.__history_paths():
+            history_db = os.path.join(history_path, "History.db")
+            if os.path.isfile(history_db):
+                yield from self.__records(history_db, username)
+            else:
+                logging.warning("File: %s does not exist or cannot be found.", history_db)
+
+    def __history_paths(self):
+        """
+        Yield (username, Safari directory) for each user that has one
+        """
         users_path = os.path.join(self._input_dir, "Users")
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
             for username in user_list:
                 if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                     history_path = os.path.join(users_path, username, "Library", "Safari")
                     if os.path.isdir(history_path):
-                        if self._os_version in ["big_sur", "catalina"]:
-                            self._parse_sqlite_db2(history_path, username)
-                        if self._os_version in ["mojave", "high_sierra", "sierra", "el_capitan", "yosemite"]:
-                            self.__parse_sqlite_db(history_path, username)
-                        elif self._os_version in ["mavericks", "mountain_lion", "lion", "snow_leopard"]:
-                            self.__parse_history_plist(history_path, username)
-                        else:
-                            logging.warning("Not a known OSX version.")
-                            print("[WARNING] Not a known OSX version.")
+                        yield username, history_path
                     else:
                         logging.warning("%s does not exist.", history_path)
                         print("[WARNING] {0} does not exist.".format(history_path))
@@ -57,87 +88,17 @@ class UsersSafariHistory(Plugin):
             logging.warning("%s does not exist.", users_path)
             print("[WARNING] {0} does not exist.".format(users_path))
 
-    def _parse_sqlite_db2(self, file, username):
-        """
-        Read the History.db SQLite database
-        """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + "_Safari_History.txt"), "a", encoding="utf-8") as output_file:
-            output_file.write("=" * 10 + " " + self._name + " " + "=" * 10 + "\r\n")
-            history_db = os.path.join(file, "History.db")
-            query = "SELECT hi.id,hi.url,hi.visit_count,hv.visit_time," \
-                    "hv.title,hv.redirect_source,hv.redirect_destination " \
-                    "FROM history_items hi,history_visits hv" \
-                    " WHERE hi.id = hv.history_item"
-            if os.path.isfile(history_db):
-                output_file.write("Source File: {0}\r\n\r\n".format(history_db))
-                conn = None
-                try:
-                    conn = sqlite3.connect(history_db)
-                    conn.row_factory = sqlite3.Row
-                    with conn:
-                        cur = conn.cursor()
-                        cur.execute(query)
-                        rows = cur.fetchall()
-                        for row in rows:
-                            visit_time = riplib.osxripper_time.get_cocoa_seconds(row["visit_time"])
-                            output_file.write("ID               : {0}\r\n".format(row["id"]))
-                            output_file.write("URL              : {0}\r\n".format(row["url"]))
-                            output_file.write("Visit Count      : {0}\r\n".format(row["visit_count"]))
-                            output_file.write("Visit Time       : {0}\r\n".format(visit_time))
-                            output_file.write("Title            : {0}\r\n".format(row["title"]))
-                            output_file.write("Redirect ID      : {0}\r\n".format(row["redirect_source"]))
-                            output_file.write("Redirect Dest. ID: {0}\r\n".format(row["redirect_destination"]))
-                            output_file.write("\r\n")
-                except sqlite3.Error as error:
-                    logging.error("%s", error.args[0])
-                    print("[ERROR] {0}".format(error.args[0]))
-                finally:
-                    if conn:
-                        conn.close()
-            else:
-                logging.warning("File: %s does not exist or cannot be found.\r\n", file)
-                output_file.write("[WARNING] File: {0} does not exist or cannot be found.\r\n".format(file))
-                print("[WARNING] File: {0} does not exist or cannot be found.\r\n".format(file))
-            output_file.write("=" * 40 + "\r\n\r\n")
-        output_file.close()
-
     def __parse_sqlite_db(self, file, username):
         """
-        Read the History.db SQLite database
+        Write the records of the History.db SQLite database
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + "_Safari_History.txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + "_Safari_History.txt")) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             history_db = os.path.join(file, "History.db")
-            query = "SELECT hi.id,hi.url,hi.visit_count,hv.visit_time," \
-                    "hv.title,hv.redirect_source,hv.redirect_destination " \
-                    "FROM history_items hi,history_visits hv" \
-                    " WHERE hi.id = hv.id"
             if os.path.isfile(history_db):
                 output_file.write("Source File: {0}\r\n\r\n".format(history_db))
-                conn = None
-                try:
-                    conn = sqlite3.connect(history_db)
-                    conn.row_factory = sqlite3.Row
-                    with conn:
-                        cur = conn.cursor()
-                        cur.execute(query)
-                        rows = cur.fetchall()
-                        for row in rows:
-                            visit_time = riplib.osxripper_time.get_cocoa_seconds(row["visit_time"])
-                            output_file.write("ID               : {0}\r\n".format(row["id"]))
-                            output_file.write("URL              : {0}\r\n".format(row["url"]))
-                            output_file.write("Visit Count      : {0}\r\n".format(row["visit_count"]))
-                            output_file.write("Visit Time       : {0}\r\n".format(visit_time))
-                            output_file.write("Title            : {0}\r\n".format(row["title"]))
-                            output_file.write("Redirect ID      : {0}\r\n".format(row["redirect_source"]))
-                            output_file.write("Redirect Dest. ID: {0}\r\n".format(row["redirect_destination"]))
-                            output_file.write("\r\n")
-                except sqlite3.Error as error:
-                    logging.error("%s", error.args[0])
-                    print("[ERROR] {0}".format(error.args[0]))
-                finally:
-                    if conn:
-                        conn.close()
+                for record in self.__records(history_db, username):
+                    output_file.write_record(record)
             else:
                 logging.warning("File: %s does not exist or cannot be found.\r\n", file)
                 output_file.write("[WARNING] File: {0} does not exist or cannot be found.\r\n".format(file))
@@ -145,12 +106,43 @@ class UsersSafariHistory(Plugin):
             output_file.write("="*40 + "\r\n\r\n")
         output_file.close()
 
+    def __records(self, history_db, username):
+        """
+        Yield the visits of the History.db SQLite database. Catalina and later join visits to
+        items on history_item, earlier versions on id.
+        """
+        if self._os_version in ["big_sur", "catalina"]:
+            join_column = "hv.history_item"
+        else:
+            join_column = "hv.id"
+        window_sql, window_params = self.time_window_sql("hv.visit_time", riplib.osxripper_time.COCOA_EPOCH)
+        query = "SELECT hi.id,hi.url,hi.visit_count,cocoa_to_iso(hv.visit_time) AS visit_time_iso," \
+                "hv.title,hv.redirect_source,hv.redirect_destination " \
+                "FROM history_items hi,history_visits hv" \
+                " WHERE hi.id = " + join_column + window_sql
+        conn = None
+        try:
+            conn = riplib.osxripper_sqlite.connect(history_db)
+            with conn:
+                cur = conn.cursor()
+                cur.execute(query, window_params)
+                for row in cur:
+                    yield HistoryVisitRecord(username, history_db, row["id"], row["url"], row["visit_count"],
+                                             row["visit_time_iso"], row["title"], row["redirect_source"],
+                                             row["redirect_destination"])
+        except sqlite3.Error as error:
+            logging.error("%s", error.args[0])
+            print("[ERROR] {0}".format(error.args[0]))
+        finally:
+            if conn:
+                conn.close()
+
     def __parse_history_plist(self, file, username):
         """
         Read the History.plist
         """
         mac_absolute = datetime.datetime(2001, 1, 1, 0, 0, 0)
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + "_Safari_History.txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + "_Safari_History.txt")) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             history_plist = os.path.join(file, "History.plist")
             if os.path.isfile(history_plist):
@@ -1,5 +1,4 @@
 """ Module to parse Sarafi .webhistory files """
-import codecs
 import logging
 import os
 import riplib.ccl_bplist
@@ -34,7 +33,7 @@ class UsersSafariMetadataHistory(Plugin):
         """
         users_path = os.path.join(self._input_dir, "Users")
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
             for username in user_list:
                 if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                     plist_dir = os.path.join(users_path, username, "Library", "Caches", "Metadata", "Safari", "History")
@@ -51,7 +50,7 @@ class UsersSafariMetadataHistory(Plugin):
         """
         Parse /Users/username/Library/Caches/Metadata/Safari/History/.tracked filenames.plist and list the *.webhistory files
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + "_Safari_Metadata_History.txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + "_Safari_Metadata_History.txt")) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             output_file.write("Source Directory: {0}\r\n\r\n".format(file))
             if self.set_os_version in ["big_sur", "catalina", "mojave", "high_sierra"]:
@@ -59,7 +58,7 @@ class UsersSafariMetadataHistory(Plugin):
                 output_file.write("[INFO] File: .tracked files not in this version.\r\n")
                 print("[INFO] File: .tracked files not in this version.")
             elif  self._os_version in ["sierra", "el_capitan", "yosemite", "mavericks", "mountain_lion"]:
-                plist_dir_list = os.listdir(file)
+                plist_dir_list = self.list_dir(file)
                 if ".tracked filenames.plist" in plist_dir_list:
                     bplist = open(os.path.join(file, ".tracked filenames.plist"), "rb")
                     plist = riplib.ccl_bplist.load(bplist)
@@ -82,7 +81,7 @@ class UsersSafariMetadataHistory(Plugin):
                         output_file.write("{0}\r\n".format(wh_file))
 
             elif self._os_version in ["lion", "snow_leopard"]:
-                plist_dir_list = os.listdir(file)
+                plist_dir_list = self.list_dir(file)
                 output_file.write("Web History Files:\r\n\r\n")
                 for wh_file in plist_dir_list:
                     if wh_file.endswith(".webhistory"):
@@ -1,5 +1,4 @@
 """ Module to parse Safari webbookmarks """
-import codecs
 import logging
 import os
 import riplib.ccl_bplist
@@ -33,7 +32,7 @@ class UsersSafariWebBookmarks(Plugin):
         """
         users_path = os.path.join(self._input_dir, "Users")
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
             for username in user_list:
                 if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                     plist_dir = os.path\
@@ -51,7 +50,7 @@ class UsersSafariWebBookmarks(Plugin):
         """
         Parse /Users/username/Library/Caches/Metadata/Safari/Bookmarks/*.webbookmark
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + "_Safari_Web_Bookmarks.txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + "_Safari_Web_Bookmarks.txt")) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             output_file.write("Source Directory: {0}\r\n\r\n".format(file))
             if self.set_os_version in ["big_sur", "catalina", "mojave"]:
@@ -62,7 +61,7 @@ class UsersSafariWebBookmarks(Plugin):
                 output_file.write("[INFO] File: Bookmarks files not in this version.\r\n")
                 print("[INFO] File: Bookmarks files not in this version.")
             elif self._os_version in ["sierra", "el_capitan", "yosemite", "mavericks", "mountain_lion", "lion", "snow_leopard"]:
-                plist_dir_list = os.listdir(file)
+                plist_dir_list = self.list_dir(file)
                 for wb_file in plist_dir_list:
                     wb_plist = os.path.join(file, wb_file)
                     output_file.write("Bookmark Plist: {0}\r\n".format(wb_plist))
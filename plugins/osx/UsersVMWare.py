@@ -32,7 +32,7 @@ class UsersVMWare(Plugin):
         """
         users_path = os.path.join(self._input_dir, "Users")
         if os.path.isdir(users_path):
-            user_list = os.listdir(users_path)
+            user_list = self.list_dir(users_path)
             for username in user_list:
                 if os.path.isdir(os.path.join(users_path, username)) and not username == "Shared":
                     inventory = os.path.join(users_path, username, "Library", "Application Support", "VMware Fusion", self._data_file)
@@ -49,7 +49,7 @@ class UsersVMWare(Plugin):
         /Users/{username}/Library/Application Support/VMware Fusion/vmInventory file
         N.B. OSX version checking removed as this is a common directory and file across versions
         """
-        with codecs.open(os.path.join(self._output_dir, "Users_" + username + "_VMware_inventory.txt"), "a", encoding="utf-8") as output_file:
+        with self.open_output(os.path.join(self._output_dir, "Users_" + username + "_VMware_inventory.txt")) as output_file:
             output_file.write("="*10 + " " + self._name + " " + "="*10 + "\r\n")
             output_file.write("Source File: {0}\r\n\r\n".format(file))
             if os.path.isfile(file):
@@ -1,5 +1,10 @@
 """ Module for base Plugin classes """
 # import pprint
+import datetime
+import os
+import re
+import riplib.osxripper_output
+import riplib.osxripper_time
 
 __author__ = 'osxripper'
 __version__ = '0.2'
@@ -89,6 +94,16 @@ class Plugin(PluginDescription):
         self._output_dir = None
         self._output_file = None
         self._data_file = None
+        self._since = None
+        self._until = None
+        self._deterministic = False
+        self._compression = None
+        self._compression_level = riplib.osxripper_output.DEFAULT_LEVEL
+        self._index = False
+        self._syslog_processes = None
+        self._syslog_pattern = None
+        self._fsevents_prefixes = None
+        self._record_sink = None
 
     # def __call__(self):
     #     return self
@@ -121,6 +136,70 @@ class Plugin(PluginDescription):
         """
         return self._data_file
 
+    @property
+    def get_since(self):
+        """
+        Return the start of the time window, None if not set
+        """
+        return self._since
+
+    @property
+    def get_until(self):
+        """
+        Return the end of the time window, None if not set
+        """
+        return self._until
+
+    @property
+    def get_deterministic(self):
+        """
+        Return True if directory listings are sorted for reproducible output
+        """
+        return self._deterministic
+
+    @property
+    def get_compression(self):
+        """
+        Return the compression method of the output files, None for plain text
+        """
+        return self._compression
+
+    @property
+    def get_compression_level(self):
+        """
+        Return the compression level of the output files
+        """
+        return self._compression_level
+
+    @property
+    def get_index(self):
+        """
+        Return True if the output files get a sidecar offset index
+        """
+        return self._index
+
+    @property
+    def get_syslog_processes(self):
+        """
+        Return the process names syslog lines are kept for, None for every process
+        """
+        return self._syslog_processes
+
+    @property
+    def get_syslog_pattern(self):
+        """
+        Return the compiled pattern syslog messages must match, None if not set
+        """
+        return self._syslog_pattern
+
+    @property
+    def get_fsevents_prefixes(self):
+        """
+        Return the path prefixes fseventsd records are kept for, without leading or trailing "/",
+        None for every path
+        """
+        return self._fsevents_prefixes
+
     def set_input_directory(self, file):
         """
         Set the input directory for the plugin
@@ -145,11 +224,153 @@ class Plugin(PluginDescription):
         """
         self._data_file = data_file
 
+    def set_since(self, since):
+        """
+        Set the start of the time window (UTC datetime), records before it are skipped
+        """
+        self._since = since
+
+    def set_until(self, until):
+        """
+        Set the end of the time window (UTC datetime), records after it are skipped
+        """
+        self._until = until
+
+    def set_deterministic(self, deterministic):
+        """
+        Sort directory listings so repeated runs over an image write identical output
+        """
+        self._deterministic = deterministic
+
+    def set_compression(self, method, level=None):
+        """
+        Compress the output files with method, one of riplib.osxripper_output.COMPRESSORS or
+        None for plain text, at level (1-9, default riplib.osxripper_output.DEFAULT_LEVEL)
+        """
+        if method is not None and method not in riplib.osxripper_output.COMPRESSORS:
+            raise ValueError("unknown compression method: {0}".format(method))
+        self._compression = method
+        self._compression_level = riplib.osxripper_output.DEFAULT_LEVEL if level is None else level
+
+    def set_index(self, index):
+        """
+        Write a sidecar offset index, see osxripper_seek.py, with every uncompressed output file
+        """
+        self._index = index
+
+    def set_syslog_filter(self, processes=None, pattern=None):
+        """
+        Keep only the syslog lines of the named processes and, with pattern (a regular expression
+        string or compiled pattern), only those whose message it matches
+        """
+        self._syslog_processes = frozenset(processes) if processes else None
+        self._syslog_pattern = re.compile(pattern) if pattern else None
+
+    def set_fsevents_prefixes(self, prefixes=None):
+        """
+        Keep only the fseventsd records whose path is one of prefixes or lies below one
+        """
+        self._fsevents_prefixes = tuple(prefix.strip("/") for prefix in prefixes) if prefixes else None
+
+    def list_dir(self, path):
+        """
+        Return os.listdir(path), sorted in deterministic mode
+        """
+        entries = os.listdir(path)
+        if self._deterministic:
+            entries.sort()
+        return entries
+
+    def walk_dir(self, top):
+        """
+        Return os.walk(top), visiting sub-directories and listing files in sorted order in deterministic mode
+        """
+        for root, dirs, files in os.walk(top):
+            if self._deterministic:
+                dirs.sort()
+                files.sort()
+            yield root, dirs, files
+
+    def open_output(self, path):
+        """
+        Open an output file to append to, use in place of codecs.open(path, "a", encoding="utf-8"),
+        compressed as set by set_compression and indexed as set by set_index
+        """
+        output_file = riplib.osxripper_output.open_output(path, owner=self, compression=self._compression,
+                                                          level=self._compression_level, index=self._index)
+        output_file.record_sink = self._record_sink
+        return output_file
+
+    def set_record_sink(self, record_sink):
+        """
+        Pass every typed record parse() writes, and every record given to emit_record, to the
+        callable record_sink from now on, None to stop
+        """
+        self._record_sink = record_sink
+
+    def emit_record(self, record):
+        """
+        Pass a record that parse() does not write as a record, such as a line of a log copied
+        as it is, to the record sink if one is set
+        """
+        if self._record_sink is not None:
+            self._record_sink(record)
+
+    def in_time_window(self, date_time):
+        """
+        Return True if date_time (UTC datetime) is inside the --since/--until window.
+        Values that are not datetimes are kept.
+        """
+        if not isinstance(date_time, datetime.datetime):
+            return True
+        if self._since is not None and date_time < self._since:
+            return False
+        if self._until is not None and date_time > self._until:
+            return False
+        return True
+
+    def time_window_sql(self, column, epoch, unit=riplib.osxripper_time.SECONDS, prefix=" AND "):
+        """
+        Return (sql, params) restricting column, holding raw values counted in unit from
+        epoch, to the --since/--until window so the filter runs inside SQLite.
+        sql is an empty string when no window is set, otherwise it starts with prefix.
+        """
+        conditions = []
+        params = []
+        if self._since is not None:
+            conditions.append("{0} >= ?".format(column))
+            params.append(riplib.osxripper_time.from_datetime(self._since, epoch, unit))
+        if self._until is not None:
+            conditions.append("{0} < ?".format(column))
+            params.append(riplib.osxripper_time.until_bound(self._until, epoch, unit))
+        if not conditions:
+            return "", params
+        return prefix + " AND ".join(conditions), params
+
     def parse(self):
         """
         Public function called to parse the data file set in __init__, override as necessary
         """
 
+    def iter_records(self):
+        """
+        Yield the parsed data as typed records (see riplib.osxripper_records) without writing
+        anything, override in plugins that separate extraction from formatting
+        """
+        return iter(())
+
+    @property
+    def has_records(self):
+        """
+        Return True if the plugin overrides iter_records
+        """
+        return type(self).iter_records is not Plugin.iter_records
+
+    # parse() writes, or emits, every record iter_records yields, so a sink that keeps the text
+    # reports can be fed from parse() instead of walking the records twice; set to False in
+    # plugins whose text report is built some other way
+    text_writes_records = True
+
 
     # @staticmethod
     # def pprint(data):
@@ -0,0 +1,353 @@
+""" Module for carving deleted records from SQLite freelist pages and unallocated space """
+import mmap
+import os
+import struct
+
+__author__ = 'osxripper'
+__version__ = '0.1'
+__license__ = 'GPLv3'
+
+SQLITE_MAGIC = b"SQLite format 3\x00"
+TABLE_LEAF = 0x0d
+
+# value kinds a record column may hold
+NULL = "null"
+INT = "int"
+FLOAT = "float"
+TEXT = "text"
+BLOB = "blob"
+
+_ENCODINGS = {1: "utf-8", 2: "utf-16-le", 3: "utf-16-be"}
+_INT_SIZES = {1: 1, 2: 2, 3: 3, 4: 4, 5: 6, 6: 8}
+
+
+class CarveError(Exception):
+    """
+    Raised when a file is not a usable SQLite database
+    """
+
+
+class CarvedRecord():
+    """
+    A record recovered from free space. source is "freelist", "freeblock" or "unallocated",
+    rowid is None unless the cell header survived.
+    """
+    __slots__ = ("page", "offset", "source", "rowid", "values")
+
+    def __init__(self, page, offset, source, rowid, values):
+        self.page = page
+        self.offset = offset
+        self.source = source
+        self.rowid = rowid
+        self.values = values
+
+    def __repr__(self):
+        return "CarvedRecord(page=%d, offset=%d, %s, rowid=%s, %r)" \
+               % (self.page, self.offset, self.source, self.rowid, self.values)
+
+
+def column_kinds(declared_type):
+    """
+    Return the value kinds a column may hold, following SQLite's type affinity rules
+    """
+    declared_type = (declared_type or "").upper()
+    if "INT" in declared_type:
+        return frozenset((NULL, INT, FLOAT))
+    if "CHAR" in declared_type or "CLOB" in declared_type or "TEXT" in declared_type:
+        return frozenset((NULL, TEXT))
+    if "BLOB" in declared_type or declared_type == "":
+        return frozenset((NULL, INT, FLOAT, TEXT, BLOB))
+    if "REAL" in declared_type or "FLOA" in declared_type or "DOUB" in declared_type:
+        return frozenset((NULL, INT, FLOAT))
+    return frozenset((NULL, INT, FLOAT, TEXT))
+
+
+def table_layout(conn, table_name):
+    """
+    Return [(column name, kinds)] for a table of an open database. An INTEGER PRIMARY KEY
+    column is an alias of the rowid and is stored as NULL in the record.
+    """
+    columns = conn.execute("PRAGMA table_info(\"{0}\")".format(table_name.replace("\"", "\"\""))).fetchall()
+    primary_keys = [column for column in columns if column[5]]
+    layout = []
+    for column in columns:
+        if len(primary_keys) == 1 and column[5] and (column[2] or "").upper() == "INTEGER":
+            layout.append((column[1], frozenset((NULL,))))
+        else:
+            layout.append((column[1], column_kinds(column[2])))
+    return layout
+
+
+def _varint(data, offset, end):
+    """
+    Decode an SQLite varint, return (value, next offset) or (None, offset) if it runs past end
+    """
+    value = 0
+    for i in range(9):
+        if offset + i >= end:
+            return None, offset
+        byte = data[offset + i]
+        if i == 8:
+            return (value << 8) | byte, offset + 9
+        value = (value << 7) | (byte & 0x7f)
+        if byte < 0x80:
+            return value, offset + i + 1
+    return None, offset
+
+
+def _serial_size(serial_type):
+    """
+    Return (kind, content size) for a record serial type, None for the reserved types
+    """
+    if serial_type == 0:
+        return NULL, 0
+    if serial_type in _INT_SIZES:
+        return INT, _INT_SIZES[serial_type]
+    if serial_type == 7:
+        return FLOAT, 8
+    if serial_type in (8, 9):
+        return INT, 0
+    if serial_type >= 12:
+        if serial_type & 1:
+            return TEXT, (serial_type - 13) >> 1
+        return BLOB, (serial_type - 12) >> 1
+    return None
+
+
+class SqliteCarver():
+    """
+    Carve records matching a table layout from an SQLite database without opening it with
+    SQLite. The file is mmapped and every page visited once, so run time grows linearly
+    with the database size.
+    """
+
+    def __init__(self, database_file, layout):
+        self._path = database_file
+        self._layout = [kinds for _, kinds in layout]
+        self.column_names = [name for name, _ in layout]
+        self._columns = len(layout)
+        self._rowid_column = None
+        for index, kinds in enumerate(self._layout):
+            if kinds == frozenset((NULL,)):
+                self._rowid_column = index
+        self._file = open(database_file, "rb")
+        self._map = None
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size < 100:
+                raise CarveError("{0} is too small to be an SQLite database".format(database_file))
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._map[0:16] != SQLITE_MAGIC:
+                raise CarveError("{0} is not an SQLite database".format(database_file))
+            self.page_size = struct.unpack_from(">H", self._map, 16)[0]
+            if self.page_size == 1:
+                self.page_size = 65536
+            self._usable = self.page_size - self._map[20]
+            self.page_count = size // self.page_size
+            self._encoding = _ENCODINGS.get(struct.unpack_from(">I", self._map, 56)[0], "utf-8")
+            self._first_trunk, self._free_count = struct.unpack_from(">II", self._map, 32)
+        except Exception:
+            self.close()
+            raise
+
+    def freelist_pages(self):
+        """
+        Walk the freelist trunk chain and return the set of trunk and leaf page numbers
+        """
+        free_pages = set()
+        trunk = self._first_trunk
+        while 0 < trunk <= self.page_count and trunk not in free_pages:
+            free_pages.add(trunk)
+            base = (trunk - 1) * self.page_size
+            next_trunk, leaf_count = struct.unpack_from(">II", self._map, base)
+            leaf_count = min(leaf_count, (self._usable - 8) // 4)
+            for leaf in struct.unpack_from(">%dI" % leaf_count, self._map, base + 8):
+                if 0 < leaf <= self.page_count:
+                    free_pages.add(leaf)
+            trunk = next_trunk
+        return free_pages
+
+    def carve(self):
+        """
+        Yield CarvedRecord objects from freelist pages and from the unallocated space and
+        freeblocks of live table leaf pages, in page order
+        """
+        free_pages = self.freelist_pages()
+        for page_number in range(1, self.page_count + 1):
+            base = (page_number - 1) * self.page_size
+            header = base + 100 if page_number == 1 else base
+            if page_number in free_pages:
+                if self._map[header] == TABLE_LEAF:
+                    # a leaf page released to the freelist keeps its old cells
+                    yield from self._leaf_cells(page_number, base, header, "freelist")
+                    yield from self._leaf_free_space(page_number, base, header, "freelist")
+                else:
+                    yield from self._scan(page_number, base, base + 8, base + self._usable, "freelist")
+            elif self._map[header] == TABLE_LEAF:
+                yield from self._leaf_free_space(page_number, base, header, None)
+
+    def _leaf_cells(self, page_number, base, header, source):
+        """
+        Parse the cells still listed in a stale leaf page header
+        """
+        cell_count = struct.unpack_from(">H", self._map, header + 3)[0]
+        end = base + self._usable
+        if header + 8 + 2 * cell_count > end:
+            return
+        for pointer in struct.unpack_from(">%dH" % cell_count, self._map, header + 8):
+            if pointer == 0 or base + pointer >= end:
+                continue
+            payload_length, offset = _varint(self._map, base + pointer, end)
+            rowid, offset = _varint(self._map, offset, end)
+            if payload_length is None or rowid is None or offset + payload_length > end:
+                continue
+            values = self._record(offset, offset + payload_length)
+            if values is not None:
+                values = values[0]
+                if self._rowid_column is not None:
+                    values = values[:self._rowid_column] + (rowid,) + values[self._rowid_column + 1:]
+                yield CarvedRecord(page_number, offset - base, source, rowid, values)
+
+    def _leaf_free_space(self, page_number, base, header, source):
+        """
+        Scan the gap between the cell pointer array and the cell content area, then each freeblock
+        """
+        first_freeblock, cell_count, content_start = struct.unpack_from(">HHH", self._map, header + 1)
+        if content_start == 0:
+            content_start = 65536
+        gap_start = header + 8 + 2 * cell_count
+        gap_end = min(base + content_start, base + self._usable)
+        if gap_start < gap_end:
+            yield from self._scan(page_number, base, gap_start, gap_end, source or "unallocated")
+        freeblock = first_freeblock
+        seen = set()
+        while 0 < freeblock < self._usable and freeblock not in seen:
+            seen.add(freeblock)
+            next_freeblock, block_size = struct.unpack_from(">HH", self._map, base + freeblock)
+            block_end = min(base + freeblock + block_size, base + self._usable)
+            # the first 4 bytes of a freeblock overwrite the cell's payload length, rowid and
+            # usually the record header size, so try the serial types straight after them first
+            start = base + freeblock + 4
+            values = self._record(start, block_end, headless=True)
+            if values is not None:
+                yield CarvedRecord(page_number, start - base, source or "freeblock", None, values[0])
+                start = values[1]
+            yield from self._scan(page_number, base, start, block_end, source or "freeblock")
+            freeblock = next_freeblock
+
+    def _scan(self, page_number, base, start, end, source):
+        """
+        Try every offset in [start, end) as the start of a record header
+        """
+        offset = start
+        while offset < end:
+            values = self._record(offset, end)
+            if values is None:
+                offset += 1
+                continue
+            yield CarvedRecord(page_number, offset - base, source, None, values[0])
+            offset = values[1]
+
+    def _record(self, offset, end, headless=False):
+        """
+        Decode a record at offset if its header matches the layout, return (values, end offset).
+        With headless the header size varint is taken as lost and offset is the first serial type.
+        """
+        data = self._map
+        if headless:
+            position = offset
+            header_end = min(offset + self._columns * 9, end)
+        else:
+            header_size, position = _varint(data, offset, end)
+            if header_size is None or header_size < self._columns + 1 or header_size > self._columns * 9 + 1:
+                return None
+            header_end = offset + header_size
+            if header_end > end:
+                return None
+        serial_types = []
+        content_size = 0
+        for kinds in self._layout:
+            serial_type, position = _varint(data, position, header_end)
+            if serial_type is None:
+                return None
+            described = _serial_size(serial_type)
+            if described is None or described[0] not in kinds:
+                return None
+            serial_types.append(serial_type)
+            content_size += described[1]
+        if headless:
+            header_end = position
+        if position != header_end or header_end + content_size > end:
+            return None
+        if all(serial_type == 0 for serial_type in serial_types):
+            return None
+        values = []
+        position = header_end
+        for serial_type in serial_types:
+            kind, size = _serial_size(serial_type)
+            raw = data[position:position + size]
+            position += size
+            if kind == NULL:
+                values.append(None)
+            elif serial_type in (8, 9):
+                values.append(serial_type - 8)
+            elif kind == INT:
+                values.append(int.from_bytes(raw, "big", signed=True))
+            elif kind == FLOAT:
+                values.append(struct.unpack(">d", raw)[0])
+            elif kind == TEXT:
+                try:
+                    values.append(raw.decode(self._encoding))
+                except UnicodeDecodeError:
+                    return None
+            else:
+                values.append(raw)
+        return tuple(values), position
+
+    def close(self):
+        """
+        Release the map and the file handle
+        """
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def carved_file(database_file, conn):
+    """
+    Return the file to carve for database_file opened as conn: the WAL snapshot copy when conn
+    is a riplib.osxripper_sqlite.SnapshotConnection, as the free pages of the evidence file are
+    those from before its -wal was applied, otherwise database_file itself
+    """
+    return getattr(conn, "snapshot_file", None) or database_file
+
+
+def carve_table(database_file, conn, table_name):
+    """
+    Return (column names, CarvedRecord iterator) for table_name, using the live connection
+    conn only to read the table layout. The free space carved is that of the state conn reads,
+    see carved_file, so carved rows do not repeat live ones. Records are streamed, the file
+    stays mapped until the iterator is exhausted or closed.
+    """
+    layout = table_layout(conn, table_name)
+    if not layout:
+        return [], iter(())
+    carver = SqliteCarver(carved_file(database_file, conn), layout)
+    return carver.column_names, _carve(carver)
+
+
+def _carve(carver):
+    """
+    Yield the records of a carver and close it when done
+    """
+    with carver:
+        yield from carver.carve()
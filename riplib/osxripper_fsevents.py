@@ -0,0 +1,142 @@
+""" Module for streaming the records of the gzipped fseventsd page files in /.fseventsd """
+import gzip
+import re
+import struct
+import zlib
+import riplib.osxripper_timeline
+
+__author__ = 'osxripper'
+__version__ = '0.1'
+__license__ = 'GPLv3'
+
+# page files are named by a 16 digit hex event id, fseventsd-uuid is the only other file
+PAGE_FILE_PATTERN = re.compile(r"^[0-9a-fA-F]{16}$")
+PAGE_HEADER = struct.Struct("<4sII")  # magic, unknown, page length including this header
+# the fixed fields after the NUL terminated path of a record: event id and flags, then from
+# DLS2 the node id, then from DLS3 four unknown bytes
+RECORD_FORMATS = {
+    b"1SLD": struct.Struct("<QI"),
+    b"2SLD": struct.Struct("<QIQ"),
+    b"3SLD": struct.Struct("<QIQ4x"),
+}
+FLAGS = (
+    (0x00000001, "FolderEvent"),
+    (0x00000002, "Mount"),
+    (0x00000004, "Unmount"),
+    (0x00000020, "EndOfTransaction"),
+    (0x00000800, "LastHardLinkRemoved"),
+    (0x00001000, "HardLink"),
+    (0x00004000, "SymbolicLink"),
+    (0x00008000, "FileEvent"),
+    (0x00010000, "PermissionChange"),
+    (0x00020000, "ExtendedAttrModified"),
+    (0x00040000, "ExtendedAttrRemoved"),
+    (0x00100000, "DocumentRevisioning"),
+    (0x00400000, "ItemCloned"),
+    (0x01000000, "Created"),
+    (0x02000000, "Removed"),
+    (0x04000000, "InodeMetaMod"),
+    (0x08000000, "Renamed"),
+    (0x10000000, "Modified"),
+    (0x20000000, "Exchange"),
+    (0x40000000, "FinderInfoMod"),
+    (0x80000000, "FolderCreated"),
+)
+
+def under_prefixes(path, path_prefixes):
+    """
+    Return True if path, with or without a leading "/", is one of path_prefixes or lies below
+    one, matching whole path components so Users does not match UsersBackup
+    """
+    path = path.lstrip("/")
+    for prefix in path_prefixes:
+        if not prefix or path == prefix or path.startswith(prefix + "/"):
+            return True
+    return False
+
+
+def flag_names(flags):
+    """
+    Return the names of the event flags set in flags, separated by "; "
+    """
+    return "; ".join([name for mask, name in FLAGS if flags & mask]) or "None"
+
+
+def iter_pages(page_file):
+    """
+    Yield (magic, page bytes) for each page of a decompressed fseventsd file object, reading
+    one page at a time. Raises ValueError at a page with an unknown magic or a short length.
+    """
+    while True:
+        header = page_file.read(PAGE_HEADER.size)
+        if len(header) < PAGE_HEADER.size:
+            return
+        magic, _, length = PAGE_HEADER.unpack(header)
+        if magic not in RECORD_FORMATS:
+            raise ValueError("unknown page magic {0!r}".format(magic))
+        if length < PAGE_HEADER.size:
+            raise ValueError("page length {0} is too short".format(length))
+        yield magic, page_file.read(length - PAGE_HEADER.size)
+
+
+def iter_records(page, record_format, path_prefixes=None):
+    """
+    Yield (event id, path, flags, node id) for each record of a page, node id None for DLS1
+    pages, skipping paths that are not below one of path_prefixes. Stops at a record cut short
+    by the end of the page.
+    """
+    offset = 0
+    while offset < len(page):
+        end = page.find(b"\x00", offset)
+        if end < 0 or end + 1 + record_format.size > len(page):
+            return
+        path = page[offset:end].decode("utf-8", "replace")
+        fields = record_format.unpack_from(page, end + 1)
+        offset = end + 1 + record_format.size
+        if path_prefixes is None or under_prefixes(path, path_prefixes):
+            yield fields[0], path, fields[1], fields[2] if len(fields) > 2 else None
+
+
+def page_file_run(path, run_path, path_prefixes=None):
+    """
+    Write the records of a gzipped page file, sorted by event id, to a
+    riplib.osxripper_timeline run file at run_path and return (count, problem): the number of
+    records and None or the reason the file could not be read to the end. Only one page file is
+    held in memory, so the function can run in a worker process and the runs of every page file
+    be merged from disk with run_row.
+    """
+    rows = []
+    problem = None
+    try:
+        with gzip.open(path, "rb") as page_file:
+            for magic, page in iter_pages(page_file):
+                rows.extend(iter_records(page, RECORD_FORMATS[magic], path_prefixes))
+    except (OSError, EOFError, ValueError, zlib.error) as error:
+        problem = str(error)
+    rows.sort(key=_event_id)
+    riplib.osxripper_timeline.write_run(run_path, (_run_item(row, path) for row in rows))
+    return len(rows), problem
+
+
+def _event_id(row):
+    """
+    Sort key of a page file row
+    """
+    return row[0]
+
+
+def _run_item(row, path):
+    """
+    Return a record row and its page file path as strings that sort by event id, written as
+    fixed width hex
+    """
+    event_id, record_path, flags, node_id = row
+    return ("{0:016x}".format(event_id), record_path, str(flags), "" if node_id is None else str(node_id), path)
+
+
+def run_row(item):
+    """
+    Return (event id, path, flags, node id, page file path) for an item of a page_file_run run
+    """
+    event_id, path, flags, node_id, page_file = item
+    return int(event_id, 16), path, int(flags), int(node_id) if node_id else None, page_file
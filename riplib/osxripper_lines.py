@@ -0,0 +1,82 @@
+""" Module for streaming the lines of text logs, plain or compressed, with encoding fallback """
+import bz2
+import gzip
+import logging
+
+__author__ = 'osxripper'
+__version__ = '0.1'
+__license__ = 'GPLv3'
+
+# tried in order for each line, the last decodes every byte
+ENCODINGS = ("utf-8", "mac_roman")
+NEWLINE = "\r\n"
+GZIP_MAGIC = b"\x1f\x8b"
+BZ2_MAGIC = b"BZh"
+
+
+def open_binary(path):
+    """
+    Open a file for reading bytes, decompressing it on the fly if it is gzip or bzip2
+    """
+    with open(path, "rb") as magic_file:
+        magic = magic_file.read(3)
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.open(path, "rb")
+    if magic.startswith(BZ2_MAGIC):
+        return bz2.open(path, "rb")
+    return open(path, "rb")
+
+
+def decode_line(line, encodings=ENCODINGS):
+    """
+    Decode the bytes of one line with the first of encodings that fits, the last encoding
+    replaces what it cannot decode
+    """
+    for encoding in encodings[:-1]:
+        try:
+            return line.decode(encoding)
+        except UnicodeDecodeError:
+            pass
+    return line.decode(encodings[-1], "replace")
+
+
+def iter_lines(path, encodings=ENCODINGS):
+    """
+    Yield the lines of a text file, or of a gzip or bzip2 compressed one, without their line
+    ends. The file is read lazily so memory use does not grow with its size, and each line is
+    decoded on its own so one bad line does not stop the rest. A file that cannot be read to
+    the end is logged and yields the lines read before the error.
+    """
+    try:
+        with open_binary(path) as line_file:
+            for line in line_file:
+                if line.endswith(b"\n"):
+                    line = line[:-2] if line.endswith(b"\r\n") else line[:-1]
+                yield decode_line(line, encodings)
+    except (OSError, EOFError) as error:
+        logging.error("%s: %s", path, error)
+        print("[ERROR] {0}: {1}".format(path, error))
+
+
+def each_line(path, callback, encodings=ENCODINGS):
+    """
+    Call callback with each line of path, see iter_lines, and return the number of lines read
+    """
+    count = 0
+    for line in iter_lines(path, encodings):
+        callback(line)
+        count += 1
+    return count
+
+
+def copy_lines(path, output_file, keep=None, encodings=ENCODINGS):
+    """
+    Write each line of path for which keep(line) is true, or every line without keep, to
+    output_file ending in "\\r\\n", and return the number of lines written
+    """
+    count = 0
+    for line in iter_lines(path, encodings):
+        if keep is None or keep(line):
+            output_file.write(line + NEWLINE)
+            count += 1
+    return count
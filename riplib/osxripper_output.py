@@ -0,0 +1,295 @@
+""" Module for buffered plugin output files """
+import bz2
+import gzip
+import io
+import lzma
+import os
+import shutil
+import tempfile
+import threading
+import riplib.osxripper_records
+
+__author__ = 'osxripper'
+__version__ = '0.1'
+__license__ = 'GPLv3'
+
+BUFFER_SIZE = 1024 * 1024  # characters held before a write to the file
+NEWLINE = "\r\n"
+DEFAULT_LEVEL = 6
+INDEX_SUFFIX = ".idx"
+RECORD_INTERVAL = 1000  # every Nth record of a section is indexed
+SECTION_START = "=" * 10 + " "
+SECTION_END = " " + "=" * 10 + NEWLINE
+SOURCE_PREFIXES = ("Source File: ", "Source Directory: ")
+
+# --compress method: (open function, file suffix, keyword for the level)
+COMPRESSORS = {
+    "gzip": (gzip.open, ".gz", "compresslevel"),
+    "xz": (lzma.open, ".xz", "preset"),
+    "bz2": (bz2.open, ".bz2", "compresslevel"),
+}
+
+_staging = None
+
+
+class OutputWriter():
+    """
+    Text output file for a plugin. Writes are collected in memory and handed to the file in
+    large chunks, text is encoded in bulk by io.open and newlines are written untranslated,
+    so the bytes match the old codecs.open(path, "a", encoding="utf-8") streams. With a
+    compression method the text is passed through a streaming compressor and the method's
+    suffix is added to the path.
+
+    With index the writer notes the byte offset of each "========== Section ==========" header,
+    each "Source File:" line and every RECORD_INTERVAL-th record written with write_record, and
+    close() appends them to <path>.idx as "offset<TAB>kind<TAB>value" lines, kind being
+    section, source or record. Offsets count bytes from the start of the file.
+    """
+
+    def __init__(self, path, mode="a", encoding="utf-8", buffer_size=BUFFER_SIZE, compression=None,
+                 level=DEFAULT_LEVEL, index=False):
+        self._buffer_size = buffer_size
+        self._chunks = []
+        self._buffered = 0
+        self._encoding = encoding
+        self._index_entries = None
+        self.record_sink = None  # called with each typed record written, see Plugin.set_record_sink
+        if compression is None:
+            self._path = path
+            if index:
+                self._index_entries = []
+                self._offset = os.path.getsize(path) if mode == "a" and os.path.isfile(path) else 0
+                self._records = 0
+            self._file = io.open(path, mode, encoding=encoding, newline="")
+        else:
+            # appending to a compressed file adds a new gzip member or xz/bz2 stream, which
+            # the standard tools decompress as one file
+            open_function, suffix, level_keyword = COMPRESSORS[compression]
+            self._path = path + suffix
+            self._file = open_function(self._path, mode + "t", encoding=encoding, newline="",
+                                       **{level_keyword: level})
+
+    @property
+    def name(self):
+        """
+        Return the path of the output file
+        """
+        return self._path
+
+    @property
+    def closed(self):
+        """
+        Return True once the writer has been closed
+        """
+        return self._file is None
+
+    def write(self, text):
+        """
+        Buffer text for the output file
+        """
+        if self._file is None:
+            raise ValueError("I/O operation on closed file.")
+        if self._index_entries is not None:
+            self._index_text(text)
+        self._chunks.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self._buffer_size:
+            self.flush()
+
+    def writelines(self, lines):
+        """
+        Buffer each string of lines
+        """
+        for line in lines:
+            self.write(line)
+
+    def write_record(self, fields, width=None):
+        """
+        Write one "Label : value" line per (label, value) pair followed by a blank line.
+        Labels are padded to width, by default the longest label of the record.
+        fields may also be a typed record from riplib.osxripper_records, which is also passed
+        to record_sink if one is set.
+        """
+        if self._index_entries is not None:
+            if self._records % RECORD_INTERVAL == 0:
+                self._index_entries.append((self._offset, "record", str(self._records)))
+            self._records += 1
+        if riplib.osxripper_records.is_record(fields):
+            self.write(riplib.osxripper_records.format_text(fields))
+            if self.record_sink is not None:
+                self.record_sink(fields)
+            return
+        if width is None:
+            width = max([len(label) for label, _ in fields] or [0])
+        self.write("".join(["{0}: {1}{2}".format(label.ljust(width), value, NEWLINE)
+                            for label, value in fields]) + NEWLINE)
+
+    def _index_text(self, text):
+        """
+        Note section headers and source lines at the current offset, then advance it past text
+        """
+        if text.startswith(SECTION_START) and text.endswith(SECTION_END):
+            self._index_entries.append((self._offset, "section", text[len(SECTION_START):-len(SECTION_END)]))
+            self._records = 0
+        elif text.startswith(SOURCE_PREFIXES):
+            self._index_entries.append((self._offset, "source", text.split(": ", 1)[1].rstrip(NEWLINE)))
+        self._offset += len(text) if text.isascii() else len(text.encode(self._encoding))
+
+    def flush(self):
+        """
+        Write the buffered text to the file
+        """
+        if self._chunks:
+            self._file.write("".join(self._chunks))
+            self._chunks = []
+            self._buffered = 0
+        self._file.flush()
+
+    def close(self):
+        """
+        Flush and close the file, calling close again does nothing
+        """
+        if self._file is not None:
+            try:
+                self.flush()
+            finally:
+                self._file.close()
+                self._file = None
+            if self._index_entries:
+                write_index(self._path + INDEX_SUFFIX, self._index_entries)
+            self._index_entries = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def __repr__(self):
+        return "OutputWriter(%s)" % self._path
+
+
+def write_index(index_path, entries, shift=0):
+    """
+    Append (offset, kind, value) entries to an index file, adding shift to each offset
+    """
+    with io.open(index_path, "a", encoding="utf-8", newline="") as index_file:
+        index_file.write("".join(["{0}\t{1}\t{2}\n".format(offset + shift, kind, value.replace("\t", " ").replace("\n", " "))
+                                  for offset, kind, value in entries]))
+
+
+def read_index(index_path):
+    """
+    Return the (offset, kind, value) entries of an index file
+    """
+    entries = []
+    with io.open(index_path, "r", encoding="utf-8", newline="") as index_file:
+        for line in index_file:
+            offset, kind, value = line.rstrip("\n").split("\t", 2)
+            entries.append((int(offset), kind, value))
+    return entries
+
+
+def output_name(path, compression=None):
+    """
+    Return the name open_output will write path to, with the suffix of the compression method
+    """
+    if compression is not None:
+        return path + COMPRESSORS[compression][1]
+    return path
+
+
+def concatenate(path, part_paths, mode="ab"):
+    """
+    Copy the bytes of each part to path in order
+    """
+    with open(path, mode) as target_file:
+        for part_path in part_paths:
+            with open(part_path, "rb") as part_file:
+                shutil.copyfileobj(part_file, target_file, BUFFER_SIZE)
+
+
+class OutputStaging():
+    """
+    Private output for plugins run in parallel. Each file a plugin opens is written to its own
+    part in a spool directory, and merge() appends the parts to their target files in plugin
+    order and then open order, which is the order a serial run writes them in. Plugins that
+    share a target file, such as the Users_<name>.txt reports, then produce the same bytes
+    as a serial run however their threads are scheduled.
+    """
+
+    def __init__(self, output_dir, owners):
+        self._spool_dir = tempfile.mkdtemp(prefix="_osxripper_spool.", dir=output_dir)
+        self._order = {id(owner): index for index, owner in enumerate(owners)}
+        self._opened = {}  # owner order -> files opened so far
+        self._parts = []  # (owner order, open sequence, target path, part path)
+        self._lock = threading.Lock()
+
+    def open(self, path, owner, encoding="utf-8", compression=None, level=DEFAULT_LEVEL, index=False):
+        """
+        Return an OutputWriter on a new part for path written by owner, compressed with
+        compression at level and indexed with index
+        """
+        order = self._order.get(id(owner), len(self._order))
+        with self._lock:
+            sequence = self._opened.get(order, 0)
+            self._opened[order] = sequence + 1
+        # a part written through the compressor is a complete gzip member or xz/bz2 stream, so
+        # concatenating the parts gives the same file as appending to it
+        writer = OutputWriter(os.path.join(self._spool_dir, "{0:05d}_{1:05d}".format(order, sequence)), "w",
+                              encoding, compression=compression, level=level, index=index)
+        with self._lock:
+            self._parts.append((order, sequence, output_name(path, compression), writer.name))
+        return writer
+
+    def merge(self):
+        """
+        Append every part to its target file in serial order and remove the spool directory
+        """
+        try:
+            targets = {}
+            for _, _, path, part_path in sorted(self._parts):
+                targets.setdefault(path, []).append(part_path)
+            for path, part_paths in targets.items():
+                offset = os.path.getsize(path) if os.path.isfile(path) else 0
+                for part_path in part_paths:
+                    # part offsets start at 0, move them to where the part lands in the target
+                    if os.path.isfile(part_path + INDEX_SUFFIX):
+                        write_index(path + INDEX_SUFFIX, read_index(part_path + INDEX_SUFFIX), offset)
+                    offset += os.path.getsize(part_path)
+                concatenate(path, part_paths)
+        finally:
+            shutil.rmtree(self._spool_dir, ignore_errors=True)
+
+
+def start_staging(output_dir, owners):
+    """
+    Send the output of open_output calls made for owners (the plugins, in serial run order)
+    to private parts until finish_staging merges them
+    """
+    global _staging
+    _staging = OutputStaging(output_dir, owners)
+
+
+def finish_staging():
+    """
+    Merge the staged output into the target files and go back to writing them directly
+    """
+    global _staging
+    staging, _staging = _staging, None
+    if staging is not None:
+        staging.merge()
+
+
+def open_output(path, mode="a", encoding="utf-8", owner=None, compression=None, level=DEFAULT_LEVEL,
+                index=False):
+    """
+    Open a buffered plugin output file, appending by default, compressed with compression, one
+    of COMPRESSORS or None for plain text, at level (1-9). With index an uncompressed file
+    appended to gets a sidecar offset index. While staging is on, appends made for an owner go
+    to a private part.
+    """
+    if _staging is not None and owner is not None and mode == "a":
+        return _staging.open(path, owner, encoding, compression, level, index)
+    return OutputWriter(path, mode, encoding, compression=compression, level=level,
+                        index=index and mode == "a")
@@ -0,0 +1,34 @@
+""" Module for running plugin work in a process pool and collecting the results in order """
+import collections
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+__author__ = 'osxripper'
+__version__ = '0.1'
+__license__ = 'GPLv3'
+
+
+def ordered_results(function, arguments):
+    """
+    Yield function(*args) for each args tuple of arguments, in order. With more than one item
+    and more than one CPU the calls run in a process pool a few ahead of the result being
+    read, so results waiting to be read stay bounded. function must be a module level function
+    and its arguments and results must pickle. The pool uses spawn rather than fork as the
+    threaded driver may be running other plugins.
+    """
+    arguments = list(arguments)
+    cpu_count = os.cpu_count() or 1
+    if len(arguments) < 2 or cpu_count < 2:
+        for args in arguments:
+            yield function(*args)
+        return
+    workers = min(len(arguments), cpu_count)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        pending = collections.deque()
+        submitted = 0
+        for _ in arguments:
+            while submitted < len(arguments) and len(pending) <= workers:
+                pending.append(executor.submit(function, *arguments[submitted]))
+                submitted += 1
+            yield pending.popleft().result()
@@ -0,0 +1,112 @@
+""" Module for typed plugin records and their text rendering """
+import collections
+import datetime
+
+__author__ = 'osxripper'
+__version__ = '0.1'
+__license__ = 'GPLv3'
+
+# field kinds
+TEXT = "text"
+INT = "int"
+FLOAT = "float"
+TIME = "time"  # datetime or the date time string produced by riplib.osxripper_time
+BLOB = "blob"
+
+NEWLINE = "\r\n"
+
+
+def record_type(type_name, fields):
+    """
+    Declare a record type. fields is a sequence of (name, label, kind); fields with a label
+    of None (user, source) are carried for other sinks but not written to the text reports.
+    Returns a namedtuple class, so records are compact, immutable and ordered.
+    """
+    names = [name for name, _, _ in fields]
+    base = collections.namedtuple(type_name, names)
+    labels = tuple(label for _, label, _ in fields)
+    shown = [label for label in labels if label is not None]
+    width = max([len(label) for label in shown] or [0])
+    namespace = {
+        "__slots__": (),
+        "_labels": labels,
+        "_kinds": tuple(kind for _, _, kind in fields),
+        "_text_fields": tuple((index, label.ljust(width)) for index, label in enumerate(labels)
+                              if label is not None),
+    }
+    return type(type_name, (base,), namespace)
+
+
+def is_record(value):
+    """
+    Return True if value is a record built from a record_type class
+    """
+    return isinstance(value, tuple) and hasattr(value, "_text_fields")
+
+
+def format_text(record):
+    """
+    Render a record the way the text reports always have: "Label : value" lines, labels padded
+    to the longest in the record, followed by a blank line
+    """
+    return "".join(["{0}: {1}{2}".format(label, record[index], NEWLINE)
+                    for index, label in record._text_fields]) + NEWLINE
+
+
+def time_fields(record):
+    """
+    Return the names of the TIME fields of a record
+    """
+    return [name for name, kind in zip(record._fields, record._kinds) if kind == TIME]
+
+
+def to_datetime(value):
+    """
+    Return a TIME field value as a datetime, None if it is not a date
+    """
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        return value
+    if isinstance(value, str) and value[:1].isdigit():
+        for time_format in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S"):
+            try:
+                return datetime.datetime.strptime(value, time_format)
+            except ValueError:
+                pass
+    return None
+
+
+def typed_value(value, kind):
+    """
+    Return value converted to its field kind for structured outputs: TIME as an ISO 8601
+    string (None if it is not a date), INT and FLOAT as numbers where possible, BLOB as hex
+    and undecodable TEXT bytes with replacement characters
+    """
+    if value is None:
+        return None
+    if kind == TIME:
+        date_time = to_datetime(value)
+        return date_time.isoformat() if date_time is not None else None
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        if kind == BLOB:
+            return bytes(value).hex()
+        return bytes(value).decode("utf-8", "replace")
+    if kind == INT and not isinstance(value, int):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return value
+    if kind == FLOAT and not isinstance(value, float):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return value
+    return value
+
+
+def typed_values(record):
+    """
+    Return the typed_value of each field of record, in field order
+    """
+    return [typed_value(value, kind) for value, kind in zip(record, record._kinds)]
@@ -0,0 +1,109 @@
+""" Module for reading rotated logs, such as system.0.log.gz or wifi.log.1.bz2, in parallel and in order """
+import logging
+import os
+import re
+import shutil
+import tempfile
+import riplib.osxripper_lines
+import riplib.osxripper_output
+import riplib.osxripper_pool
+
+__author__ = 'osxripper'
+__version__ = '0.1'
+__license__ = 'GPLv3'
+
+# name.N.log.gz, name.log.N.gz or .bz2, N counting up from the newest rotation
+ROTATION_PATTERN = re.compile(r"^[^.]+\.(?:log\.)?(\d{1,4})(?:\.log)?\.(?:gz|bz2)$")
+
+
+def rotation_index(path):
+    """
+    Return the rotation index in the name of a rotated log, None if it has none
+    """
+    match = ROTATION_PATTERN.match(os.path.basename(path))
+    return int(match.group(1)) if match is not None else None
+
+
+def rotation_key(path):
+    """
+    Sort key putting rotated logs in chronological order: by rotation index, highest (oldest)
+    first, then logs without an index by modification time
+    """
+    index = rotation_index(path)
+    if index is not None:
+        return 0, -index, 0
+    try:
+        return 1, 0, os.path.getmtime(path)
+    except OSError:
+        return 1, 0, 0
+
+
+def rotated_logs(working_dir, file_names, live_name):
+    """
+    Return the paths of the rotations of live_name among file_names, oldest first, followed by
+    live_name itself if it is there
+    """
+    base = live_name.split(".")[0]
+    rotations = [os.path.join(working_dir, file_name) for file_name in file_names
+                 if file_name != live_name and file_name[:len(base) + 1] in (base + ".", base + "-", base + "_") and
+                 (file_name.endswith(".gz") or file_name.endswith(".bz2"))]
+    rotations.sort(key=rotation_key)
+    if live_name in file_names:
+        rotations.append(os.path.join(working_dir, live_name))
+    return rotations
+
+
+def decompress(path, part_path):
+    """
+    Decompress a gzip or bzip2 log into a part file, run in a worker process so logs are
+    inflated in parallel. Returns None, or the error that stopped the decompression; the part
+    then holds what was read before it.
+    """
+    try:
+        with riplib.osxripper_lines.open_binary(path) as log_file, open(part_path, "wb") as part_file:
+            shutil.copyfileobj(log_file, part_file, riplib.osxripper_output.BUFFER_SIZE)
+    except (OSError, EOFError) as error:
+        return str(error)
+    return None
+
+
+def decompressed(paths, spool_parent):
+    """
+    Yield (path, part path, error) for each compressed log of paths in order, once the log has
+    been decompressed to the part file. Logs are decompressed in a process pool a few ahead of
+    the one being read, each part is removed when the next one is yielded and errors are logged.
+    """
+    spool_dir = tempfile.mkdtemp(prefix="_osxripper_spool.", dir=spool_parent)
+    part_paths = [os.path.join(spool_dir, "{0:05d}".format(index)) for index in range(len(paths))]
+    try:
+        errors = riplib.osxripper_pool.ordered_results(decompress, zip(paths, part_paths))
+        for path, part_path, error in zip(paths, part_paths, errors):
+            if error is not None:
+                logging.error("%s: %s", path, error)
+                print("[ERROR] {0}: {1}".format(path, error))
+            yield path, part_path, error
+            if os.path.isfile(part_path):
+                os.remove(part_path)
+    finally:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+
+
+def log_lines(paths, spool_parent):
+    """
+    Yield (path, line) for each line of the logs of paths in order, decompressing the rotated
+    ones in parallel, see riplib.osxripper_lines.iter_lines for how lines are decoded
+    """
+    compressed = [path for path in paths if path.endswith(".gz") or path.endswith(".bz2")]
+    parts = decompressed(compressed, spool_parent)
+    try:
+        for path in paths:
+            if path.endswith(".gz") or path.endswith(".bz2"):
+                _, part_path, _ = next(parts)
+                source = part_path
+            else:
+                source = path
+            if os.path.isfile(source):
+                for line in riplib.osxripper_lines.iter_lines(source):
+                    yield path, line
+    finally:
+        parts.close()
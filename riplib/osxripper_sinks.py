@@ -0,0 +1,469 @@
+""" Module for structured record outputs selected with --format, --sqlite-out and --timeline """
+import csv
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import riplib.osxripper_output
+import riplib.osxripper_records
+import riplib.osxripper_timeline
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+__author__ = 'osxripper'
+__version__ = '0.1'
+__license__ = 'GPLv3'
+
+FORMATS = ["text", "jsonl", "csv", "parquet"]
+JSONL_FILE = "osxripper_records.jsonl"
+TIMELINE_FORMATS = ["csv", "jsonl"]
+TIMELINE_FILE = "osxripper_timeline"
+SQLITE_BATCH_SIZE = 10000  # rows held per table before an executemany
+SQLITE_COMMIT_ROWS = 500000  # rows inserted per transaction
+PARQUET_ROW_GROUP_SIZE = 65536  # rows held per table before a row group is written
+SQLITE_TYPES = {
+    riplib.osxripper_records.TEXT: "TEXT",
+    riplib.osxripper_records.INT: "INTEGER",
+    riplib.osxripper_records.FLOAT: "REAL",
+    riplib.osxripper_records.TIME: "TEXT",
+    riplib.osxripper_records.BLOB: "BLOB",
+}
+
+
+class RecordSink():
+    """
+    Base class for outputs that take typed records from Plugin.iter_records. Records are
+    written as they are yielded, so memory use stays at one record plus the write buffers.
+    Writes are serialised with a lock so plugins run by the threaded driver can share a sink.
+    """
+
+    replaces_text = True  # plugins writing records to this sink skip their text report
+
+    def __init__(self, output_dir, compression=None, level=riplib.osxripper_output.DEFAULT_LEVEL):
+        self._output_dir = output_dir
+        self._compression = compression
+        self._level = level
+        self._lock = threading.Lock()
+
+    def _open_output(self, path):
+        """
+        Open an output file for writing, compressed as the sink was told to
+        """
+        return riplib.osxripper_output.open_output(path, "w", compression=self._compression, level=self._level)
+
+    def write_records(self, plugin_name, records):
+        """
+        Write every record yielded by records, return the number written
+        """
+        count = 0
+        for record in records:
+            with self._lock:
+                self._write(plugin_name, record)
+            count += 1
+        return count
+
+    def _write(self, plugin_name, record):
+        """
+        Write one record, override in sub-classes
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Flush and close the output files, override in sub-classes
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+class JsonLinesSink(RecordSink):
+    """
+    Write every record as one JSON object per line to osxripper_records.jsonl. With ordered,
+    each plugin's lines go to a part of their own and close() joins the parts by plugin name,
+    the order plugins are loaded in, so threaded runs write the same file as serial ones.
+    """
+
+    def __init__(self, output_dir, ordered=False, compression=None, level=riplib.osxripper_output.DEFAULT_LEVEL):
+        super().__init__(output_dir, compression, level)
+        self._path = os.path.join(output_dir, JSONL_FILE)
+        self._output_file = None
+        self._parts = None
+        self._spool_dir = None
+        if ordered:
+            self._parts = {}  # plugin name -> OutputWriter
+            self._spool_dir = tempfile.mkdtemp(prefix="_osxripper_spool.", dir=output_dir)
+        else:
+            self._output_file = self._open_output(self._path)
+
+    def _write(self, plugin_name, record):
+        output_file = self._output_file
+        if self._parts is not None:
+            output_file = self._parts.get(plugin_name)
+            if output_file is None:
+                output_file = self._open_output(os.path.join(self._spool_dir, plugin_name))
+                self._parts[plugin_name] = output_file
+        document = {"plugin": plugin_name, "record_type": type(record).__name__}
+        document.update(zip(record._fields, riplib.osxripper_records.typed_values(record)))
+        output_file.write(json.dumps(document, ensure_ascii=False) + "\n")
+
+    def close(self):
+        if self._output_file is not None:
+            self._output_file.close()
+        if self._parts is not None:
+            try:
+                for output_file in self._parts.values():
+                    output_file.close()
+                riplib.osxripper_output.concatenate(
+                    riplib.osxripper_output.output_name(self._path, self._compression),
+                    [self._parts[plugin_name].name for plugin_name in sorted(self._parts)], "wb")
+            finally:
+                shutil.rmtree(self._spool_dir, ignore_errors=True)
+                self._parts = None
+
+
+class CsvSink(RecordSink):
+    """
+    Write records to one CSV file per plugin and record type, <plugin>_<record type>.csv,
+    with a header row of the field names
+    """
+
+    def __init__(self, output_dir, compression=None, level=riplib.osxripper_output.DEFAULT_LEVEL):
+        super().__init__(output_dir, compression, level)
+        self._writers = {}
+        self._output_files = []
+
+    def _write(self, plugin_name, record):
+        key = (plugin_name, type(record).__name__)
+        writer = self._writers.get(key)
+        if writer is None:
+            output_file = self._open_output(os.path.join(self._output_dir, "{0}_{1}.csv".format(*key)))
+            self._output_files.append(output_file)
+            writer = csv.writer(output_file)
+            writer.writerow(("plugin",) + record._fields)
+            self._writers[key] = writer
+        writer.writerow([plugin_name] + riplib.osxripper_records.typed_values(record))
+
+    def close(self):
+        for output_file in self._output_files:
+            output_file.close()
+
+
+class SqliteSink(RecordSink):
+    """
+    Write records to one SQLite database with a table per plugin and record type,
+    <plugin>_<record type>. Rows are batched per table and inserted with executemany inside
+    large transactions; the user, source and time indexes are built once loading is done.
+    """
+
+    def __init__(self, database_file):
+        super().__init__(os.path.dirname(database_file))
+        self._path = database_file
+        self._conn = sqlite3.connect(database_file, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=MEMORY")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute("BEGIN")
+        self._tables = {}  # (plugin, record type) -> _SqliteTable
+        self._uncommitted = 0
+
+    def _write(self, plugin_name, record):
+        key = (plugin_name, type(record).__name__)
+        table = self._tables.get(key)
+        if table is None:
+            table = _SqliteTable("{0}_{1}".format(*key), record)
+            self._conn.execute(table.create)
+            self._tables[key] = table
+        table.rows.append([plugin_name] + [_sqlite_value(value, kind) for value, kind in zip(record, record._kinds)])
+        if len(table.rows) >= SQLITE_BATCH_SIZE:
+            self._insert(table)
+
+    def _insert(self, table):
+        """
+        Insert the pending rows of a table, committing once enough rows have been written
+        """
+        if table.rows:
+            self._conn.executemany(table.insert, table.rows)
+            self._uncommitted += len(table.rows)
+            table.rows = []
+        if self._uncommitted >= SQLITE_COMMIT_ROWS:
+            self._conn.execute("COMMIT")
+            self._conn.execute("BEGIN")
+            self._uncommitted = 0
+
+    def close(self):
+        if self._conn is None:
+            return
+        with self._lock:
+            for table in self._tables.values():
+                self._insert(table)
+            for table in self._tables.values():
+                for statement in table.indexes:
+                    self._conn.execute(statement)
+            self._conn.execute("COMMIT")
+            self._conn.close()
+            self._conn = None
+            logging.info("Records written to %s.", self._path)
+
+
+class _SqliteTable():
+    """
+    DDL, insert statement and pending rows of one SqliteSink table
+    """
+    __slots__ = ("create", "insert", "indexes", "rows")
+
+    def __init__(self, name, record):
+        columns = ["plugin TEXT"] + ["{0} {1}".format(_quote(field), SQLITE_TYPES.get(kind, ""))
+                                     for field, kind in zip(record._fields, record._kinds)]
+        self.create = "CREATE TABLE IF NOT EXISTS {0} ({1})".format(_quote(name), ", ".join(columns))
+        self.insert = "INSERT INTO {0} VALUES ({1})".format(_quote(name), ",".join("?" * (len(record._fields) + 1)))
+        indexed = [field for field, kind in zip(record._fields, record._kinds)
+                   if field in ("user", "source") or kind == riplib.osxripper_records.TIME]
+        self.indexes = ["CREATE INDEX IF NOT EXISTS {0} ON {1} ({2})"
+                        .format(_quote(name + "_" + field), _quote(name), _quote(field)) for field in indexed]
+        self.rows = []
+
+
+def _sqlite_value(value, kind):
+    """
+    Return a record value for an SqliteSink row, BLOB fields keep their bytes
+    """
+    if kind == riplib.osxripper_records.BLOB and isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value)
+    return riplib.osxripper_records.typed_value(value, kind)
+
+
+def _quote(identifier):
+    """
+    Quote an SQLite identifier
+    """
+    return "\"{0}\"".format(identifier.replace("\"", "\"\""))
+
+
+class ParquetSink(RecordSink):
+    """
+    Write records to one Parquet file per plugin and record type, <plugin>_<record type>.parquet.
+    Rows are held per table until PARQUET_ROW_GROUP_SIZE is reached and then written as a row
+    group, so memory is bounded by one row group per table. Text columns are dictionary encoded,
+    which keeps repeated values such as bundle IDs, hosts and process names small.
+    """
+
+    def __init__(self, output_dir):
+        if pyarrow is None:
+            raise ImportError("pyarrow is required for Parquet output")
+        super().__init__(output_dir)
+        self._tables = {}  # (plugin, record type) -> _ParquetTable
+
+    def _write(self, plugin_name, record):
+        key = (plugin_name, type(record).__name__)
+        table = self._tables.get(key)
+        if table is None:
+            table = _ParquetTable(os.path.join(self._output_dir, "{0}_{1}.parquet".format(*key)), record)
+            self._tables[key] = table
+        table.append(plugin_name, record)
+        if table.size >= PARQUET_ROW_GROUP_SIZE:
+            table.flush()
+
+    def close(self):
+        with self._lock:
+            for table in self._tables.values():
+                table.close()
+            self._tables = {}
+
+
+class _ParquetTable():
+    """
+    Column buffers and ParquetWriter of one ParquetSink file
+    """
+    _ARROW_TYPES = {
+        riplib.osxripper_records.TEXT: "string",
+        riplib.osxripper_records.INT: "int64",
+        riplib.osxripper_records.FLOAT: "float64",
+        riplib.osxripper_records.TIME: "timestamp[us]",
+        riplib.osxripper_records.BLOB: "binary",
+    }
+
+    def __init__(self, path, record):
+        self._kinds = (riplib.osxripper_records.TEXT,) + record._kinds
+        self._schema = pyarrow.schema([pyarrow.field("plugin", pyarrow.string())] + [
+            pyarrow.field(name, pyarrow.type_for_alias(self._ARROW_TYPES[kind]))
+            for name, kind in zip(record._fields, record._kinds)])
+        text_columns = [field.name for field, kind in zip(self._schema, self._kinds)
+                        if kind == riplib.osxripper_records.TEXT]
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema, use_dictionary=text_columns)
+        self._columns = [[] for _ in self._kinds]
+        self.size = 0
+
+    def append(self, plugin_name, record):
+        """
+        Add a record to the column buffers
+        """
+        for column, value, kind in zip(self._columns, (plugin_name,) + tuple(record), self._kinds):
+            column.append(_arrow_value(value, kind))
+        self.size += 1
+
+    def flush(self):
+        """
+        Write the buffered rows as one row group
+        """
+        if self.size:
+            batch = pyarrow.Table.from_arrays([pyarrow.array(column, type=field.type)
+                                               for column, field in zip(self._columns, self._schema)],
+                                              schema=self._schema)
+            self._writer.write_table(batch, row_group_size=self.size)
+            self._columns = [[] for _ in self._kinds]
+            self.size = 0
+
+    def close(self):
+        """
+        Write the last row group and the file footer
+        """
+        self.flush()
+        self._writer.close()
+
+
+def _arrow_value(value, kind):
+    """
+    Return a record value for a Parquet column of its kind, None where it does not convert
+    """
+    if kind == riplib.osxripper_records.TIME:
+        return riplib.osxripper_records.to_datetime(value)
+    if kind == riplib.osxripper_records.BLOB:
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return bytes(value)
+        return None if value is None else str(value).encode("utf-8")
+    value = riplib.osxripper_records.typed_value(value, kind)
+    if kind == riplib.osxripper_records.INT and not isinstance(value, int):
+        return None
+    if kind == riplib.osxripper_records.FLOAT and not isinstance(value, (int, float)):
+        return None
+    if kind == riplib.osxripper_records.TEXT and value is not None and not isinstance(value, str):
+        return str(value)
+    return value
+
+
+class TimelineSink(RecordSink):
+    """
+    Turn every dated field of every record into a timeline event and write all events in time
+    order to osxripper_timeline.csv or .jsonl when closed. Events are sorted with an external
+    merge sort, so memory stays bounded however many there are. The text reports are still
+    written.
+    """
+    replaces_text = False
+
+    def __init__(self, output_dir, timeline_format="csv", compression=None,
+                 level=riplib.osxripper_output.DEFAULT_LEVEL):
+        super().__init__(output_dir, compression, level)
+        self._format = timeline_format
+        self._sorter = riplib.osxripper_timeline.ExternalSorter(output_dir)
+
+    def _write(self, plugin_name, record):
+        for event in riplib.osxripper_timeline.record_events(plugin_name, record):
+            self._sorter.add(event)
+
+    def close(self):
+        if self._sorter is None:
+            return
+        sorter, self._sorter = self._sorter, None
+        path = os.path.join(self._output_dir, TIMELINE_FILE + "." + self._format)
+        with self._open_output(path) as output_file:
+            if self._format == "csv":
+                writer = csv.writer(output_file)
+                writer.writerow(riplib.osxripper_timeline.COLUMNS)
+                writer.writerows(sorter.sorted_items())
+            else:
+                for event in sorter.sorted_items():
+                    output_file.write(json.dumps(dict(zip(riplib.osxripper_timeline.COLUMNS, event)),
+                                                 ensure_ascii=False) + "\n")
+        logging.info("%d timeline events written to %s.", sorter.count, path)
+
+
+class TeeSink(RecordSink):
+    """
+    Pass every record to several sinks
+    """
+
+    def __init__(self, sinks):
+        super().__init__(None)
+        self._sinks = sinks
+        self.replaces_text = any(sink.replaces_text for sink in sinks)
+
+    def _write(self, plugin_name, record):
+        for sink in self._sinks:
+            sink._write(plugin_name, record)
+
+    def close(self):
+        for sink in self._sinks:
+            sink.close()
+
+
+def open_sink(output_format, output_dir, sqlite_out=None, deterministic=False, timeline=None, compression=None,
+              level=riplib.osxripper_output.DEFAULT_LEVEL):
+    """
+    Return the RecordSink for output_format, the --sqlite-out database and the --timeline
+    format, None if only the text reports are wanted. deterministic keeps the JSON Lines file
+    in plugin order, compression and level compress the JSON Lines, CSV and timeline files.
+    """
+    sinks = []
+    if output_format == "jsonl":
+        sinks.append(JsonLinesSink(output_dir, deterministic, compression, level))
+    elif output_format == "csv":
+        sinks.append(CsvSink(output_dir, compression, level))
+    elif output_format == "parquet":
+        sinks.append(ParquetSink(output_dir))
+    if sqlite_out:
+        sinks.append(SqliteSink(sqlite_out))
+    if timeline:
+        sinks.append(TimelineSink(output_dir, timeline, compression, level))
+    if len(sinks) > 1:
+        return TeeSink(sinks)
+    return sinks[0] if sinks else None
+
+
+class _PluginFeed():
+    """
+    Record sink callable handed to a plugin, writing each record to a RecordSink and counting them
+    """
+
+    def __init__(self, sink, plugin_name):
+        self._sink = sink
+        self._plugin_name = plugin_name
+        self.count = 0
+
+    def __call__(self, record):
+        with self._sink._lock:
+            self._sink._write(self._plugin_name, record)
+        self.count += 1
+
+
+def run_plugin(plugin, sink=None):
+    """
+    Run a plugin: with a sink, plugins that yield records write them to it, and also write
+    their text report if the sink does not replace it. When both are wanted the records are
+    taken from the text report as parse() writes them, so they are only parsed once. Every
+    other plugin writes its text report.
+    """
+    if sink is not None and plugin.has_records:
+        if sink.replaces_text or not plugin.text_writes_records:
+            count = sink.write_records(type(plugin).__name__, plugin.iter_records())
+            logging.info("%s: %d records written.", plugin.get_name, count)
+            if sink.replaces_text:
+                return
+        else:
+            feed = _PluginFeed(sink, type(plugin).__name__)
+            plugin.set_record_sink(feed)
+            try:
+                plugin.parse()
+            finally:
+                plugin.set_record_sink(None)
+            logging.info("%s: %d records written.", plugin.get_name, feed.count)
+            return
+    plugin.parse()
@@ -0,0 +1,106 @@
+""" Module for opening SQLite databases with the osxripper SQL functions registered """
+import os
+import sqlite3
+import urllib.request
+import riplib.osxripper_time
+import riplib.osxripper_wal
+
+__author__ = 'osxripper'
+__version__ = '0.1'
+__license__ = 'GPLv3'
+
+# name, function; all take a single raw time value and return a date time string
+SQL_TIME_FUNCTIONS = (
+    ("cocoa_to_iso", riplib.osxripper_time.cocoa_to_iso),
+    ("webkit_to_iso", riplib.osxripper_time.webkit_to_iso),
+    ("unix_to_iso", riplib.osxripper_time.unix_to_iso),
+    ("unix_ms_to_iso", riplib.osxripper_time.unix_ms_to_iso),
+    ("unix_us_to_iso", riplib.osxripper_time.unix_us_to_iso),
+)
+
+
+def register_functions(conn):
+    """
+    Register the time conversion functions on an open connection. The functions are
+    flagged deterministic where the Python/SQLite versions allow it so SQLite can
+    factor them out of WHERE and ORDER BY clauses.
+    """
+    for name, function in SQL_TIME_FUNCTIONS:
+        try:
+            conn.create_function(name, 1, function, deterministic=True)
+        except (TypeError, sqlite3.NotSupportedError):
+            # Python < 3.8 or SQLite < 3.8.3
+            conn.create_function(name, 1, function)
+    return conn
+
+
+class SnapshotConnection(sqlite3.Connection):
+    """
+    Connection to a temporary WAL snapshot copy, the copy is removed on close
+    """
+    snapshot_file = None
+
+    def close(self):
+        super().close()
+        if self.snapshot_file is not None and os.path.isfile(self.snapshot_file):
+            os.remove(self.snapshot_file)
+            self.snapshot_file = None
+
+
+def _uri_path(path):
+    """
+    Return the absolute path of a file escaped for a file: URI, so "?", "#" or "%" in it are
+    not taken as URI syntax
+    """
+    return urllib.request.pathname2url(os.path.abspath(path))
+
+
+def _connect_copy(snapshot_file):
+    """
+    Open a snapshot copy read-only
+    """
+    conn = sqlite3.connect("file:{0}?mode=ro".format(_uri_path(snapshot_file)), uri=True, factory=SnapshotConnection)
+    conn.snapshot_file = snapshot_file
+    conn.row_factory = sqlite3.Row
+    return register_functions(conn)
+
+
+def connect(database_file):
+    """
+    Open a database with sqlite3.Row rows and the time functions registered.
+    If the database has a -wal file the newest committed state is rebuilt in a temporary
+    copy and that is opened instead. Otherwise, or when the -wal cannot be used, the database
+    itself is opened read-only and immutable, so the evidence is never checkpointed or modified.
+    """
+    try:
+        snapshot_file = riplib.osxripper_wal.snapshot_copy(database_file)
+    except (OSError, riplib.osxripper_wal.WalError):
+        snapshot_file = None
+    if snapshot_file is not None:
+        return _connect_copy(snapshot_file)
+    # immutable: SQLite neither writes, locks, recovers nor checkpoints the file or its -wal
+    conn = sqlite3.connect("file:{0}?mode=ro&immutable=1".format(_uri_path(database_file)), uri=True)
+    conn.row_factory = sqlite3.Row
+    return register_functions(conn)
+
+
+def wal_snapshots(database_file):
+    """
+    Return the WalSnapshot list for the -wal beside database_file, empty if there is none
+    """
+    wal_path = riplib.osxripper_wal.wal_path_for(database_file)
+    if wal_path is None:
+        return []
+    with riplib.osxripper_wal.WalFile(wal_path) as wal_file:
+        return wal_file.snapshots()
+
+
+def connect_snapshot(database_file, snapshot_index):
+    """
+    Open one WAL snapshot of database_file, committed or not, read-only. Raises WalError if
+    database_file has no usable -wal.
+    """
+    snapshot_file = riplib.osxripper_wal.snapshot_copy(database_file, snapshot_index)
+    if snapshot_file is None:
+        raise riplib.osxripper_wal.WalError("no usable -wal for {0}".format(database_file))
+    return _connect_copy(snapshot_file)
@@ -0,0 +1,160 @@
+""" Module for parsing BSD syslog lines, as written to system.log, into typed records """
+import datetime
+import re
+from riplib.osxripper_records import INT, TEXT, TIME, record_type
+
+__author__ = 'osxripper'
+__version__ = '0.1'
+__license__ = 'GPLv3'
+
+MONTHS = {"Jan": 1, "Feb": 2, "Mar": 3, "Apr": 4, "May": 5, "Jun": 6,
+          "Jul": 7, "Aug": 8, "Sep": 9, "Oct": 10, "Nov": 11, "Dec": 12}
+
+# "Oct  1 10:00:00 host process[pid] (sender): message", the host, process and pid are missing
+# from lines such as "Oct  1 10:00:00 --- last message repeated 2 times ---"
+LINE_PATTERN = re.compile(r"(?P<month>" + "|".join(MONTHS) + r") +(?P<day>\d{1,2}) (?P<hour>\d\d):(?P<minute>\d\d):(?P<second>\d\d) "
+                          r"(?:(?P<host>\S+) (?P<process>[^\s\[:]+)(?:\[(?P<pid>\d+)\])?"
+                          r"(?: \((?P<sender>[^)]*)\))?: )?(?P<message>.*)")
+
+SyslogRecord = record_type("SyslogRecord", (
+    ("time", "Time", TIME),
+    ("host", "Host", TEXT),
+    ("process", "Process", TEXT),
+    ("pid", "PID", INT),
+    ("sender", "Sender", TEXT),
+    ("message", "Message", TEXT),
+    ("source", None, TEXT),
+))
+
+def parse_pattern(text):
+    """
+    Check a --syslog-grep command line value compiles as a regular expression
+    """
+    try:
+        re.compile(text)
+    except re.error as error:
+        raise ValueError("not a regular expression: {0}: {1}".format(text, error))
+    return text
+
+
+def line_filter(processes=None, pattern=None, since=None, until=None):
+    """
+    Return a LineFilter for the process names, compiled message pattern and since/until window,
+    see Plugin.set_syslog_filter, None if nothing is filtered
+    """
+    if processes is None and pattern is None and since is None and until is None:
+        return None
+    return LineFilter(processes, pattern, since, until)
+
+
+class LineFilter():
+    """
+    Test syslog lines against process names, a message pattern and a time window. Syslog times
+    are the local time of the Mac and are compared with the window as they are.
+    """
+
+    def __init__(self, processes=None, pattern=None, since=None, until=None):
+        self.processes = processes
+        self.pattern = pattern
+        self.since = since
+        self.until = until
+
+    def __str__(self):
+        parts = []
+        if self.processes is not None:
+            parts.append("process {0}".format(", ".join(sorted(self.processes))))
+        if self.pattern is not None:
+            parts.append("message matching {0}".format(self.pattern.pattern))
+        if self.since is not None or self.until is not None:
+            parts.append("time {0} - {1}".format(self.since, self.until))
+        return "; ".join(parts)
+
+    def wants_process(self, process):
+        """
+        Return True if lines of process can pass, checked before a line is built into a record
+        """
+        return self.processes is None or process in self.processes
+
+    def matches(self, record):
+        """
+        Return True if record passes the message pattern and time window
+        """
+        if self.pattern is not None and self.pattern.search(record.message) is None:
+            return False
+        if record.time is not None:
+            if self.since is not None and record.time < self.since:
+                return False
+            if self.until is not None and record.time > self.until:
+                return False
+        return True
+
+
+class YearInference():
+    """
+    Supply the year BSD syslog timestamps leave out. The first line is given the year of the
+    reference time, the modification time of the first log read, or the year before when its
+    month is later than the reference month. From there the year goes up each time the month
+    goes back, so one YearInference carries the year across rotated logs read oldest first.
+    """
+
+    def __init__(self, reference):
+        self._reference = reference
+        self._year = None
+        self._month = None
+
+    def year(self, month):
+        """
+        Return the year of a line logged in month
+        """
+        if self._year is None:
+            self._year = self._reference.year - (1 if month > self._reference.month else 0)
+        elif month < self._month:
+            self._year += 1
+        self._month = month
+        return self._year
+
+
+def _record(match, continuation, year, source):
+    """
+    Build a SyslogRecord from a line match, its continuation lines and the inferred year
+    """
+    try:
+        date_time = datetime.datetime(year, MONTHS[match.group("month")], int(match.group("day")),
+                                      int(match.group("hour")), int(match.group("minute")), int(match.group("second")))
+    except ValueError:
+        date_time = None
+    message = match.group("message")
+    if continuation:
+        message = "\n".join([message] + continuation)
+    pid = match.group("pid")
+    return SyslogRecord(date_time, match.group("host"), match.group("process"),
+                        int(pid) if pid is not None else None, match.group("sender"), message, source)
+
+
+def parse_lines(lines, source, years, filter_lines=None):
+    """
+    Yield a SyslogRecord for each line of an iterable of text lines, streaming. Lines that do not
+    start with a timestamp continue the message of the line before. years is the YearInference
+    shared by the logs of one directory, filter_lines an optional LineFilter; lines of other
+    processes are skipped before a record is built.
+    """
+    pending = None  # (match, continuation lines, year) of the line being collected
+    for line in lines:
+        line = line.rstrip("\r\n")
+        match = LINE_PATTERN.match(line)
+        if match is None:
+            if pending is not None:
+                pending[1].append(line)
+            continue
+        if pending is not None:
+            record = _record(pending[0], pending[1], pending[2], source)
+            if filter_lines is None or filter_lines.matches(record):
+                yield record
+            pending = None
+        year = years.year(MONTHS[match.group("month")])
+        if filter_lines is None or filter_lines.wants_process(match.group("process")):
+            pending = (match, [], year)
+    if pending is not None:
+        record = _record(pending[0], pending[1], pending[2], source)
+        if filter_lines is None or filter_lines.matches(record):
+            yield record
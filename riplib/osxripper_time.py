@@ -1,11 +1,29 @@
 """ Module for converting time formats """
 import datetime
+import math
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 COCOA_EPOCH = datetime.datetime(2001, 1, 1)
 UNIX_EPOCH = datetime.datetime(1970, 1, 1)
 GREGORIAN_1601 = datetime.datetime(1601, 1, 1)
 
+NOT_A_DATE = "[ERROR] Not a date value: None"
+UNKNOWN_DATE = "[ERROR] unknown date value: {0}"
+
+# microseconds per unit of the raw value
+SECONDS = 1000000
+MILLIS = 1000
+MICROS = 1
+
+_ONE_MICRO = datetime.timedelta(microseconds=1)
+# range of datetime.datetime expressed as Unix epoch microseconds
+_MIN_MICROS = (datetime.datetime.min - UNIX_EPOCH) // _ONE_MICRO
+_MAX_MICROS = (datetime.datetime.max - UNIX_EPOCH) // _ONE_MICRO
+
 
 def get_gregorian_seconds(delta_date):
     """
@@ -15,9 +33,9 @@ def get_gregorian_seconds(delta_date):
         try:
             return GREGORIAN_1601 + datetime.timedelta(seconds=delta_date)
         except OverflowError:
-            "[ERROR] unknown date value: {0}".format(delta_date)
+            return UNKNOWN_DATE.format(delta_date)
     else:
-        return "[ERROR] Not a date value: None"
+        return NOT_A_DATE
 
 
 def get_gregorian_micros(delta_date):
@@ -28,9 +46,9 @@ def get_gregorian_micros(delta_date):
         try:
             return GREGORIAN_1601 + datetime.timedelta(microseconds=delta_date)
         except OverflowError:
-            "[ERROR] unknown date value: {0}".format(delta_date)
+            return UNKNOWN_DATE.format(delta_date)
     else:
-        return "[ERROR] Not a date value: None"
+        return NOT_A_DATE
 
 
 def get_gregorian_millis(delta_date):
@@ -41,9 +59,9 @@ def get_gregorian_millis(delta_date):
         try:
             return GREGORIAN_1601 + datetime.timedelta(milliseconds=delta_date)
         except OverflowError:
-            "[ERROR] unknown date value: {0}".format(delta_date)
+            return UNKNOWN_DATE.format(delta_date)
     else:
-        return "[ERROR] Not a date value: None"
+        return NOT_A_DATE
 
 
 def get_unix_seconds(delta_date):
@@ -54,9 +72,9 @@ def get_unix_seconds(delta_date):
         try:
             return UNIX_EPOCH + datetime.timedelta(seconds=delta_date)
         except OverflowError:
-            "[ERROR] unknown date value: {0}".format(delta_date)
+            return UNKNOWN_DATE.format(delta_date)
     else:
-        return "[ERROR] Not a date value: None"
+        return NOT_A_DATE
 
 
 def get_unix_micros(delta_date):
@@ -67,9 +85,9 @@ def get_unix_micros(delta_date):
         try:
             return UNIX_EPOCH + datetime.timedelta(microseconds=delta_date)
         except OverflowError:
-            "[ERROR] unknown date value: {0}".format(delta_date)
+            return UNKNOWN_DATE.format(delta_date)
     else:
-        return "[ERROR] Not a date value: None"
+        return NOT_A_DATE
 
 
 def get_unix_millis(delta_date):
@@ -80,9 +98,9 @@ def get_unix_millis(delta_date):
         try:
             return UNIX_EPOCH + datetime.timedelta(milliseconds=delta_date)
         except OverflowError:
-            "[ERROR] unknown date value: {0}".format(delta_date)
+            return UNKNOWN_DATE.format(delta_date)
     else:
-        return "[ERROR] Not a date value: None"
+        return NOT_A_DATE
 
 
 def get_cocoa_millis(delta_date):
@@ -93,9 +111,9 @@ def get_cocoa_millis(delta_date):
         try:
             return COCOA_EPOCH + datetime.timedelta(milliseconds=delta_date)
         except OverflowError:
-            "[ERROR] unknown date value: {0}".format(delta_date)
+            return UNKNOWN_DATE.format(delta_date)
     else:
-        return "[ERROR] Not a date value: None"
+        return NOT_A_DATE
 
 
 def get_cocoa_seconds(delta_date):
@@ -106,6 +124,210 @@ def get_cocoa_seconds(delta_date):
         try:
             return COCOA_EPOCH + datetime.timedelta(seconds=delta_date)
         except OverflowError:
-            "[ERROR] unknown date value: {0}".format(delta_date)
+            return UNKNOWN_DATE.format(delta_date)
     else:
-        return "[ERROR] Not a date value: None"
+        return NOT_A_DATE
+
+
+def _delta_to_iso(epoch, delta_date, unit):
+    """
+    Format an epoch delta the same way as str() of the get_* functions above
+    """
+    if delta_date is None:
+        return NOT_A_DATE
+    try:
+        return str(epoch + datetime.timedelta(**{unit: delta_date}))
+    except (OverflowError, TypeError, ValueError):
+        return UNKNOWN_DATE.format(delta_date)
+
+
+def cocoa_to_iso(delta_date):
+    """
+    SQLite function: Cocoa (2001-01-01) seconds to a date time string
+    """
+    return _delta_to_iso(COCOA_EPOCH, delta_date, "seconds")
+
+
+def webkit_to_iso(delta_date):
+    """
+    SQLite function: WebKit/Chrome (1601-01-01) microseconds to a date time string
+    """
+    return _delta_to_iso(GREGORIAN_1601, delta_date, "microseconds")
+
+
+def unix_to_iso(delta_date):
+    """
+    SQLite function: Unix seconds to a date time string
+    """
+    return _delta_to_iso(UNIX_EPOCH, delta_date, "seconds")
+
+
+def unix_ms_to_iso(delta_date):
+    """
+    SQLite function: Unix milliseconds to a date time string
+    """
+    return _delta_to_iso(UNIX_EPOCH, delta_date, "milliseconds")
+
+
+def unix_us_to_iso(delta_date):
+    """
+    SQLite function: Unix microseconds (Firefox PRTime) to a date time string
+    """
+    return _delta_to_iso(UNIX_EPOCH, delta_date, "microseconds")
+
+
+def _parse_time(text):
+    """
+    Return (datetime, format) for a --since/--until command line value
+    """
+    text = text.strip().replace("T", " ")
+    for time_format in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.datetime.strptime(text, time_format), time_format
+        except ValueError:
+            pass
+    raise ValueError("not a date value: {0}".format(text))
+
+
+def parse_time_argument(text):
+    """
+    Parse a --since/--until command line value, "YYYY-MM-DD" optionally followed by
+    " HH:MM" or " HH:MM:SS" (or with a "T" separator), taken as UTC
+    """
+    return _parse_time(text)[0]
+
+
+def parse_until_argument(text):
+    """
+    Parse a --until command line value like parse_time_argument, taken as the last instant it
+    names: a date alone is the end of that day, 23:59:59.999999, and a time without seconds
+    the end of that minute, so the whole day or minute is inside the window
+    """
+    date_time, time_format = _parse_time(text)
+    if time_format == "%Y-%m-%d":
+        return date_time + datetime.timedelta(days=1) - _ONE_MICRO
+    if time_format == "%Y-%m-%d %H:%M":
+        return date_time + datetime.timedelta(minutes=1) - _ONE_MICRO
+    return date_time
+
+
+def from_datetime(date_time, epoch=UNIX_EPOCH, unit=SECONDS):
+    """
+    Convert a datetime to a raw value counted in unit from epoch, the inverse of the get_* functions
+    """
+    return (date_time - epoch) // datetime.timedelta(microseconds=unit)
+
+
+def until_bound(date_time, epoch=UNIX_EPOCH, unit=SECONDS):
+    """
+    Convert the last instant of a window to the raw value, counted in unit from epoch, that the
+    raw values inside the window are strictly less than. The bound is exact, an int when it is
+    a whole number of units, so fractional raw values in the last second are not lost.
+    """
+    end = date_time + _ONE_MICRO - epoch
+    unit_delta = datetime.timedelta(microseconds=unit)
+    if end % unit_delta:
+        return end / unit_delta
+    return end // unit_delta
+
+
+def _micros_to_str(micros):
+    """
+    Format Unix epoch microseconds the same way as str() of a datetime
+    """
+    return str(UNIX_EPOCH + datetime.timedelta(microseconds=micros))
+
+
+def _py_unix_micros(values, epoch, unit):
+    """
+    Pure Python batch conversion, one int per value or None when it is not a valid date
+    """
+    offset = (epoch - UNIX_EPOCH) // _ONE_MICRO
+    converted = []
+    append = converted.append
+    for value in values:
+        if isinstance(value, int):
+            micros = value * unit + offset
+        elif isinstance(value, float) and value == value and value not in (float("inf"), float("-inf")):
+            whole = math.floor(value)
+            micros = int(whole) * unit + int(round((value - whole) * unit)) + offset
+        else:
+            append(None)
+            continue
+        append(micros if _MIN_MICROS <= micros <= _MAX_MICROS else None)
+    return converted
+
+
+def _np_unix_micros(values, epoch, unit):
+    """
+    numpy batch conversion, returns (int64 micros array, valid mask) or None if the
+    values are not all ints or all floats (i.e. contain None, text or a mix of the two)
+    """
+    try:
+        raw = numpy.asarray(values)
+    except (TypeError, ValueError):
+        return None
+    offset = (epoch - UNIX_EPOCH) // _ONE_MICRO
+    low = (_MIN_MICROS - offset) / unit
+    high = (_MAX_MICROS - offset) / unit
+    if raw.dtype.kind in "iu":
+        raw = raw.astype(numpy.int64)
+        valid = (raw >= int(low)) & (raw <= int(high))
+        micros = numpy.where(valid, raw, 0) * unit + offset
+    elif raw.dtype.kind == "f" and all([isinstance(value, (float, numpy.floating)) for value in values]):
+        # ints mixed in with floats were cast to float64 by asarray, which drops the low digits
+        # of WebKit microsecond values, so only inputs that were floats to begin with come here
+        valid = numpy.isfinite(raw) & (raw >= low) & (raw <= high)
+        raw = numpy.where(valid, raw, 0.0)
+        # split off the whole units first so the fraction is rounded the way timedelta does
+        whole = numpy.floor(raw)
+        micros = whole.astype(numpy.int64) * unit + numpy.rint((raw - whole) * unit).astype(numpy.int64) + offset
+    else:
+        return None
+    return micros, valid
+
+
+def batch_unix_micros(values, epoch=UNIX_EPOCH, unit=SECONDS):
+    """
+    Convert a sequence of raw time values to Unix epoch microseconds.
+    epoch is one of COCOA_EPOCH, UNIX_EPOCH or GREGORIAN_1601 (WebKit/Chrome), unit is
+    SECONDS, MILLIS or MICROS. Returns a list, None where a value is None or not a valid date.
+    """
+    if numpy is not None:
+        converted = _np_unix_micros(values, epoch, unit)
+        if converted is not None:
+            micros, valid = converted
+            result = micros.tolist()
+            for index in numpy.flatnonzero(~valid).tolist():
+                result[index] = None
+            return result
+    return _py_unix_micros(values, epoch, unit)
+
+
+def batch_iso(values, epoch=UNIX_EPOCH, unit=SECONDS):
+    """
+    Convert a sequence of raw time values to date time strings formatted as the
+    get_* functions are. None values give NOT_A_DATE, invalid values UNKNOWN_DATE.
+    """
+    if not isinstance(values, (list, tuple)):
+        values = list(values)
+    converted = None
+    if numpy is not None:
+        converted = _np_unix_micros(values, epoch, unit)
+    if converted is not None:
+        micros, valid = converted
+        text = numpy.datetime_as_string(micros.astype("datetime64[us]")).tolist()
+        result = [item.replace("T", " ").replace(".000000", "") for item in text]
+        for index in numpy.flatnonzero(~valid).tolist():
+            result[index] = UNKNOWN_DATE.format(values[index])
+        return result
+    result = []
+    append = result.append
+    for value, micros in zip(values, _py_unix_micros(values, epoch, unit)):
+        if micros is not None:
+            append(_micros_to_str(micros))
+        elif value is None:
+            append(NOT_A_DATE)
+        else:
+            append(UNKNOWN_DATE.format(value))
+    return result
@@ -0,0 +1,149 @@
+""" Module for building a super-timeline from plugin records with an external merge sort """
+import csv
+import heapq
+import os
+import shutil
+import tempfile
+import riplib.osxripper_records
+
+__author__ = 'osxripper'
+__version__ = '0.1'
+__license__ = 'GPLv3'
+
+RUN_SIZE = 250000  # events sorted in memory before a run is written to disk
+MERGE_WIDTH = 128  # runs merged at once, wider merges are done in passes
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"  # fixed width so events sort as strings
+COLUMNS = ("timestamp", "plugin", "record_type", "event", "user", "source", "description")
+
+
+def record_events(plugin_name, record):
+    """
+    Yield an event tuple, in COLUMNS order, for each TIME field of record holding a date. The
+    description joins the record's other labelled fields.
+    """
+    times = []
+    details = []
+    for value, kind, label in zip(record, record._kinds, record._labels):
+        if kind == riplib.osxripper_records.TIME:
+            date_time = riplib.osxripper_records.to_datetime(value)
+            if date_time is not None:
+                times.append((date_time, label))
+        elif label is not None and value is not None and value != "":
+            details.append("{0}: {1}".format(label, riplib.osxripper_records.typed_value(value, kind)))
+    if not times:
+        return
+    fields = dict(zip(record._fields, record))
+    user = fields.get("user") or ""
+    source = fields.get("source") or ""
+    description = "; ".join(details)
+    for date_time, label in times:
+        yield (date_time.strftime(TIME_FORMAT), plugin_name, type(record).__name__, label, user, source, description)
+
+
+def write_run(path, items):
+    """
+    Write sorted tuples of strings to a run file an ExternalSorter can merge
+    """
+    with open(path, "w", encoding="utf-8", newline="") as run_file:
+        csv.writer(run_file).writerows(items)
+
+
+class ExternalSorter():
+    """
+    Sort an unbounded stream of string tuples with bounded memory: tuples are collected into
+    runs of RUN_SIZE, each run is sorted and written to a CSV file in a spool directory, and
+    the runs are then k-way merged MERGE_WIDTH at a time until one sorted stream is left.
+    """
+
+    def __init__(self, spool_parent, run_size=RUN_SIZE, merge_width=MERGE_WIDTH):
+        self._spool_dir = tempfile.mkdtemp(prefix="_osxripper_spool.", dir=spool_parent)
+        self._run_size = run_size
+        self._merge_width = max(2, merge_width)
+        self._buffer = []
+        self._runs = []
+        self._run_count = 0
+        self.count = 0
+
+    def add(self, item):
+        """
+        Add a tuple of strings
+        """
+        self._buffer.append(item)
+        self.count += 1
+        if len(self._buffer) >= self._run_size:
+            self._spill()
+
+    def _spill(self):
+        """
+        Sort the buffered tuples and write them out as a run
+        """
+        if self._buffer:
+            self._buffer.sort()
+            self._runs.append(self._write_run(self._buffer))
+            self._buffer = []
+
+    def _write_run(self, items):
+        """
+        Write sorted tuples to a new run file and return its path
+        """
+        path = self.run_path()
+        write_run(path, items)
+        return path
+
+    def run_path(self):
+        """
+        Return the path of a new run file in the spool directory, for runs written elsewhere,
+        such as in a worker process with write_run, and then given to add_run
+        """
+        path = os.path.join(self._spool_dir, "run_{0:06d}.csv".format(self._run_count))
+        self._run_count += 1
+        return path
+
+    def add_run(self, path, count):
+        """
+        Add a run file of count tuples, sorted, written with write_run to a path from run_path
+        """
+        self._runs.append(path)
+        self.count += count
+
+    @staticmethod
+    def _read_run(path):
+        """
+        Yield the tuples of a run file
+        """
+        with open(path, "r", encoding="utf-8", newline="") as run_file:
+            for row in csv.reader(run_file):
+                yield tuple(row)
+
+    def sorted_items(self):
+        """
+        Yield every tuple added, in sorted order. Runs are removed once a merge pass has read
+        them and the spool directory is removed when the iteration finishes.
+        """
+        try:
+            if not self._runs:
+                self._buffer.sort()
+                yield from self._buffer
+                self._buffer = []
+                return
+            self._spill()
+            runs = self._runs
+            while len(runs) > self._merge_width:
+                merged = []
+                for start in range(0, len(runs), self._merge_width):
+                    group = runs[start:start + self._merge_width]
+                    merged.append(self._write_run(heapq.merge(*[self._read_run(run) for run in group])))
+                    for run in group:
+                        os.remove(run)
+                runs = merged
+            self._runs = []
+            yield from heapq.merge(*[self._read_run(run) for run in runs])
+        finally:
+            self.close()
+
+    def close(self):
+        """
+        Remove the spool directory
+        """
+        self._buffer = []
+        shutil.rmtree(self._spool_dir, ignore_errors=True)
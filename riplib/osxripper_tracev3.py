@@ -0,0 +1,600 @@
+""" Module for reading unified logging tracev3 files with their uuidtext and dsc string stores """
+import datetime
+import functools
+import mmap
+import os
+import re
+import struct
+import riplib.osxripper_time
+try:
+    import lz4.block
+except ImportError:
+    lz4 = None
+
+__author__ = 'osxripper'
+__version__ = '0.1'
+__license__ = 'GPLv3'
+
+# chunk tags
+HEADER_TAG = 0x1000
+CATALOG_TAG = 0x600b
+CHUNKSET_TAG = 0x600d
+FIREHOSE_TAG = 0x6001
+
+CHUNK = struct.Struct("<IIQ")  # tag, sub tag, data size
+# mach time numerator and denominator, continuous time, wall time in seconds since the epoch
+HEADER = struct.Struct("<IIQQ")
+# subsystem strings offset, process information offset, process information count, sub chunks
+# offset, sub chunk count, 6 unknown bytes, earliest firehose time
+CATALOG = struct.Struct("<HHHHH6xQ")
+# index, main uuid index, dsc uuid index, first and second process ids, pid, effective uid
+PROCESS = struct.Struct("<H2xHHQIII")
+UUID_INFO_SIZE = 16
+SUBSYSTEM = struct.Struct("<HHH")  # identifier, subsystem string offset, category string offset
+COMPRESSED_BLOCK = struct.Struct("<4sII")  # signature, uncompressed size, compressed size
+RAW_BLOCK = struct.Struct("<4sI")  # signature, size
+# first and second process ids, public data size (counted from the base time), private data
+# virtual offset, base continuous time
+FIREHOSE = struct.Struct("<QI4xHH4xQ")
+FIREHOSE_PUBLIC_START = 16  # public data size counts the 16 bytes before the tracepoints
+# activity type, log type, flags, format string location, thread id, time delta low and high, data size
+TRACEPOINT = struct.Struct("<BBHIQIHH")
+UUIDTEXT = struct.Struct("<IIII")  # signature, major version, minor version, entry count
+UUIDTEXT_SIGNATURE = 0x66778899
+DSC = struct.Struct("<4sHHII")  # signature, major version, minor version, range count, uuid count
+DSC_SIGNATURE = b"hcsd"
+
+LOG_ACTIVITY = 0x4
+LOG_TYPES = {0x00: "Default", 0x01: "Info", 0x02: "Debug", 0x10: "Error", 0x11: "Fault"}
+
+# tracepoint flags
+HAS_CURRENT_AID = 0x0001
+FORMATTER_MASK = 0x000e
+MAIN_EXE = 0x0002
+SHARED_CACHE = 0x0004
+ABSOLUTE = 0x0008
+UUID_RELATIVE = 0x000a
+LARGE_SHARED_CACHE = 0x000c
+HAS_LARGE_OFFSET = 0x0020
+HAS_PRIVATE_DATA = 0x0100
+HAS_SUBSYSTEM = 0x0200
+HAS_RULES = 0x0400
+HAS_DATA_REF = 0x0800
+
+PRIVATE = "<private>"
+FORMAT_PATTERN = re.compile(r"%(?:\{(?P<annotation>[^}]*)\})?(?P<flags>[-+ #0']*)(?P<width>\*|\d+)?"
+                            r"(?:\.(?P<precision>\*|\d+))?(?P<length>hh|h|ll|l|j|z|t|L|q)?(?P<conversion>[%@a-zA-Z])")
+
+
+def lz4_decompress(data, size, previous=b""):
+    """
+    Decompress one LZ4 block of size bytes. previous is the output of the blocks before it,
+    which later blocks may copy from. Uses the lz4 package when it is installed.
+    """
+    if lz4 is not None:
+        return lz4.block.decompress(data, uncompressed_size=size, dict=previous[-65536:])
+    output = bytearray(previous)
+    start_size = len(output)
+    position = 0
+    end = len(data)
+    while position < end:
+        token = data[position]
+        position += 1
+        length = token >> 4
+        if length == 15:
+            while True:
+                extra = data[position]
+                position += 1
+                length += extra
+                if extra != 255:
+                    break
+        output += data[position:position + length]
+        position += length
+        if position >= end:
+            break
+        offset = data[position] | data[position + 1] << 8
+        position += 2
+        if offset == 0 or offset > len(output):
+            raise ValueError("bad LZ4 match offset {0}".format(offset))
+        length = token & 15
+        if length == 15:
+            while True:
+                extra = data[position]
+                position += 1
+                length += extra
+                if extra != 255:
+                    break
+        length += 4
+        match_start = len(output) - offset
+        if offset >= length:
+            output += output[match_start:match_start + length]
+        else:
+            # the match overlaps the bytes it produces, repeat the pattern
+            pattern = output[match_start:]
+            output += (pattern * (length // offset + 1))[:length]
+    return bytes(output[start_size:])
+
+
+def decompress_chunkset(data):
+    """
+    Return the decompressed contents of a chunkset: a run of "bv41" LZ4 blocks or "bv4-"
+    uncompressed blocks ending with "bv4$"
+    """
+    output = b""
+    position = 0
+    while position + 4 <= len(data):
+        signature = bytes(data[position:position + 4])
+        if signature == b"bv41":
+            _, size, compressed_size = COMPRESSED_BLOCK.unpack_from(data, position)
+            position += COMPRESSED_BLOCK.size
+            output += lz4_decompress(bytes(data[position:position + compressed_size]), size, output)
+            position += compressed_size
+        elif signature == b"bv4-":
+            _, size = RAW_BLOCK.unpack_from(data, position)
+            position += RAW_BLOCK.size
+            output += bytes(data[position:position + size])
+            position += size
+        else:
+            break
+    return output
+
+
+def _padded(size):
+    """
+    Return size rounded up to a multiple of 8
+    """
+    return (size + 7) & ~7
+
+
+def iter_chunks(data, position=0, end=None):
+    """
+    Yield (tag, start of data, data size) for each chunk of data from position, chunks are
+    8 byte aligned
+    """
+    end = len(data) if end is None else end
+    while position + CHUNK.size <= end:
+        tag, _, size = CHUNK.unpack_from(data, position)
+        start = position + CHUNK.size
+        if start + size > end:
+            break
+        yield tag, start, size
+        position = start + _padded(size)
+
+
+def _uuid_hex(data, position):
+    """
+    Return the 16 byte UUID at position as 32 upper case hex digits
+    """
+    return bytes(data[position:position + 16]).hex().upper()
+
+
+def _c_string(data, position, end=None):
+    """
+    Return the NUL terminated string at position
+    """
+    end = len(data) if end is None else end
+    stop = data.find(b"\x00", position, end)
+    if stop < 0:
+        stop = end
+    return bytes(data[position:stop]).decode("utf-8", "replace")
+
+
+class Catalog():
+    """
+    The processes and subsystems a tracev3 catalog chunk describes. processes maps (first,
+    second) process ids to (pid, effective uid, main uuid, dsc uuid, {subsystem id: (subsystem,
+    category)}) and uuids lists the catalog UUIDs by index.
+    """
+
+    def __init__(self, data, start, size):
+        (strings_offset, process_offset, process_count, _, _, _) = CATALOG.unpack_from(data, start)
+        base = start + CATALOG.size
+        end = start + size
+        self.uuids = [_uuid_hex(data, base + index * 16) for index in range(strings_offset // 16)]
+        strings_start = base + strings_offset
+        strings_end = base + process_offset
+        self.processes = {}
+        position = strings_end
+        for _ in range(process_count):
+            if position + PROCESS.size + 12 > end:
+                break
+            _, main_index, dsc_index, first_id, second_id, pid, euid = PROCESS.unpack_from(data, position)
+            position += PROCESS.size + 4  # unknown
+            uuid_count, = struct.unpack_from("<I", data, position)
+            position += 8 + uuid_count * UUID_INFO_SIZE
+            subsystem_count, = struct.unpack_from("<I", data, position)
+            position += 8
+            subsystems = {}
+            for _ in range(subsystem_count):
+                identifier, subsystem_offset, category_offset = SUBSYSTEM.unpack_from(data, position)
+                subsystems[identifier] = (_c_string(data, strings_start + subsystem_offset, strings_end),
+                                          _c_string(data, strings_start + category_offset, strings_end))
+                position += SUBSYSTEM.size
+            position += _padded(subsystem_count * SUBSYSTEM.size) - subsystem_count * SUBSYSTEM.size
+            self.processes[(first_id, second_id)] = (pid, euid, self.uuid(main_index), self.uuid(dsc_index),
+                                                     subsystems)
+
+    def uuid(self, index):
+        """
+        Return catalog UUID index, None if there is none
+        """
+        return self.uuids[index] if 0 <= index < len(self.uuids) else None
+
+
+@functools.lru_cache(maxsize=1024)
+def load_uuidtext(path):
+    """
+    Return (ranges, library path) of a uuidtext file, ranges being (start, size, string data)
+    for each format string range, None if the file cannot be read. Cached, so each worker
+    process reads a file once.
+    """
+    try:
+        with open(path, "rb") as uuidtext_file:
+            data = uuidtext_file.read()
+    except OSError:
+        return None
+    if len(data) < UUIDTEXT.size:
+        return None
+    signature, _, _, count = UUIDTEXT.unpack_from(data, 0)
+    if signature != UUIDTEXT_SIGNATURE:
+        return None
+    position = UUIDTEXT.size + count * 8
+    ranges = []
+    for index in range(count):
+        start, size = struct.unpack_from("<II", data, UUIDTEXT.size + index * 8)
+        ranges.append((start, size, data[position:position + size]))
+        position += size
+    return ranges, _c_string(data, position)
+
+
+@functools.lru_cache(maxsize=64)
+def load_dsc(path):
+    """
+    Return the ranges of a shared cache (dsc) strings file as (start, size, string data, library
+    path), None if the file cannot be read. Cached, so each worker process reads a file once.
+    """
+    try:
+        with open(path, "rb") as dsc_file:
+            data = dsc_file.read()
+    except OSError:
+        return None
+    if len(data) < DSC.size:
+        return None
+    signature, major, _, range_count, uuid_count = DSC.unpack_from(data, 0)
+    if signature != DSC_SIGNATURE:
+        return None
+    if major >= 2:
+        range_struct, uuid_struct = struct.Struct("<QIIQ"), struct.Struct("<QI16sI")
+    else:
+        range_struct, uuid_struct = struct.Struct("<IIII"), struct.Struct("<II16sI")
+    range_entries = []
+    position = DSC.size
+    for _ in range(range_count):
+        range_entries.append(range_struct.unpack_from(data, position))
+        position += range_struct.size
+    libraries = []
+    for _ in range(uuid_count):
+        _, _, _, path_offset = uuid_struct.unpack_from(data, position)
+        libraries.append(_c_string(data, path_offset))
+        position += uuid_struct.size
+    ranges = []
+    for entry in range_entries:
+        if major >= 2:
+            start, data_offset, size, uuid_index = entry
+        else:
+            uuid_index, start, data_offset, size = entry
+        library = libraries[uuid_index] if uuid_index < len(libraries) else None
+        ranges.append((start, size, data[data_offset:data_offset + size], library))
+    return ranges
+
+
+def _find_string(ranges, location):
+    """
+    Return (format string, range) for a virtual location inside one of ranges, None if none holds it
+    """
+    for entry in ranges:
+        start, size, strings = entry[0], entry[1], entry[2]
+        if start <= location < start + size:
+            return _c_string(strings, location - start), entry
+    return None, None
+
+
+def _uuidtext_path(uuidtext_dir, uuid):
+    """
+    Return the path of the uuidtext file of an image UUID
+    """
+    return os.path.join(uuidtext_dir, uuid[:2], uuid[2:])
+
+
+def _items(data, position, end):
+    """
+    Return the (item type, value) arguments of a tracepoint from position: numbers as bytes,
+    strings and objects as bytes or None when they are private
+    """
+    if position + 2 > end:
+        return []
+    count = data[position + 1]
+    position += 2
+    descriptors = []
+    for _ in range(count):
+        if position + 2 > end:
+            break
+        item_type, size = data[position], data[position + 1]
+        position += 2
+        descriptors.append((item_type, data[position:position + size]))
+        position += size
+    items = []
+    for item_type, value in descriptors:
+        kind = item_type & 0xf0
+        if kind in (0x20, 0x30, 0x40, 0xf0) and len(value) == 4:
+            # strings, data and objects point into the string area after the descriptors
+            offset, size = struct.unpack("<HH", value)
+            private = (item_type & 0xf) in (0x1, 0x5)
+            items.append((item_type, None if private else data[position + offset:position + offset + size]))
+        elif item_type & 0x1 and not value:
+            items.append((item_type, None))
+        else:
+            items.append((item_type, value))
+    return items
+
+
+def _number(value, signed):
+    """
+    Return a little-endian item value as an int
+    """
+    return int.from_bytes(value, "little", signed=signed) if value else 0
+
+
+def format_message(format_string, items):
+    """
+    Fill an os_log format string with the tracepoint arguments. Private arguments show as
+    <private> and specifiers left without an argument are kept as they are.
+    """
+    arguments = iter(items)
+
+    def argument():
+        return next(arguments, None)
+
+    def replace(match):
+        conversion = match.group("conversion")
+        if conversion == "%":
+            return "%"
+        if match.group("width") == "*":
+            argument()
+        precision = match.group("precision")
+        if precision == "*":
+            item = argument()
+            precision = _number(item[1], True) if item is not None and item[1] is not None else None
+        item = argument()
+        if item is None:
+            return match.group(0)
+        item_type, value = item
+        if value is None:
+            return PRIVATE
+        annotation = (match.group("annotation") or "").lower()
+        if conversion in "sS@":
+            text = bytes(value).rstrip(b"\x00").decode("utf-8", "replace")
+            if precision not in (None, "") and str(precision).isdigit():
+                text = text[:int(precision)]
+            return text
+        if conversion in "aAeEfFgG":
+            if len(value) not in (4, 8):
+                return bytes(value).hex()
+            number = struct.unpack("<d" if len(value) == 8 else "<f", value)[0]
+            if conversion in "aA":
+                return number.hex()
+            spec = "." + str(precision) if str(precision).isdigit() else ""
+            return "{0:{1}{2}}".format(number, spec, conversion)
+        if item_type & 0xf0 in (0x20, 0x30, 0x40, 0xf0):
+            return bytes(value).hex()
+        if "bool" in annotation:
+            return "true" if _number(value, False) else "false"
+        if conversion in "di":
+            return str(_number(value, True))
+        if conversion in "uU":
+            return str(_number(value, False))
+        if conversion in "xX":
+            return "{0:{1}}".format(_number(value, False), conversion)
+        if conversion in "oO":
+            return "{0:o}".format(_number(value, False))
+        if conversion in "cC":
+            return chr(_number(value, False))
+        if conversion == "p":
+            return "0x{0:x}".format(_number(value, False))
+        return str(_number(value, True))
+
+    return FORMAT_PATTERN.sub(replace, format_string)
+
+
+def _resolve(flags, location, extra, process, uuidtext_dir):
+    """
+    Return (format string, process image, library) for a tracepoint, the format string is None
+    when its string store is missing
+    """
+    pid, _, main_uuid, dsc_uuid, _ = process
+    image = None
+    if main_uuid is not None:
+        main = load_uuidtext(_uuidtext_path(uuidtext_dir, main_uuid))
+        if main is not None:
+            image = main[1]
+    formatter = flags & FORMATTER_MASK
+    if formatter in (SHARED_CACHE, LARGE_SHARED_CACHE):
+        if dsc_uuid is None:
+            return None, image, None
+        ranges = load_dsc(os.path.join(uuidtext_dir, "dsc", dsc_uuid))
+        if ranges is None:
+            return None, image, None
+        large = extra.get("large_shared_cache", 0) // 2 or extra.get("large_offset", 0)
+        format_string, entry = _find_string(ranges, (large << 32) | location)
+        return format_string, image, entry[3] if entry is not None else None
+    if formatter == UUID_RELATIVE:
+        uuid = extra.get("uuid")
+    elif formatter == ABSOLUTE:
+        uuid = extra.get("catalog_uuid")
+    else:
+        uuid = main_uuid
+    if uuid is None:
+        return None, image, None
+    uuidtext = load_uuidtext(_uuidtext_path(uuidtext_dir, uuid))
+    if uuidtext is None:
+        return None, image, None
+    format_string, _ = _find_string(uuidtext[0], (extra.get("large_offset", 0) << 32) | location)
+    return format_string, image, uuidtext[1]
+
+
+def _log_entry(data, position, end, flags):
+    """
+    Parse the data of a log tracepoint. Returns (extra, subsystem id, items) where extra holds
+    the formatter fields.
+    """
+    extra = {}
+    if flags & HAS_CURRENT_AID:
+        position += 8  # activity id and sentinel
+    if flags & HAS_PRIVATE_DATA:
+        position += 4  # private string range offset and size
+    position += 4  # caller pc
+    formatter = flags & FORMATTER_MASK
+    if flags & HAS_LARGE_OFFSET:
+        extra["large_offset"], = struct.unpack_from("<H", data, position)
+        position += 2
+    if formatter == LARGE_SHARED_CACHE:
+        extra["large_shared_cache"], = struct.unpack_from("<H", data, position)
+        position += 2
+    elif formatter == ABSOLUTE:
+        extra["catalog_index"], = struct.unpack_from("<H", data, position)
+        position += 2
+    elif formatter == UUID_RELATIVE:
+        extra["uuid"] = _uuid_hex(data, position)
+        position += 16
+    subsystem = None
+    if flags & HAS_SUBSYSTEM:
+        subsystem, = struct.unpack_from("<H", data, position)
+        position += 2
+    if flags & HAS_RULES:
+        position += 1
+    if flags & HAS_DATA_REF:
+        position += 2
+    return extra, subsystem, _items(data, position, end)
+
+
+def _firehose_rows(data, start, size, catalog, clock, source, uuidtext_dir, since, until):
+    """
+    Yield the row of each log tracepoint of a firehose chunk
+    """
+    first_id, second_id, public_size, _, base_time = FIREHOSE.unpack_from(data, start)
+    process = catalog.processes.get((first_id, second_id)) if catalog is not None else None
+    if process is None:
+        process = (None, None, None, None, {})
+    position = start + FIREHOSE.size
+    public_end = min(start + size, position + public_size - FIREHOSE_PUBLIC_START)
+    while position + TRACEPOINT.size <= public_end:
+        (activity_type, log_type, flags, location, thread, delta_low, delta_high,
+         data_size) = TRACEPOINT.unpack_from(data, position)
+        entry_start = position + TRACEPOINT.size
+        entry_end = min(entry_start + data_size, public_end)
+        position = entry_start + _padded(data_size)
+        if activity_type == 0:
+            break
+        if activity_type != LOG_ACTIVITY:
+            continue
+        written = clock(base_time + (delta_low | delta_high << 32))
+        if (since is not None and written < since) or (until is not None and written > until):
+            continue
+        try:
+            extra, subsystem_id, items = _log_entry(data, entry_start, entry_end, flags)
+        except struct.error:
+            continue
+        if "catalog_index" in extra and catalog is not None:
+            extra["catalog_uuid"] = catalog.uuid(extra["catalog_index"])
+        format_string, image, library = _resolve(flags, location, extra, process, uuidtext_dir)
+        if format_string is None:
+            message = "[format string not found at 0x{0:x}]".format(location)
+        else:
+            message = format_message(format_string, items)
+        subsystem, category = process[4].get(subsystem_id, (None, None))
+        yield (source, written, LOG_TYPES.get(log_type, str(log_type)), process[0], process[1], thread,
+               os.path.basename(image) if image else None, library, subsystem, category, message)
+
+
+def tracev3_chunksets(path):
+    """
+    Return (chunksets, problem): for each chunkset of a tracev3 file, (header, catalog, start,
+    size), header being the numerator, denominator, continuous and wall time of the file header
+    and catalog the (start, size) of the catalog chunk before the chunkset or None, and None or
+    the reason the file could not be read to the end. The file is memory mapped and only the
+    chunk headers are read, chunkset_rows decodes each chunkset so the chunksets of a file can
+    be spread over worker processes.
+    """
+    chunksets = []
+    try:
+        with open(path, "rb") as tracev3_file:
+            if os.fstat(tracev3_file.fileno()).st_size < CHUNK.size:
+                return chunksets, "too small to be a tracev3 file"
+            with mmap.mmap(tracev3_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                header = None
+                catalog = None
+                for tag, start, size in iter_chunks(data):
+                    if tag == HEADER_TAG:
+                        header = HEADER.unpack_from(data, start)
+                    elif tag == CATALOG_TAG:
+                        catalog = (start, size)
+                    elif tag == CHUNKSET_TAG and header is not None:
+                        chunksets.append((header, catalog, start, size))
+                if header is None:
+                    return chunksets, "no tracev3 header"
+    except (OSError, ValueError, IndexError, struct.error) as error:
+        return chunksets, str(error)
+    return chunksets, None
+
+
+@functools.lru_cache(maxsize=16)
+def load_catalog(path, start, size):
+    """
+    Return the Catalog of the catalog chunk at start of a tracev3 file. Cached, so each worker
+    process reads a catalog once for the chunksets that follow it.
+    """
+    with open(path, "rb") as tracev3_file:
+        tracev3_file.seek(start)
+        data = tracev3_file.read(size)
+    return Catalog(data, 0, len(data))
+
+
+def chunkset_rows(path, header, catalog, start, size, uuidtext_dir, since=None, until=None):
+    """
+    Return (rows, problem): the fields of each log entry of one chunkset of a tracev3 file, as
+    listed by tracev3_chunksets, in UnifiedLogRecord order, skipping entries outside the
+    since/until window (UTC datetimes), and None or the reason the chunkset could not be read
+    to the end. A chunkset decompresses to a bounded size, so the rows held per call stay
+    bounded however large the file. Plain tuples are returned so the function can run in a
+    worker process.
+    """
+    rows = []
+    try:
+        clock = _clock(*header)
+        catalog = load_catalog(path, *catalog) if catalog is not None else None
+        with open(path, "rb") as tracev3_file:
+            tracev3_file.seek(start)
+            chunkset = decompress_chunkset(tracev3_file.read(size))
+        for inner_tag, inner_start, inner_size in iter_chunks(chunkset):
+            if inner_tag == FIREHOSE_TAG:
+                rows.extend(_firehose_rows(chunkset, inner_start, inner_size, catalog, clock,
+                                           path, uuidtext_dir, since, until))
+    except (OSError, ValueError, IndexError, struct.error) as error:
+        return rows, str(error)
+    return rows, None
+
+
+def _clock(numerator, denominator, header_time, wall_seconds):
+    """
+    Return a function converting continuous (mach) time to a UTC datetime, anchored on the
+    wall clock time of the file header
+    """
+    numerator = numerator or 1
+    denominator = denominator or 1
+    anchor = riplib.osxripper_time.UNIX_EPOCH + datetime.timedelta(seconds=wall_seconds)
+
+    def clock(continuous_time):
+        nanoseconds = (continuous_time - header_time) * numerator // denominator
+        return anchor + datetime.timedelta(microseconds=nanoseconds // 1000)
+
+    return clock
@@ -0,0 +1,255 @@
+""" Module for reading SQLite write-ahead log (-wal) files without modifying the evidence """
+import array
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+
+__author__ = 'osxripper'
+__version__ = '0.1'
+__license__ = 'GPLv3'
+
+WAL_MAGIC_LE = 0x377f0682  # checksums computed on little-endian words
+WAL_MAGIC_BE = 0x377f0683  # checksums computed on big-endian words
+WAL_HEADER_SIZE = 32
+FRAME_HEADER_SIZE = 24
+
+_WAL_HEADER = struct.Struct(">IIIIIIII")
+_FRAME_HEADER = struct.Struct(">IIIIII")
+
+
+class WalError(Exception):
+    """
+    Raised when a file is not a usable SQLite WAL file
+    """
+
+
+class WalFrame():
+    """
+    One frame of a WAL file: a page image plus its header values
+    """
+    __slots__ = ("index", "page_number", "commit_size", "offset", "salt_valid", "checksum_valid")
+
+    def __init__(self, index, page_number, commit_size, offset, salt_valid, checksum_valid):
+        self.index = index
+        self.page_number = page_number
+        self.commit_size = commit_size  # database size in pages for a commit frame, otherwise 0
+        self.offset = offset  # offset of the page data in the WAL file
+        self.salt_valid = salt_valid
+        self.checksum_valid = checksum_valid
+
+    @property
+    def is_commit(self):
+        """
+        Return True if this frame ends a transaction
+        """
+        return self.commit_size != 0
+
+    def __repr__(self):
+        return "WalFrame(%d, page=%d, commit=%d)" % (self.index, self.page_number, self.commit_size)
+
+
+class WalSnapshot():
+    """
+    State of the database after a commit frame, or after the trailing uncommitted frames
+    """
+    __slots__ = ("index", "frame_index", "db_size", "committed")
+
+    def __init__(self, index, frame_index, db_size, committed):
+        self.index = index
+        self.frame_index = frame_index  # last frame belonging to the snapshot
+        self.db_size = db_size  # database size in pages
+        self.committed = committed
+
+    def __repr__(self):
+        return "WalSnapshot(%d, frame=%d, size=%d, committed=%s)" \
+               % (self.index, self.frame_index, self.db_size, self.committed)
+
+
+def _checksum(data, big_endian, s0, s1):
+    """
+    SQLite WAL checksum over data (length a multiple of 8) seeded with s0, s1
+    """
+    words = array.array("I")
+    words.frombytes(data)
+    if big_endian != (sys.byteorder == "big"):
+        words.byteswap()
+    for i in range(0, len(words), 2):
+        s0 = (s0 + words[i] + s1) & 0xffffffff
+        s1 = (s1 + words[i + 1] + s0) & 0xffffffff
+    return s0, s1
+
+
+class WalFile():
+    """
+    Read-only view of a -wal file. The file is mmapped and the frame headers walked once;
+    page images are sliced from the map on demand.
+    """
+
+    def __init__(self, wal_path, verify_checksums=True):
+        self._path = wal_path
+        self._file = open(wal_path, "rb")
+        self._map = None
+        self.frames = []
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size < WAL_HEADER_SIZE:
+                raise WalError("{0} is too small to be a WAL file".format(wal_path))
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            (magic, self.version, self.page_size, self.checkpoint_sequence,
+             self.salt1, self.salt2, checksum1, checksum2) = _WAL_HEADER.unpack_from(self._map, 0)
+            if magic not in (WAL_MAGIC_LE, WAL_MAGIC_BE):
+                raise WalError("{0} has no WAL header magic".format(wal_path))
+            if self.page_size < 512 or self.page_size > 65536 or self.page_size & (self.page_size - 1):
+                raise WalError("{0} has an invalid page size {1}".format(wal_path, self.page_size))
+            self._big_endian = magic == WAL_MAGIC_BE
+            self.checksums_verified = verify_checksums
+            self.header_valid = _checksum(self._map[0:24], self._big_endian, 0, 0) == (checksum1, checksum2)
+            self._walk_frames(size, checksum1, checksum2, verify_checksums and self.header_valid)
+        except Exception:
+            self.close()
+            raise
+
+    def _walk_frames(self, size, s0, s1, verify_checksums):
+        """
+        Walk the frame headers. Once the checksum chain breaks later frames can not be
+        trusted by SQLite, but they are kept and flagged for recovery.
+        """
+        frame_size = FRAME_HEADER_SIZE + self.page_size
+        chain_intact = verify_checksums
+        offset = WAL_HEADER_SIZE
+        index = 0
+        while offset + frame_size <= size:
+            page_number, commit_size, salt1, salt2, checksum1, checksum2 = _FRAME_HEADER.unpack_from(self._map, offset)
+            salt_valid = salt1 == self.salt1 and salt2 == self.salt2
+            checksum_valid = False
+            if chain_intact and salt_valid:
+                s0, s1 = _checksum(self._map[offset:offset + 8], self._big_endian, s0, s1)
+                s0, s1 = _checksum(self._map[offset + FRAME_HEADER_SIZE:offset + frame_size], self._big_endian, s0, s1)
+                checksum_valid = (s0, s1) == (checksum1, checksum2)
+            chain_intact = chain_intact and checksum_valid
+            if page_number > 0:
+                self.frames.append(WalFrame(index, page_number, commit_size, offset + FRAME_HEADER_SIZE,
+                                            salt_valid, checksum_valid))
+            offset += frame_size
+            index += 1
+
+    def page(self, frame):
+        """
+        Return the page image held in frame
+        """
+        return self._map[frame.offset:frame.offset + self.page_size]
+
+    def snapshots(self):
+        """
+        Return a WalSnapshot for every commit frame in the current WAL generation, oldest
+        first, followed by one for any trailing frames that were never committed. As in SQLite's
+        WAL recovery, frames stop at the first whose salt or cumulative checksum does not
+        match, and a WAL whose header checksum fails has none; without checksum verification
+        only frames left over from an earlier generation are skipped.
+        """
+        snapshots = []
+        db_size = 0
+        last_frame = None
+        if self.checksums_verified and not self.header_valid:
+            return snapshots
+        for frame in self.frames:
+            if self.checksums_verified and not (frame.salt_valid and frame.checksum_valid):
+                break
+            if not frame.salt_valid:
+                continue  # left over from an earlier generation of the WAL
+            last_frame = frame
+            db_size = max(db_size, frame.page_number)
+            if frame.is_commit:
+                db_size = frame.commit_size
+                snapshots.append(WalSnapshot(len(snapshots), frame.index, db_size, True))
+        if last_frame is not None and not last_frame.is_commit:
+            snapshots.append(WalSnapshot(len(snapshots), last_frame.index, db_size, False))
+        return snapshots
+
+    def snapshot_pages(self, snapshot):
+        """
+        Return {page number: WalFrame} with the newest image of each page as of snapshot
+        """
+        pages = {}
+        for frame in self.frames:
+            if frame.index > snapshot.frame_index:
+                break
+            if frame.salt_valid:
+                pages[frame.page_number] = frame
+        return pages
+
+    def write_snapshot(self, database_file, snapshot, output_path):
+        """
+        Write a standalone copy of database_file with the pages of snapshot applied. The copy
+        is switched to rollback journal mode so SQLite never looks for a -wal beside it.
+        """
+        with open(output_path, "wb") as output_file:
+            if os.path.isfile(database_file):
+                with open(database_file, "rb") as source_file:
+                    shutil.copyfileobj(source_file, output_file, 1024 * 1024)
+            output_file.truncate(snapshot.db_size * self.page_size)
+            pages = self.snapshot_pages(snapshot)
+            for page_number in sorted(pages):
+                if page_number > snapshot.db_size:
+                    continue
+                output_file.seek((page_number - 1) * self.page_size)
+                output_file.write(self.page(pages[page_number]))
+            output_file.seek(18)
+            output_file.write(b"\x01\x01")  # file format write/read version 1 = legacy journal
+        return output_path
+
+    def close(self):
+        """
+        Release the map and the file handle
+        """
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def __repr__(self):
+        return "WalFile(%s, frames=%d)" % (self._path, len(self.frames))
+
+
+def wal_path_for(database_file):
+    """
+    Return the -wal path for database_file if it exists and holds at least one frame, else None
+    """
+    wal_path = database_file + "-wal"
+    if os.path.isfile(wal_path) and os.path.getsize(wal_path) > WAL_HEADER_SIZE:
+        return wal_path
+    return None
+
+
+def snapshot_copy(database_file, snapshot_index=-1, temp_dir=None):
+    """
+    Write a temporary copy of database_file at one WAL snapshot (default the newest committed
+    state) and return its path, or None if there is no usable -wal. The caller removes the copy.
+    """
+    wal_path = wal_path_for(database_file)
+    if wal_path is None:
+        return None
+    with WalFile(wal_path) as wal_file:
+        snapshots = wal_file.snapshots()
+        if snapshot_index == -1:
+            snapshots = [snapshot for snapshot in snapshots if snapshot.committed]
+        if not snapshots:
+            return None
+        handle, output_path = tempfile.mkstemp(suffix=".sqlite", prefix="osxripper_wal_", dir=temp_dir)
+        os.close(handle)
+        try:
+            return wal_file.write_snapshot(database_file, snapshots[snapshot_index], output_path)
+        except Exception:
+            os.remove(output_path)
+            raise
@@ -0,0 +1,80 @@
+""" Module for streaming the entries of zsh history files, plain or EXTENDED_HISTORY """
+import datetime
+import logging
+import re
+import riplib.osxripper_lines
+import riplib.osxripper_time
+
+__author__ = 'osxripper'
+__version__ = '0.1'
+__license__ = 'GPLv3'
+
+META = 0x83  # zsh writes bytes it treats as special as META followed by the byte xor 0x20
+# ": <start epoch>:<elapsed seconds>;<command>" written with setopt EXTENDED_HISTORY
+EXTENDED_PATTERN = re.compile(rb": *(\d+):(\d+);(.*)", re.DOTALL)
+
+
+def unmetafy(data):
+    """
+    Undo the zsh meta encoding of the bytes of a history line
+    """
+    if META not in data:
+        return data
+    result = bytearray()
+    meta = False
+    for byte in data:
+        if meta:
+            result.append(byte ^ 0x20)
+            meta = False
+        elif byte == META:
+            meta = True
+        else:
+            result.append(byte)
+    return bytes(result)
+
+
+def iter_entries(path):
+    """
+    Yield (start time, elapsed seconds, command) for each entry of a zsh history file,
+    streaming. Commands spanning lines, written with a backslash before each newline, are
+    joined. Entries written without EXTENDED_HISTORY have no start time or elapsed seconds.
+    A file that cannot be read to the end is logged and yields the entries read before the error.
+    """
+    try:
+        with open(path, "rb") as history_file:
+            pending = None
+            for line in history_file:
+                line = unmetafy(line.rstrip(b"\r\n"))
+                pending = line if pending is None else pending + b"\n" + line
+                if pending.endswith(b"\\"):
+                    pending = pending[:-1]
+                    continue
+                yield _entry(pending)
+                pending = None
+            if pending is not None:
+                yield _entry(pending)
+    except OSError as error:
+        logging.error("%s: %s", path, error)
+        print("[ERROR] {0}: {1}".format(path, error))
+
+
+def _entry(data):
+    """
+    Split the unmetafied bytes of a history entry into (start time, elapsed seconds, command)
+    """
+    match = EXTENDED_PATTERN.match(data)
+    if match is None:
+        return None, None, riplib.osxripper_lines.decode_line(data)
+    return (riplib.osxripper_time.get_unix_seconds(int(match.group(1))), int(match.group(2)),
+            riplib.osxripper_lines.decode_line(match.group(3)))
+
+
+def history_rows(path, since=None, until=None):
+    """
+    Return the (start time, elapsed seconds, command) entries of a zsh history file inside the
+    since/until window (UTC datetimes), entries without a start time are kept. Plain tuples are
+    returned so the function can run in a worker process.
+    """
+    return [entry for entry in iter_entries(path)
+            if not isinstance(entry[0], datetime.datetime) or
+            ((since is None or entry[0] >= since) and (until is None or entry[0] <= until))]